@@ -1,28 +1,28 @@
 import os
 from flask import Flask
-from flask_mail import Mail
 
-from config import SECRET_KEY, UPLOAD_FOLDER
+from config import (
+    SECRET_KEY, UPLOAD_FOLDER, DB_AUTO_MIGRATE,
+    MAIL_SERVER, MAIL_PORT, MAIL_USE_TLS,
+    MAIL_USERNAME, MAIL_PASSWORD, MAIL_DEFAULT_SENDER,
+)
 
 # --------------------------------------------------
 # AUTO-SELECT DATABASE BACKEND
 # --------------------------------------------------
-if os.getenv("RENDER") or os.getenv("DATABASE_URL"):
-    from db_render import init_db, seed_data, get_db_connection
+import db
+import cache
+import assets
+import fragments
+import migrations
+import profiling
+import metrics
+
+if db.ON_RENDER:
     print("🔗 Connected to: Render PostgreSQL (db_render.py)")
 else:
-    from db_local import init_db, seed_data, get_db_connection
     print("🗄 Using Local SQLite (db_local.py)")
 
-# --------------------------------------------------
-# BLUEPRINTS
-# --------------------------------------------------
-from routes.auth import auth_bp
-from routes.main import main_bp
-from routes.admin import admin_bp
-
-mail = Mail()
-
 # --------------------------------------------------
 # APPLICATION FACTORY
 # --------------------------------------------------
@@ -37,31 +37,71 @@ def create_app():
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
 
     # -----------------------------
-    # MAIL CONFIG (USE ENV VARS)
+    # MAIL CONFIG (USE ENV VARS; Flask-Mail is loaded by the worker, see mailer.py)
+    # -----------------------------
+    app.config["MAIL_SERVER"] = MAIL_SERVER
+    app.config["MAIL_PORT"] = MAIL_PORT
+    app.config["MAIL_USE_TLS"] = MAIL_USE_TLS
+    app.config["MAIL_USERNAME"] = MAIL_USERNAME
+    app.config["MAIL_PASSWORD"] = MAIL_PASSWORD
+    app.config["MAIL_DEFAULT_SENDER"] = MAIL_DEFAULT_SENDER
+
+    # -----------------------------
+    # DATABASE CONNECTION POOL
     # -----------------------------
-    app.config["MAIL_SERVER"] = "smtp.gmail.com"
-    app.config["MAIL_PORT"] = 587
-    app.config["MAIL_USE_TLS"] = True
-    app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
-    app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
-    app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_USERNAME")
+    db.init_app(app)
 
-    mail.init_app(app)
+    # -----------------------------
+    # INSTRUMENTATION (query timing, Server-Timing, slow log; INSTRUMENT=1)
+    # -----------------------------
+    profiling.init_app(app)
 
     # -----------------------------
-    # REGISTER BLUEPRINTS
+    # PROMETHEUS METRICS (/metrics, aggregated across gunicorn workers)
     # -----------------------------
+    metrics.init_app(app)
+
+    # -----------------------------
+    # RESULT CACHE (catalogue reads)
+    # -----------------------------
+    cache.init_app(app)
+
+    # -----------------------------
+    # STATIC ASSETS (fingerprinted URLs, long-lived caching)
+    # -----------------------------
+    assets.init_app(app)
+
+    # -----------------------------
+    # TEMPLATE FRAGMENT CACHE ({% cache %} tag)
+    # -----------------------------
+    fragments.init_app(app)
+
+    # -----------------------------
+    # REGISTER BLUEPRINTS (imported here: `import app` stays light)
+    # -----------------------------
+    from routes.auth import auth_bp
+    from routes.main import main_bp
+    from routes.admin import admin_bp
+    from routes.api import api_bp
+    from cli import register_cli
+
     app.register_blueprint(auth_bp)
     app.register_blueprint(main_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp)
+
+    # -----------------------------
+    # CLI COMMANDS
+    # -----------------------------
+    register_cli(app)
 
     # -----------------------------
-    # DATABASE INITIALIZATION
+    # DATABASE SCHEMA (one version check per boot)
     # -----------------------------
-    with app.app_context():
-        print("📦 Initializing Database...")
-        init_db()
-        seed_data()
+    migrations.check(auto_migrate=DB_AUTO_MIGRATE)
+
+    # The autocomplete index is not built here: the first suggestion query
+    # builds it, or wsgi.py's warm-up does before gunicorn forks.
 
     return app
 
@@ -0,0 +1,201 @@
+# fingerprinted static URLs + long-lived caching
+#
+# - url_for('static', filename=...) and the `asset` template filter append
+#   ?v=<content hash>, so a changed file always gets a new URL
+# - requests carrying the current fingerprint, and content-addressed
+#   uploads (blobs/variants are named after their SHA-256), are served
+#   with `Cache-Control: public, max-age=31536000, immutable`
+# - CSS/JS/SVG are served from precompressed .br/.gz siblings when the
+#   client accepts them (built by `flask compress-assets`)
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import request, send_from_directory
+
+from images import static_fs_path
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# content-addressed: the URL changes whenever the bytes do. Only variants
+# named <source sha256>-<label>.<ext> are; older ones were named after the
+# source's base name and get the default caching.
+IMMUTABLE_PREFIXES = ("uploads/blobs/",)
+_VARIANT_NAME = re.compile(r"uploads/variants/[0-9a-f]{64}-\w+\.\w+$")
+
+COMPRESSIBLE = (".css", ".js", ".svg")
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_fingerprints = {}      # path -> ((mtime_ns, size), digest)
+_lock = threading.Lock()
+
+
+def fingerprint(path):
+    """Short content hash of a file (None if it doesn't exist)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(64 * 1024), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()[:12]
+
+    with _lock:
+        _fingerprints[path] = (stamp, digest)
+    return digest
+
+
+def content_addressed(rel):
+    """Whether a path under static/ is named after its own content."""
+    return rel.startswith(IMMUTABLE_PREFIXES) or bool(_VARIANT_NAME.match(rel))
+
+
+def asset_url(url):
+    """
+    Adds ?v=<fingerprint> to a stored `/static/...` URL.
+    Content-addressed uploads, URLs that already have a query string and
+    anything outside static/ are returned unchanged.
+    """
+    if not url or "?" in url:
+        return url
+    rel = url.lstrip("/")[len("static/"):]
+    if content_addressed(rel):
+        return url
+
+    fs_path = static_fs_path(url)
+    version = fingerprint(fs_path) if fs_path else None
+    return f"{url}?v={version}" if version else url
+
+
+# -------------------------------------------------
+# PRECOMPRESSION
+# -------------------------------------------------
+def compress_file(path):
+    """Writes path.gz (and path.br when Brotli is installed); returns suffixes written."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+
+    written = []
+    with open(path + ".gz", "wb") as out:
+        out.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(".gz")
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        with open(path + ".br", "wb") as out:
+            out.write(brotli.compress(data, quality=11))
+        written.append(".br")
+
+    return written
+
+
+def compress_static(static_folder):
+    """Precompresses every CSS/JS/SVG file under static/; returns how many."""
+    done = 0
+    for root, _, files in os.walk(static_folder):
+        if os.path.relpath(root, static_folder).startswith("uploads"):
+            continue
+        for name in files:
+            if name.endswith(COMPRESSIBLE):
+                compress_file(os.path.join(root, name))
+                done += 1
+    return done
+
+
+def _precompressed(static_folder, filename):
+    """(encoding, sibling filename) of a fresh precompressed copy the client accepts."""
+    source = os.path.join(static_folder, filename)
+    try:
+        source_mtime = os.path.getmtime(source)
+    except OSError:
+        return None
+
+    for encoding, suffix in ENCODINGS:
+        if encoding not in request.accept_encodings:
+            continue
+        try:
+            # a stale sibling (source edited after compress-assets) is ignored
+            if os.path.getmtime(source + suffix) >= source_mtime:
+                return encoding, filename + suffix
+        except OSError:
+            continue
+    return None
+
+
+# -------------------------------------------------
+# FLASK HOOKS
+# -------------------------------------------------
+def init_app(app):
+    static_folder = app.static_folder
+
+    @app.url_defaults
+    def add_fingerprint(endpoint, values):
+        if endpoint != "static" or "v" in values or not values.get("filename"):
+            return
+        version = fingerprint(os.path.join(static_folder, values["filename"]))
+        if version:
+            values["v"] = version
+
+    @app.before_request
+    def serve_precompressed():
+        if request.endpoint != "static" or request.method not in ("GET", "HEAD"):
+            return None
+        filename = (request.view_args or {}).get("filename", "")
+        if not filename.endswith(COMPRESSIBLE):
+            return None
+
+        found = _precompressed(static_folder, filename)
+        if found is None:
+            return None
+
+        encoding, sibling = found
+        response = send_from_directory(
+            static_folder, sibling, mimetype=_mimetype(filename), etag=True
+        )
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return _cache_headers(response, static_folder, filename)
+
+    @app.after_request
+    def static_cache_headers(response):
+        if request.endpoint == "static" and "Content-Encoding" not in response.headers:
+            filename = (request.view_args or {}).get("filename", "")
+            if filename.endswith(COMPRESSIBLE):
+                response.vary.add("Accept-Encoding")
+            _cache_headers(response, static_folder, filename)
+        return response
+
+    app.jinja_env.filters["asset"] = asset_url
+
+
+def _mimetype(filename):
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def _cache_headers(response, static_folder, filename):
+    """One-year immutable caching for URLs whose content can never change."""
+    if response.status_code not in (200, 304):
+        return response
+
+    version = request.args.get("v")
+    if content_addressed(filename) or (
+        version and version == fingerprint(os.path.join(static_folder, filename))
+    ):
+        response.headers["Cache-Control"] = IMMUTABLE
+    return response
@@ -0,0 +1,597 @@
+# benchmark / load test for the catalogue routes
+#
+#   python bench.py seed --cars 100000 --db /tmp/bench.db
+#   python bench.py run --db /tmp/bench.db                      (Flask test client)
+#   python bench.py run --db /tmp/bench.db --http -c 16         (real gunicorn)
+#   python bench.py compare before.json after.json
+#   python bench.py startup --db /tmp/bench.db                  (cold start)
+#
+# - `seed` writes a synthetic inventory (sellers, cars, gallery rows) through
+#   the same batched path as `flask import-cars`; the same --seed gives the
+#   same data. Without --db it uses DATABASE_URL (a local Postgres, with
+#   DB_SSLMODE=disable).
+# - `run` replays a fixed mix of URLs per scenario (search, filters, sorts,
+#   deep pagination by cursor and by legacy ?page=N, detail pages, API) and
+#   reports p50/p95/p99 latency, throughput and queries per request. The
+#   query count and DB time come from the Server-Timing header, so the app
+#   runs with INSTRUMENT=1 (slow-query logging silenced).
+#   --http starts gunicorn (or targets --url) and drives it from -c threads.
+#   --cold switches the result and fragment caches off.
+# - results are saved as JSON; `compare` prints the deltas and exits 1 when
+#   a scenario's p95 got slower than --threshold.
+# - `startup` starts fresh interpreters under `-X importtime` and times
+#   `import app`, create_app() and the first request, listing the heaviest
+#   imports; it exits 1 when the median time to first response is over
+#   --target-ms (the number to track across commits).
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+import click
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, "bench-results")
+
+MAKES = {
+    "Toyota": ["Corolla", "Camry", "RAV4", "Highlander", "Land Cruiser", "Hilux"],
+    "Honda": ["Civic", "Accord", "CR-V", "Pilot"],
+    "Lexus": ["RX 350", "ES 350", "GX 460", "LX 570"],
+    "Mercedes-Benz": ["C300", "E350", "GLE 450", "G63"],
+    "BMW": ["320i", "530i", "X5", "X3"],
+    "Ford": ["Focus", "Fusion", "Explorer", "Ranger"],
+    "Hyundai": ["Elantra", "Sonata", "Tucson", "Santa Fe"],
+    "Kia": ["Rio", "Optima", "Sportage", "Sorento"],
+    "Peugeot": ["301", "508", "3008"],
+    "Nissan": ["Altima", "Sentra", "Pathfinder", "Patrol"],
+}
+CATEGORIES = ["Sedan", "SUV", "Coupe", "Truck", "Hatchback", "Van"]
+TRIMS = ["", "Sport", "Executive", "Limited", "LE", "XLE", "Premium"]
+CONDITIONS = ["Excellent", "Very good", "Good", "Fair"]
+IMAGES = [f"/static/images/{name}" for name in ("sedan.jpg", "suv.jpg", "coupe.jpg")]
+
+SCENARIOS = (
+    "index", "search", "filter", "sort", "deep_cursor", "deep_offset",
+    "detail", "api", "suggest",
+)
+PAGE_DEPTHS = (10, 100, 1000)
+
+
+def _apply_env(db_path, cold, instrument=True):
+    """Settings every app module reads at import: must run before importing them."""
+    if db_path:
+        os.environ["DB_NAME"] = os.path.abspath(db_path)
+        os.environ.pop("DATABASE_URL", None)
+    if cold:
+        os.environ["CACHE_TYPE"] = "null"
+        os.environ["FRAGMENT_CACHE"] = "0"
+    if instrument:
+        os.environ["INSTRUMENT"] = "1"
+        os.environ["SLOW_QUERY_MS"] = os.environ["SLOW_REQUEST_MS"] = "1e9"
+
+
+def _make_app():
+    sys.path.insert(0, BASE_DIR)
+    from app import create_app
+
+    return create_app()
+
+
+# =========================================================
+# SYNTHETIC INVENTORY
+# =========================================================
+def _fake_car(rng, seller_ids):
+    make = rng.choice(list(MAKES))
+    model = rng.choice(MAKES[make])
+    year = rng.randint(2005, 2025)
+    trim = rng.choice(TRIMS)
+    km = int(rng.expovariate(1 / 60_000))
+    price = round(rng.lognormvariate(16, 0.7), -4)
+    return {
+        "title": " ".join(part for part in (str(year), make, model, trim) if part),
+        "description": f"{rng.choice(CONDITIONS)} {make} {model}, "
+                       f"{'foreign' if rng.random() < 0.6 else 'locally'} used, "
+                       f"{rng.choice(['automatic', 'manual'])} transmission.",
+        "price": price,
+        "category": rng.choice(CATEGORIES),
+        "mileage": f"{km:,} km",
+        "body_condition": rng.choice(CONDITIONS),
+        "fuel_efficiency": f"{rng.uniform(6, 20):.1f} km/L",
+        "engine_performance": f"{rng.choice(['1.6', '2.0', '2.5', '3.5', '5.7'])}L",
+        "seller_id": rng.choice(seller_ids),
+        "main_image": rng.choice(IMAGES),
+    }
+
+
+@click.group()
+def cli():
+    """Catalogue benchmarks (see the top of bench.py)."""
+
+
+@cli.command()
+@click.option("--cars", default=10_000, show_default=True)
+@click.option("--sellers", default=None, type=int, help="Default: one per 50 cars.")
+@click.option("--images-per-car", default=3, show_default=True)
+@click.option("--db", "db_path", help="SQLite file (default: DATABASE_URL).")
+@click.option("--seed", default=42, show_default=True)
+@click.option("--batch-size", default=1000, show_default=True)
+def seed(cars, sellers, images_per_car, db_path, seed, batch_size):
+    """Writes a synthetic inventory."""
+    _apply_env(db_path, cold=True, instrument=False)
+    app = _make_app()
+
+    import db
+    import repository
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    with app.app_context():
+        sellers = sellers or max(cars // 50, 1)
+        with db.transaction():
+            seller_ids = db.insert_many(
+                "sellers", ("name", "contact_email", "phone", "address", "about"),
+                [(f"Dealer {i:05d}", f"dealer{i}@example.com", f"080{i:08d}",
+                  rng.choice(["Lagos", "Abuja", "Port Harcourt", "Kano", "Ibadan"]),
+                  "Synthetic benchmark dealer.") for i in range(sellers)],
+            )
+
+        done = 0
+        while done < cars:
+            size = min(batch_size, cars - done)
+            batch = [
+                (_fake_car(rng, seller_ids),
+                 [rng.choice(IMAGES) for _ in range(images_per_car)])
+                for _ in range(size)
+            ]
+            repository.import_cars(batch)
+            done += size
+            if done % (batch_size * 20) == 0 or done == cars:
+                rate = done / (time.perf_counter() - started)
+                click.echo(f"  {done:,} cars ({rate:,.0f}/s)")
+
+        if db.DIALECT == "postgres":
+            db.execute("ANALYZE")
+    click.echo(f"✅ Seeded {sellers:,} sellers and {cars:,} cars "
+               f"in {time.perf_counter() - started:.1f}s")
+
+
+# =========================================================
+# URL PLAN (fixed per --seed, built once against the data)
+# =========================================================
+def build_plan(app, requests_per, rng):
+    """{scenario: [url, ...]} drawn from the seeded data."""
+    import db
+    import repository
+    from pagination import encode_cursor
+
+    with app.test_request_context():
+        ids = [r["id"] for r in db.query("SELECT id FROM cars ORDER BY id")]
+        if not ids:
+            raise click.ClickException("no cars: run `python bench.py seed` first")
+        words = sorted({w for make, models in MAKES.items() for w in [make] + models})
+
+        def search():
+            return {"search": rng.choice(words)}
+
+        def filters():
+            args = {"category": rng.choice(CATEGORIES)}
+            pick = rng.random()
+            if pick < 0.4:
+                low = rng.choice([0, 2_000_000, 5_000_000, 10_000_000])
+                args.update(min_price=low, max_price=low + rng.choice([3_000_000, 10_000_000]))
+            elif pick < 0.7:
+                args["max_mileage"] = rng.choice([10_000, 50_000, 100_000])
+            else:
+                args["min_year"] = rng.randint(2005, 2022)
+            return args
+
+        # boundary rows at each depth: keyset cursor vs legacy offset
+        cursors = []
+        for depth in PAGE_DEPTHS:
+            for sort_by in ("newest", "price"):
+                row = repository.list_cars(sort_by=sort_by, limit=1, offset=depth * 6)
+                if row:
+                    key = repository.car_sort_key(row[0], sort_by)
+                    cursors.append((sort_by, encode_cursor(sort_by, "next", key, depth + 1)))
+        last_page = max(len(ids) // 6, 1)
+
+        makers = {
+            "index": lambda: "/",
+            "search": lambda: "/cars?" + urlencode(search()),
+            "filter": lambda: "/cars?" + urlencode(filters()),
+            "sort": lambda: "/cars?" + urlencode(
+                dict(sort_by=rng.choice(["price", "price_desc", "title"]), **(
+                    filters() if rng.random() < 0.5 else {}))),
+            "deep_cursor": lambda: "/cars?" + urlencode(
+                dict(zip(("sort_by", "cursor"), rng.choice(cursors)))) if cursors else "/cars",
+            "deep_offset": lambda: "/cars?" + urlencode(
+                {"page": min(rng.choice(PAGE_DEPTHS), last_page)}),
+            "detail": lambda: f"/cars/{rng.choice(ids)}",
+            "api": lambda: "/api/cars?" + urlencode(dict(limit=20, **filters())),
+            "suggest": lambda: "/api/suggest?" + urlencode(
+                {"q": rng.choice(words)[:rng.randint(2, 5)].lower()}),
+        }
+        return (
+            {name: [makers[name]() for _ in range(requests_per)] for name in makers},
+            len(ids),
+        )
+
+
+# =========================================================
+# DRIVERS
+# =========================================================
+_SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def _sample(started, status, server_timing):
+    elapsed = time.perf_counter() - started
+    found = _SERVER_TIMING.search(server_timing or "")
+    if found:
+        return elapsed, status, float(found.group(1)), int(found.group(2))
+    return elapsed, status, None, None
+
+
+def drive_client(app, urls):
+    """Sequential requests through the Flask test client (no network, one thread)."""
+    client = app.test_client()
+    samples = []
+    for url in urls:
+        started = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        samples.append(_sample(started, response.status_code,
+                               response.headers.get("Server-Timing")))
+    return samples
+
+
+def drive_http(base_url, urls, concurrency):
+    """`concurrency` threads, each with a keep-alive connection, sharing the URL list."""
+    parts = urlsplit(base_url)
+    queue = list(reversed(urls))
+    lock = threading.Lock()
+    samples = []
+
+    def worker():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+        mine = []
+        while True:
+            with lock:
+                if not queue:
+                    break
+                url = queue.pop()
+            started = time.perf_counter()
+            try:
+                conn.request("GET", url)
+                response = conn.getresponse()
+                response.read()
+                mine.append(_sample(started, response.status,
+                                    response.getheader("Server-Timing")))
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                mine.append((time.perf_counter() - started, 0, None, None))
+        conn.close()
+        with lock:
+            samples.extend(mine)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, threads):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+         "-w", str(workers), "--threads", str(threads),
+         "-b", f"127.0.0.1:{port}", "wsgi:app"],
+        cwd=BASE_DIR, env=os.environ.copy(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise click.ClickException("gunicorn exited during startup")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/suggest?q=a")
+            conn.getresponse().read()
+            return proc, base_url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise click.ClickException("gunicorn did not start within 120s")
+
+
+# =========================================================
+# REPORTING
+# =========================================================
+def _percentile(ordered, p):
+    if not ordered:
+        return None
+    index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarise(samples, wall_seconds):
+    ordered = sorted(s[0] for s in samples)
+    timed = [s for s in samples if s[3] is not None]
+    ms = lambda v: round(v * 1000, 2) if v is not None else None  # noqa: E731
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not 200 <= s[1] < 400),
+        "throughput_rps": round(len(samples) / wall_seconds, 1) if wall_seconds else None,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(_percentile(ordered, 50)),
+        "p95_ms": ms(_percentile(ordered, 95)),
+        "p99_ms": ms(_percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1]) if ordered else None,
+        "queries_per_request": round(sum(s[3] for s in timed) / len(timed), 2) if timed else None,
+        "db_ms_per_request": round(sum(s[2] for s in timed) / len(timed), 2) if timed else None,
+    }
+
+
+def _print_table(results):
+    click.echo(f"{'scenario':<12} {'req':>5} {'err':>4} {'rps':>8} {'p50':>8} "
+               f"{'p95':>8} {'p99':>8} {'q/req':>6} {'db ms':>7}")
+    for name, r in results.items():
+        click.echo(
+            f"{name:<12} {r['requests']:>5} {r['errors']:>4} {r['throughput_rps'] or 0:>8} "
+            f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+            f"{r['queries_per_request'] if r['queries_per_request'] is not None else '-':>6} "
+            f"{r['db_ms_per_request'] if r['db_ms_per_request'] is not None else '-':>7}"
+        )
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+@cli.command()
+@click.option("--db", "db_path", help="SQLite file (default: DATABASE_URL).")
+@click.option("--scenario", "-s", "scenarios", multiple=True,
+              type=click.Choice(SCENARIOS), help="Repeatable; default: all.")
+@click.option("--requests", "requests_per", default=200, show_default=True,
+              help="Requests per scenario.")
+@click.option("--warmup", default=20, show_default=True, help="Untimed requests per scenario.")
+@click.option("--http", "use_http", is_flag=True, help="Drive a real gunicorn over HTTP.")
+@click.option("--url", help="With --http: an already running server instead.")
+@click.option("--concurrency", "-c", default=8, show_default=True)
+@click.option("--workers", "-w", default=2, show_default=True)
+@click.option("--threads", default=4, show_default=True)
+@click.option("--cold", is_flag=True, help="Result and fragment caches off.")
+@click.option("--seed", default=7, show_default=True)
+@click.option("--out", type=click.Path(dir_okay=False), help="Results JSON path.")
+def run(db_path, scenarios, requests_per, warmup, use_http, url, concurrency,
+        workers, threads, cold, seed, out):
+    """Replays the scenario URL mix and records latency / throughput / queries."""
+    _apply_env(db_path, cold)
+    app = _make_app()
+    import db
+
+    rng = random.Random(seed)
+    plan, car_count = build_plan(app, requests_per + warmup, rng)
+    names = scenarios or SCENARIOS
+
+    proc = None
+    if use_http and not url:
+        proc, url = start_gunicorn(workers, threads)
+    try:
+        results = {}
+        for name in names:
+            urls = plan[name]
+            click.echo(f"▶ {name} ({requests_per} requests)")
+            if use_http:
+                drive_http(url, urls[:warmup], concurrency)
+                started = time.perf_counter()
+                samples = drive_http(url, urls[warmup:], concurrency)
+            else:
+                drive_client(app, urls[:warmup])
+                started = time.perf_counter()
+                samples = drive_client(app, urls[warmup:])
+            results[name] = summarise(samples, time.perf_counter() - started)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "backend": db.DIALECT,
+            "cars": car_count,
+            "driver": "http" if use_http else "test_client",
+            "concurrency": concurrency if use_http else 1,
+            "workers": workers if proc is not None else None,
+            "threads": threads if proc is not None else None,
+            "cache": "cold" if cold else "warm",
+            "requests_per_scenario": requests_per,
+            "seed": seed,
+        },
+        "scenarios": results,
+    }
+    _print_table(results)
+
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, "{}-{}-{}.json".format(
+            datetime.now().strftime("%Y%m%d-%H%M%S"), report["meta"]["driver"],
+            report["meta"]["cache"]))
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    click.echo(f"💾 {out}")
+
+
+@cli.command()
+@click.argument("baseline", type=click.File("r"))
+@click.argument("candidate", type=click.File("r"))
+@click.option("--threshold", default=10.0, show_default=True,
+              help="Percent p95 slowdown that counts as a regression.")
+def compare(baseline, candidate, threshold):
+    """Per-scenario deltas between two result files."""
+    old, new = json.load(baseline)["scenarios"], json.load(candidate)["scenarios"]
+    regressions = []
+    click.echo(f"{'scenario':<12} {'p50 ms':>17} {'p95 ms':>17} {'rps':>15} {'q/req':>11}")
+    for name in new:
+        if name not in old:
+            continue
+        a, b = old[name], new[name]
+        change = (b["p95_ms"] - a["p95_ms"]) / a["p95_ms"] * 100 if a["p95_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = " ⚠️"
+            regressions.append(name)
+        click.echo(
+            f"{name:<12} {a['p50_ms']:>7} → {b['p50_ms']:<7} {a['p95_ms']:>7} → {b['p95_ms']:<7}"
+            f" {a['throughput_rps']:>6} → {b['throughput_rps']:<6}"
+            f" {a['queries_per_request']} → {b['queries_per_request']}"
+            f"  ({change:+.0f}% p95){flag}"
+        )
+    if regressions:
+        click.echo(f"❌ p95 regressed > {threshold:g}%: {', '.join(regressions)}")
+        sys.exit(1)
+    click.echo("✅ No p95 regression")
+
+
+# =========================================================
+# COLD START
+# =========================================================
+# run in a fresh interpreter; timings go to stdout as the last line
+_STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+status = app.test_client().get(sys.argv[1]).status_code
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000,
+                  "create_app_ms": (created - imported) * 1000,
+                  "first_request_ms": (done - created) * 1000,
+                  "status": status}))
+"""
+
+_IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    """Self time per top-level package (ms) from `-X importtime` output."""
+    packages = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match:
+            package = match.group(4).split(".")[0]
+            packages[package] = packages.get(package, 0) + int(match.group(1)) / 1000
+    return packages
+
+
+def _median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+@cli.command()
+@click.option("--db", "db_path", help="SQLite file (default: DATABASE_URL).")
+@click.option("--runs", default=5, show_default=True)
+@click.option("--path", default="/cars", show_default=True, help="First request.")
+@click.option("--target-ms", default=400.0, show_default=True,
+              help="Median time to first response allowed.")
+@click.option("--top", default=12, show_default=True, help="Heaviest imports listed.")
+@click.option("--out", type=click.Path(dir_okay=False), help="Results JSON path.")
+def startup(db_path, runs, path, target_ms, top, out):
+    """Cold start: import time, create_app() and first request, in fresh processes."""
+    _apply_env(db_path, cold=False, instrument=False)
+    samples, packages = [], {}
+    for n in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _STARTUP_PROBE, path],
+            cwd=BASE_DIR, capture_output=True, text=True, timeout=300,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        if proc.returncode != 0:
+            raise click.ClickException(f"startup probe failed:\n{proc.stderr[-2000:]}")
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        sample["process_ms"] = wall_ms
+        sample["ready_ms"] = (
+            sample["import_ms"] + sample["create_app_ms"] + sample["first_request_ms"]
+        )
+        samples.append(sample)
+        for package, ms in parse_importtime(proc.stderr).items():
+            packages.setdefault(package, []).append(ms)
+        click.echo(f"▶ run {n + 1}: import {sample['import_ms']:.0f} ms, "
+                   f"create_app {sample['create_app_ms']:.0f} ms, "
+                   f"first request {sample['first_request_ms']:.0f} ms "
+                   f"(HTTP {sample['status']})")
+
+    keys = ("import_ms", "create_app_ms", "first_request_ms", "ready_ms", "process_ms")
+    result = {key: round(_median([s[key] for s in samples]), 1) for key in keys}
+    heaviest = sorted(
+        ((name, round(_median(ms), 1)) for name, ms in packages.items()),
+        key=lambda item: -item[1],
+    )[:top]
+
+    click.echo(f"{'import':>10} {'create_app':>11} {'first req':>10} {'ready':>8} {'process':>8}  (median ms)")
+    click.echo(" ".join(f"{result[k]:>{w}}" for k, w in zip(keys, (10, 11, 10, 8, 8))))
+    click.echo("heaviest imports (self ms, -X importtime inflates them a little):")
+    for name, ms in heaviest:
+        click.echo(f"  {name:<24} {ms:>7}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "runs": runs,
+            "path": path,
+            "target_ms": target_ms,
+        },
+        "startup": result,
+        "imports": dict(heaviest),
+    }
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, "{}-startup.json".format(
+            datetime.now().strftime("%Y%m%d-%H%M%S")))
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    click.echo(f"💾 {out}")
+
+    if result["ready_ms"] > target_ms:
+        click.echo(f"❌ First response after {result['ready_ms']:g} ms (target {target_ms:g} ms)")
+        sys.exit(1)
+    click.echo(f"✅ First response after {result['ready_ms']:g} ms (target {target_ms:g} ms)")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,262 @@
+# result cache for catalogue reads (listings, search, categories)
+#
+# Every key is prefixed with the catalogue *generation*, a counter stored in
+# the database and bumped in the same transaction as every car/seller write.
+# A write therefore makes all older entries unreachable at once, in every
+# gunicorn worker, and stale pages are never served. Old entries simply
+# age out of the LRU.
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, has_app_context
+
+import db
+from config import CACHE_TYPE, CACHE_DIR, CACHE_TTL, CACHE_MAX_ENTRIES
+
+
+# -------------------------------------------------
+# BACKENDS
+# -------------------------------------------------
+class MemoryBackend:
+    """Per-process LRU with a TTL on every entry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()      # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            if item[0] < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, item[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete_where(self, match):
+        """Drops every entry whose key satisfies `match(key)`; returns how many."""
+        with self._lock:
+            doomed = [key for key in self._data if match(key)]
+            for key in doomed:
+                del self._data[key]
+        return len(doomed)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FileSystemBackend:
+    """
+    Pickled entries in a directory shared by every worker on the host.
+    Writes go through a temp file + rename so readers never see half a file.
+    """
+
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".cache")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                expires_at, value = pickle.load(fh)
+        except (OSError, EOFError, pickle.PickleError):
+            return False, None
+        if expires_at < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False, None
+        return True, value
+
+    def set(self, key, value, ttl):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump((time.time() + ttl, value), fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+        self._writes += 1
+        if self._writes % 64 == 0:
+            self._prune()
+
+    def _prune(self):
+        # drop the least recently written files beyond max_entries
+        try:
+            entries = [
+                e for e in os.scandir(self.directory) if e.name.endswith(".cache")
+            ]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".cache"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def __len__(self):
+        return sum(1 for e in os.scandir(self.directory) if e.name.endswith(".cache"))
+
+
+class NullBackend:
+    """Caching switched off: every lookup is a miss."""
+
+    evictions = 0
+
+    def get(self, key):
+        return False, None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+# -------------------------------------------------
+# CATALOGUE GENERATION
+# -------------------------------------------------
+def catalogue_version():
+    """(generation, updated_at) of the catalogue, read once per request."""
+    if has_app_context():
+        version = g.get("_catalogue_version")
+        if version is None:
+            version = g._catalogue_version = _read_version()
+        return version
+    return _read_version()
+
+
+def current_generation():
+    return catalogue_version()[0]
+
+
+def _read_version():
+    row = db.query_one(
+        "SELECT generation, updated_at FROM catalogue_state WHERE id = 1"
+    )
+    return (row["generation"], row["updated_at"]) if row else (0, None)
+
+
+def bump_generation():
+    """
+    Invalidates every cached catalogue read.
+    Call it inside the write's transaction so both commit together.
+    """
+    db.execute(
+        "UPDATE catalogue_state "
+        "SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP "
+        "WHERE id = 1"
+    )
+    if has_app_context():
+        g.pop("_catalogue_version", None)
+
+
+# -------------------------------------------------
+# RESULT CACHE
+# -------------------------------------------------
+class ResultCache:
+    def __init__(self):
+        self.ttl = CACHE_TTL
+        self.backend = NullBackend()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0}
+
+    def configure(self, kind="memory", directory=None, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        if kind == "filesystem":
+            self.backend = FileSystemBackend(directory, max_entries)
+        elif kind == "memory":
+            self.backend = MemoryBackend(max_entries)
+        else:
+            self.backend = NullBackend()
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def get_or_set(self, key, loader, ttl=None):
+        """
+        Returns the cached value for `key` (a tuple of plain values) in the
+        current generation, or calls `loader()` and stores its result.
+        """
+        full_key = (current_generation(),) + tuple(key)
+
+        found, value = self.backend.get(full_key)
+        if found:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = loader()
+        self.backend.set(full_key, value, ttl or self.ttl)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counts)
+        lookups = data["hits"] + data["misses"]
+        data.update(
+            backend=type(self.backend).__name__,
+            entries=len(self.backend),
+            evictions=self.backend.evictions,
+            hit_ratio=round(data["hits"] / lookups, 3) if lookups else None,
+        )
+        return data
+
+
+results = ResultCache()
+
+
+def init_app(app):
+    results.configure(
+        kind=app.config.get("CACHE_TYPE", CACHE_TYPE),
+        directory=app.config.get("CACHE_DIR", CACHE_DIR),
+        ttl=app.config.get("CACHE_TTL", CACHE_TTL),
+        max_entries=app.config.get("CACHE_MAX_ENTRIES", CACHE_MAX_ENTRIES),
+    )
@@ -0,0 +1,157 @@
+# flask CLI commands (run with `flask --app app:create_app <command>`)
+import os
+
+import click
+from flask.cli import with_appcontext
+
+import repository
+
+
+@click.command("generate-variants")
+@with_appcontext
+def generate_variants_command():
+    """Builds responsive variants for stored images that have none yet."""
+    from images import process_upload
+
+    done = 0
+    for url in repository.list_images_without_variants():
+        if process_upload(url):
+            done += 1
+            click.echo(f"🖼  {url}")
+    click.echo(f"✅ Variants generated for {done} image(s)")
+
+
+@click.command("gc-blobs")
+@click.option("--grace", default=3600, show_default=True,
+              help="Keep unreferenced blobs younger than this many seconds.")
+@with_appcontext
+def gc_blobs_command(grace):
+    """Deletes uploaded blobs no car, car photo or seller refers to any more."""
+    from storage import collect_garbage
+
+    removed = collect_garbage(grace_seconds=grace)
+    click.echo(f"🧹 Removed {removed} unreferenced blob(s)")
+
+
+@click.command("run-worker")
+@click.option("--queue", default="default", show_default=True)
+@click.option("--batch-size", default=None, type=int,
+              help="Jobs claimed per batch (default: JOB_BATCH_SIZE).")
+@click.option("--poll", default=None, type=float,
+              help="Seconds to sleep when the queue is empty (default: JOB_POLL_INTERVAL).")
+@click.option("--once", is_flag=True, help="Process the ready jobs, then exit.")
+@with_appcontext
+def run_worker_command(queue, batch_size, poll, once):
+    """Runs the background job worker (inquiry emails, image variants)."""
+    import images  # noqa: F401  (registers the image_variants handler)
+    import jobs
+    import mailer
+
+    click.echo(f"👷 Worker started on queue '{queue}'")
+    try:
+        totals = jobs.run_worker(
+            queue=queue,
+            batch_size=batch_size or jobs.JOB_BATCH_SIZE,
+            poll_interval=poll or jobs.JOB_POLL_INTERVAL,
+            once=once,
+            on_idle=mailer.session.close_if_idle,
+        )
+    finally:
+        mailer.session.close()
+    click.echo(f"✅ Worker stopped: {totals['done']} done, {totals['failed']} failed")
+    click.echo(f"📊 Queue: {jobs.queue_stats(queue)}")
+
+
+@click.command("import-cars")
+@click.argument("source", type=click.File("rb"))
+@click.option("--images", "images_zip", type=click.File("rb"),
+              help="Zip holding the photos the file names.")
+@click.option("--batch-size", default=None, type=int,
+              help="Rows inserted per transaction (default: importer.BATCH_SIZE).")
+@click.option("--dry-run", is_flag=True, help="Validate only; write nothing.")
+@with_appcontext
+def import_cars_command(source, images_zip, batch_size, dry_run):
+    """Bulk-imports cars from a CSV, NDJSON or JSON file."""
+    import importer
+
+    report = importer.run_import(
+        source, source.name, images_zip=images_zip,
+        batch_size=batch_size or importer.BATCH_SIZE, dry_run=dry_run,
+    )
+    for line, message in report["errors"]:
+        click.echo(f"⚠️  line {line}: {message}")
+    verb = "Validated" if dry_run else "Imported"
+    click.echo(
+        f"✅ {verb} {report['rows'] - report['failed']}/{report['rows']} row(s), "
+        f"{report['inserted']} inserted in {report['seconds']}s"
+        + (f" ({report['rate']}/s)" if report["rate"] else "")
+    )
+    if report["variants_queued"]:
+        click.echo(f"🖼  {report['variants_queued']} photo(s) queued for variants (flask run-worker)")
+
+
+@click.command("migrate")
+@click.option("--check", "check_only", is_flag=True,
+              help="List pending migrations without applying them.")
+@click.option("--target", default=None, type=int,
+              help="Stop after this migration version.")
+def migrate_command(check_only, target):
+    """Applies pending database schema migrations."""
+    import migrations
+
+    click.echo(f"📦 Schema version: {migrations.current_version()} (latest {migrations.LATEST})")
+    todo = migrations.pending()
+    if check_only:
+        for version, name in todo:
+            click.echo(f"   pending {version:03d} {name}")
+        return
+
+    applied = migrations.upgrade(target=target)
+    click.echo(f"✅ {len(applied)} migration(s) applied" if applied else "✅ Schema is up to date")
+
+
+@click.command("compress-assets")
+@with_appcontext
+def compress_assets_command():
+    """Writes .gz/.br copies of static CSS/JS/SVG (served when accepted)."""
+    from flask import current_app
+    from assets import compress_static
+
+    done = compress_static(current_app.static_folder)
+    click.echo(f"🗜  Precompressed {done} static file(s)")
+
+
+@click.command("build-css")
+@click.option("--icons-from", "icon_dir", default=None,
+              help="Folder of Font Awesome SVGs (default: the fontawesomefree package).")
+def build_css_command(icon_dir):
+    """Builds static/css/app.css from the classes used in templates/*.html."""
+    import css_build
+    from assets import compress_file
+
+    icon_dir = icon_dir or css_build.default_icon_dir()
+    if not icon_dir or not os.path.isdir(icon_dir):
+        raise click.ClickException(
+            "Font Awesome SVGs not found: `pip install fontawesomefree` "
+            "or pass --icons-from"
+        )
+
+    summary = css_build.build(icon_dir)
+    compress_file(css_build.OUTPUT)
+
+    for cls in summary["missing_icons"]:
+        click.echo(f"⚠️  No SVG for icon class {cls}")
+    click.echo(
+        f"🎨 {css_build.OUTPUT}: {summary['rules']} utility rules, "
+        f"{summary['icons']} icons, {summary['bytes'] / 1024:.1f} KB"
+    )
+
+
+def register_cli(app):
+    app.cli.add_command(generate_variants_command)
+    app.cli.add_command(gc_blobs_command)
+    app.cli.add_command(run_worker_command)
+    app.cli.add_command(import_cars_command)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(compress_assets_command)
+    app.cli.add_command(build_css_command)
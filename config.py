@@ -9,13 +9,95 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key-change-me")
 
 # UPLOAD PATH
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")
+VARIANTS_FOLDER = os.path.join(UPLOAD_FOLDER, "variants")
+BLOB_FOLDER = os.path.join(UPLOAD_FOLDER, "blobs")
 
 # DATABASE URL (Render uses ENV)
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
-# MAIL (ENV ON RENDER)
+# LOCAL SQLITE FILE (used when DATABASE_URL is not set)
+DB_NAME = os.environ.get("DB_NAME", os.path.join(BASE_DIR, "stellar.db"))
+
+# CONNECTION POOL (per worker process)
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_PING_AFTER = float(os.environ.get("DB_POOL_PING_AFTER", 10))
+
+# SCHEMA MIGRATIONS: apply pending ones at boot (set 0 to only run `flask migrate`)
+DB_AUTO_MIGRATE = os.environ.get("DB_AUTO_MIGRATE", "1").lower() in ("1", "true", "yes")
+
+# /cars TOTALS: exact | cached | estimate | none
+CARS_COUNT_MODE = os.environ.get("CARS_COUNT_MODE", "cached")
+CARS_COUNT_TTL = float(os.environ.get("CARS_COUNT_TTL", 60))
+CARS_COUNT_CAP = int(os.environ.get("CARS_COUNT_CAP", 1000))
+
+# RESULT CACHE: memory | filesystem (shared by workers via CACHE_DIR) | null
+CACHE_TYPE = os.environ.get("CACHE_TYPE", "memory")
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(BASE_DIR, ".cache", "results"))
+CACHE_TTL = float(os.environ.get("CACHE_TTL", 300))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", 1024))
+
+# TEMPLATE FRAGMENT CACHE ({% cache %} blocks: car cards, layout chrome)
+FRAGMENT_CACHE = os.environ.get("FRAGMENT_CACHE", "1").lower() in ("1", "true", "yes")
+FRAGMENT_CACHE_TTL = float(os.environ.get("FRAGMENT_CACHE_TTL", 3600))
+FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get("FRAGMENT_CACHE_MAX_ENTRIES", 2048))
+
+# AUTOCOMPLETE (/api/suggest, answered from memory)
+SUGGEST_LIMIT = int(os.environ.get("SUGGEST_LIMIT", 8))
+# seconds between checks for writes made by other workers
+SUGGEST_REFRESH = float(os.environ.get("SUGGEST_REFRESH", 30))
+
+# BOOT (wsgi.py): pre-render the landing and top category pages in the
+# gunicorn master so every worker starts with warm caches
+WARM_CACHES = os.environ.get("WARM_CACHES", "1").lower() in ("1", "true", "yes")
+WARM_CATEGORIES = int(os.environ.get("WARM_CATEGORIES", 10))
+
+# HTTP CACHING OF CATALOGUE PAGES
+# APP_VERSION goes into every ETag so a deploy never revalidates old markup
+APP_VERSION = os.environ.get("APP_VERSION") or os.environ.get("RENDER_GIT_COMMIT", "dev")
+# 0 = browsers/proxies revalidate every time (304 when unchanged)
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", 0))
+
+# INSTRUMENTATION (profiling.py): per-query timing, Server-Timing header,
+# slow-query / slow-request log, sampled profiles. Off unless INSTRUMENT=1.
+INSTRUMENT = os.environ.get("INSTRUMENT", "0").lower() in ("1", "true", "yes")
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 100))
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", 1000))
+SLOW_LOG_FILE = os.environ.get("SLOW_LOG_FILE")     # default: stderr
+# fraction of requests profiled (0 = only admins asking with ?profile=1)
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, ".profiles"))
+PROFILER = os.environ.get("PROFILER", "cprofile")  # cprofile | pyinstrument
+
+# PROMETHEUS METRICS (GET /metrics; needs prometheus_client)
+METRICS = os.environ.get("METRICS", "1").lower() in ("1", "true", "yes")
+# required: /metrics answers only `Authorization: Bearer <token>`, and
+# without a token it is not served at all (render.yaml generates one)
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+# seconds between copies of pool / cache / upload stats into the metrics
+METRICS_REFRESH = float(os.environ.get("METRICS_REFRESH", 5))
+
+# MAIL (ENV ON RENDER; point MAIL_SERVER at a local stand-in for testing)
+MAIL_SERVER = os.environ.get("MAIL_SERVER", "smtp.gmail.com")
+MAIL_PORT = int(os.environ.get("MAIL_PORT", 587))
+MAIL_USE_TLS = os.environ.get("MAIL_USE_TLS", "1").lower() in ("1", "true", "yes")
 MAIL_USERNAME = os.environ.get("MAIL_USERNAME")
 MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD")
+MAIL_DEFAULT_SENDER = os.environ.get("MAIL_DEFAULT_SENDER", MAIL_USERNAME)
+
+# BACKGROUND JOBS (flask run-worker)
+JOB_BATCH_SIZE = int(os.environ.get("JOB_BATCH_SIZE", 20))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 2))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 6))
+JOB_RETRY_BASE = float(os.environ.get("JOB_RETRY_BASE", 30))
+JOB_RETRY_MAX = float(os.environ.get("JOB_RETRY_MAX", 3600))
+JOB_VISIBILITY_TIMEOUT = float(os.environ.get("JOB_VISIBILITY_TIMEOUT", 600))
+# finished jobs are deleted after this many seconds (default 7 days)
+JOB_DONE_RETENTION = float(os.environ.get("JOB_DONE_RETENTION", 7 * 24 * 3600))
+# close the worker's SMTP connection after this many idle seconds
+SMTP_IDLE_TIMEOUT = float(os.environ.get("SMTP_IDLE_TIMEOUT", 60))
 
 # Allowed Extensions
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
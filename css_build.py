@@ -0,0 +1,571 @@
+# offline stylesheet build (flask build-css)
+#
+# Replaces the Tailwind Play CDN script (which compiled CSS in the browser
+# on every page load) and the icon-font CDNs:
+# - scans templates/*.html for utility classes the way Tailwind's JIT does
+#   (any token in the file, JS class strings included) and emits rules for
+#   the ones it recognises, after a trimmed copy of Tailwind's preflight
+# - inlines the icons the templates use (fa-* / bi-*) as CSS masks, taken
+#   from the Font Awesome Free SVGs of the `fontawesomefree` package
+# - writes one minified static/css/app.css (+ .gz/.br); url_for('static')
+#   fingerprints it, see assets.py
+# Nothing here runs at request time: the built file is committed.
+import glob
+import os
+import re
+from urllib.parse import quote
+
+from config import BASE_DIR
+
+TEMPLATE_GLOB = os.path.join(BASE_DIR, "templates", "*.html")
+OUTPUT = os.path.join(BASE_DIR, "static", "css", "app.css")
+
+# -------------------------------------------------
+# THEME (Tailwind v3 defaults for what the templates use)
+# -------------------------------------------------
+SCREENS = (("sm", "640px"), ("md", "768px"), ("lg", "1024px"), ("xl", "1280px"))
+
+SPACING = {
+    "0": "0px", "px": "1px", "0.5": "0.125rem", "1": "0.25rem", "1.5": "0.375rem",
+    "2": "0.5rem", "2.5": "0.625rem", "3": "0.75rem", "3.5": "0.875rem",
+    "4": "1rem", "5": "1.25rem", "6": "1.5rem", "7": "1.75rem", "8": "2rem",
+    "9": "2.25rem", "10": "2.5rem", "11": "2.75rem", "12": "3rem", "14": "3.5rem",
+    "16": "4rem", "20": "5rem", "24": "6rem", "28": "7rem", "32": "8rem",
+    "36": "9rem", "40": "10rem", "44": "11rem", "48": "12rem", "52": "13rem",
+    "56": "14rem", "60": "15rem", "64": "16rem", "72": "18rem", "80": "20rem",
+    "96": "24rem",
+}
+
+FRACTIONS = {
+    "1/2": "50%", "1/3": "33.333333%", "2/3": "66.666667%",
+    "1/4": "25%", "3/4": "75%", "full": "100%",
+}
+
+MAX_WIDTHS = {
+    "xs": "20rem", "sm": "24rem", "md": "28rem", "lg": "32rem", "xl": "36rem",
+    "2xl": "42rem", "3xl": "48rem", "4xl": "56rem", "5xl": "64rem",
+    "6xl": "72rem", "7xl": "80rem", "full": "100%", "none": "none", "prose": "65ch",
+}
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"), "sm": ("0.875rem", "1.25rem"),
+    "base": ("1rem", "1.5rem"), "lg": ("1.125rem", "1.75rem"),
+    "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"),
+}
+
+FONT_WEIGHTS = {"normal": "400", "medium": "500", "semibold": "600", "bold": "700"}
+
+LEADING = {"none": "1", "tight": "1.25", "snug": "1.375", "normal": "1.5", "relaxed": "1.625"}
+
+RADII = {
+    "": "0.25rem", "none": "0px", "sm": "0.125rem", "md": "0.375rem",
+    "lg": "0.5rem", "xl": "0.75rem", "2xl": "1rem", "full": "9999px",
+}
+
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgb(0 0 0 / 0.05)",
+    "": "0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)",
+    "xl": "0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)",
+    "none": "0 0 #0000",
+}
+
+_SHADES = ("50", "100", "200", "300", "400", "500", "600", "700", "800", "900")
+
+
+def _palette(*hexes):
+    return dict(zip(_SHADES, hexes))
+
+
+COLORS = {
+    "white": "#ffffff",
+    "black": "#000000",
+    "slate": _palette("#f8fafc", "#f1f5f9", "#e2e8f0", "#cbd5e1", "#94a3b8",
+                      "#64748b", "#475569", "#334155", "#1e293b", "#0f172a"),
+    "gray": _palette("#f9fafb", "#f3f4f6", "#e5e7eb", "#d1d5db", "#9ca3af",
+                     "#6b7280", "#4b5563", "#374151", "#1f2937", "#111827"),
+    "red": _palette("#fef2f2", "#fee2e2", "#fecaca", "#fca5a5", "#f87171",
+                    "#ef4444", "#dc2626", "#b91c1c", "#991b1b", "#7f1d1d"),
+    "rose": _palette("#fff1f2", "#ffe4e6", "#fecdd3", "#fda4af", "#fb7185",
+                     "#f43f5e", "#e11d48", "#be123c", "#9f1239", "#881337"),
+    "amber": _palette("#fffbeb", "#fef3c7", "#fde68a", "#fcd34d", "#fbbf24",
+                      "#f59e0b", "#d97706", "#b45309", "#92400e", "#78350f"),
+    "green": _palette("#f0fdf4", "#dcfce7", "#bbf7d0", "#86efac", "#4ade80",
+                      "#22c55e", "#16a34a", "#15803d", "#166534", "#14532d"),
+    "emerald": _palette("#ecfdf5", "#d1fae5", "#a7f3d0", "#6ee7b7", "#34d399",
+                        "#10b981", "#059669", "#047857", "#065f46", "#064e3b"),
+    "sky": _palette("#f0f9ff", "#e0f2fe", "#bae6fd", "#7dd3fc", "#38bdf8",
+                    "#0ea5e9", "#0284c7", "#0369a1", "#075985", "#0c4a6e"),
+    "blue": _palette("#eff6ff", "#dbeafe", "#bfdbfe", "#93c5fd", "#60a5fa",
+                     "#3b82f6", "#2563eb", "#1d4ed8", "#1e40af", "#1e3a8a"),
+    # brand colours (see the custom properties in styles.css)
+    "primary": {"700": "#144ea6", "800": "#10459b", "900": "#0b3d91"},
+}
+
+# -------------------------------------------------
+# PREFLIGHT (trimmed copy of Tailwind v3's base layer)
+# -------------------------------------------------
+PREFLIGHT = """
+*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb;--tw-translate-x:0;--tw-translate-y:0;--tw-ring-offset-shadow:0 0 #0000;--tw-ring-shadow:0 0 #0000;--tw-shadow:0 0 #0000;--tw-ring-color:rgb(59 130 246 / 0.5)}
+html{line-height:1.5;-webkit-text-size-adjust:100%;tab-size:4;font-family:ui-sans-serif,system-ui,sans-serif,"Apple Color Emoji","Segoe UI Emoji","Segoe UI Symbol","Noto Color Emoji"}
+body{margin:0;line-height:inherit}
+hr{height:0;color:inherit;border-top-width:1px}
+h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit}
+a{color:inherit;text-decoration:inherit}
+b,strong{font-weight:bolder}
+small{font-size:80%}
+table{text-indent:0;border-color:inherit;border-collapse:collapse}
+button,input,optgroup,select,textarea{font-family:inherit;font-size:100%;font-weight:inherit;line-height:inherit;color:inherit;margin:0;padding:0}
+button,select{text-transform:none}
+button,[type=button],[type=reset],[type=submit]{-webkit-appearance:button;background-color:transparent;background-image:none}
+[type=search]{-webkit-appearance:textfield;outline-offset:-2px}
+blockquote,dl,dd,h1,h2,h3,h4,h5,h6,hr,figure,p,pre{margin:0}
+fieldset{margin:0;padding:0}
+ol,ul,menu{list-style:none;margin:0;padding:0}
+textarea{resize:vertical}
+input::placeholder,textarea::placeholder{opacity:1;color:#9ca3af}
+button,[role=button]{cursor:pointer}
+:disabled{cursor:default}
+img,svg,video,canvas,audio,iframe,embed,object{display:block;vertical-align:middle}
+img,video{max-width:100%;height:auto}
+[hidden]{display:none}
+"""
+
+# -------------------------------------------------
+# UTILITIES
+# -------------------------------------------------
+STATIC = {
+    "block": "display:block", "inline-block": "display:inline-block",
+    "inline": "display:inline", "flex": "display:flex",
+    "inline-flex": "display:inline-flex", "grid": "display:grid",
+    "hidden": "display:none", "table": "display:table",
+    "flex-row": "flex-direction:row", "flex-col": "flex-direction:column",
+    "flex-wrap": "flex-wrap:wrap", "flex-1": "flex:1 1 0%",
+    "shrink-0": "flex-shrink:0", "grow": "flex-grow:1",
+    "items-start": "align-items:flex-start", "items-center": "align-items:center",
+    "items-end": "align-items:flex-end", "items-stretch": "align-items:stretch",
+    "justify-start": "justify-content:flex-start",
+    "justify-center": "justify-content:center",
+    "justify-end": "justify-content:flex-end",
+    "justify-between": "justify-content:space-between",
+    "col-span-full": "grid-column:1 / -1",
+    "static": "position:static", "relative": "position:relative",
+    "absolute": "position:absolute", "fixed": "position:fixed",
+    "sticky": "position:sticky",
+    "overflow-hidden": "overflow:hidden", "overflow-auto": "overflow:auto",
+    "overflow-x-auto": "overflow-x:auto", "overflow-y-auto": "overflow-y:auto",
+    "object-cover": "object-fit:cover", "object-contain": "object-fit:contain",
+    "cursor-pointer": "cursor:pointer",
+    "text-left": "text-align:left", "text-center": "text-align:center",
+    "text-right": "text-align:right",
+    "underline": "text-decoration-line:underline",
+    "truncate": "overflow:hidden;text-overflow:ellipsis;white-space:nowrap",
+    "transform": "transform:translate(var(--tw-translate-x),var(--tw-translate-y))",
+    "transition": (
+        "transition-property:color,background-color,border-color,"
+        "text-decoration-color,fill,stroke,opacity,box-shadow,transform,filter,"
+        "backdrop-filter;transition-timing-function:cubic-bezier(0.4,0,0.2,1);"
+        "transition-duration:150ms"
+    ),
+    "scroll-smooth": "scroll-behavior:smooth",
+    "snap-x": "scroll-snap-type:x var(--tw-scroll-snap-strictness)",
+    "snap-mandatory": "--tw-scroll-snap-strictness:mandatory",
+    "snap-center": "scroll-snap-align:center",
+    "border": "border-width:1px", "border-t": "border-top-width:1px",
+    "border-b": "border-bottom-width:1px", "border-l": "border-left-width:1px",
+    "border-r": "border-right-width:1px",
+}
+
+_SIDES = {
+    "": ("{p}",), "x": ("{p}-left", "{p}-right"), "y": ("{p}-top", "{p}-bottom"),
+    "t": ("{p}-top",), "b": ("{p}-bottom",), "l": ("{p}-left",), "r": ("{p}-right",),
+}
+
+_INSET = {
+    "inset": ("top", "right", "bottom", "left"), "top": ("top",),
+    "right": ("right",), "bottom": ("bottom",), "left": ("left",),
+}
+
+
+def _arbitrary(value):
+    """`[90vh]` -> `90vh` (underscores are spaces, as in Tailwind)."""
+    if value.startswith("[") and value.endswith("]"):
+        return value[1:-1].replace("_", " ")
+    return None
+
+
+def _size(value, extra=None):
+    return (
+        SPACING.get(value)
+        or FRACTIONS.get(value)
+        or (extra or {}).get(value)
+        or _arbitrary(value)
+    )
+
+
+def _rgb(hex_color):
+    h = hex_color.lstrip("#")
+    return " ".join(str(int(h[i:i + 2], 16)) for i in (0, 2, 4))
+
+
+def _color(name):
+    """`blue-600` / `white` (optionally `/20`) -> (rgb triplet, alpha or None)."""
+    alpha = None
+    if "/" in name:
+        name, pct = name.rsplit("/", 1)
+        if not pct.isdigit():
+            return None
+        alpha = str(int(pct) / 100)
+
+    if name in COLORS and isinstance(COLORS[name], str):
+        return _rgb(COLORS[name]), alpha
+    family, _, shade = name.rpartition("-")
+    palette = COLORS.get(family)
+    if isinstance(palette, dict) and shade in palette:
+        return _rgb(palette[shade]), alpha
+    return None
+
+
+def _color_rule(prop, var, name):
+    found = _color(name)
+    if not found:
+        return None
+    rgb, alpha = found
+    if alpha is not None:
+        return f"{prop}:rgb({rgb} / {alpha})"
+    return f"{var}:1;{prop}:rgb({rgb} / var({var}))"
+
+
+def utility(name):
+    """
+    CSS for one Tailwind utility (no variant prefix).
+    Returns (selector suffix, declarations) or None when not recognised.
+    """
+    if name in STATIC:
+        return "", STATIC[name]
+
+    negative = name.startswith("-")
+    base = name[1:] if negative else name
+    sign = "-" if negative else ""
+
+    # spacing: margin / padding / gap / space-between
+    m = re.fullmatch(r"(m|p)([xytblr]?)-(.+)", base)
+    if m:
+        kind, side, value = m.groups()
+        size = "auto" if (kind == "m" and value == "auto") else _size(value)
+        if not size or (negative and kind == "p"):
+            return None
+        prop = "margin" if kind == "m" else "padding"
+        size = f"-{size}" if negative else size
+        return "", ";".join(f"{p.format(p=prop)}:{size}" for p in _SIDES[side])
+
+    m = re.fullmatch(r"gap(?:-([xy]))?-(.+)", base)
+    if m and _size(m.group(2)):
+        prop = {"x": "column-gap", "y": "row-gap"}.get(m.group(1), "gap")
+        return "", f"{prop}:{_size(m.group(2))}"
+
+    m = re.fullmatch(r"space-([xy])-(.+)", base)
+    if m and _size(m.group(2)):
+        prop = "margin-top" if m.group(1) == "y" else "margin-left"
+        return " > :not([hidden]) ~ :not([hidden])", f"{prop}:{sign}{_size(m.group(2))}"
+
+    # sizing
+    m = re.fullmatch(r"(w|h)-(.+)", base)
+    if m and not negative:
+        axis, value = m.groups()
+        screen = "100vw" if axis == "w" else "100vh"
+        size = _size(value, {"auto": "auto", "screen": screen, "fit": "fit-content"})
+        if size:
+            return "", f"{'width' if axis == 'w' else 'height'}:{size}"
+
+    m = re.fullmatch(r"max-w-(.+)", base)
+    if m:
+        size = MAX_WIDTHS.get(m.group(1)) or _arbitrary(m.group(1))
+        if size:
+            return "", f"max-width:{size}"
+
+    m = re.fullmatch(r"max-h-(.+)", base)
+    if m:
+        size = _size(m.group(1), {"screen": "100vh"})
+        if size:
+            return "", f"max-height:{size}"
+
+    # position offsets
+    m = re.fullmatch(r"(inset|top|right|bottom|left)-(.+)", base)
+    if m:
+        size = _size(m.group(2), {"auto": "auto"})
+        if size:
+            size = f"-{size}" if negative else size
+            return "", ";".join(f"{p}:{size}" for p in _INSET[m.group(1)])
+
+    m = re.fullmatch(r"translate-([xy])-(.+)", base)
+    if m and _size(m.group(2)):
+        axis = m.group(1)
+        return "", (
+            f"--tw-translate-{axis}:{sign}{_size(m.group(2))};"
+            "transform:translate(var(--tw-translate-x),var(--tw-translate-y))"
+        )
+
+    m = re.fullmatch(r"z-(\d+|auto)", base)
+    if m:
+        return "", f"z-index:{m.group(1)}"
+
+    # grid
+    m = re.fullmatch(r"grid-cols-(\d+)", base)
+    if m:
+        return "", f"grid-template-columns:repeat({m.group(1)},minmax(0,1fr))"
+
+    m = re.fullmatch(r"col-span-(\d+)", base)
+    if m:
+        return "", f"grid-column:span {m.group(1)} / span {m.group(1)}"
+
+    # typography
+    m = re.fullmatch(r"text-(.+)", base)
+    if m:
+        value = m.group(1)
+        if value in FONT_SIZES:
+            size, line = FONT_SIZES[value]
+            return "", f"font-size:{size};line-height:{line}"
+        rule = _color_rule("color", "--tw-text-opacity", value)
+        if rule:
+            return "", rule
+
+    m = re.fullmatch(r"font-(.+)", base)
+    if m and m.group(1) in FONT_WEIGHTS:
+        return "", f"font-weight:{FONT_WEIGHTS[m.group(1)]}"
+
+    m = re.fullmatch(r"leading-(.+)", base)
+    if m and m.group(1) in LEADING:
+        return "", f"line-height:{LEADING[m.group(1)]}"
+
+    # backgrounds
+    m = re.fullmatch(r"bg-opacity-(\d+)", base)
+    if m:
+        return "", f"--tw-bg-opacity:{int(m.group(1)) / 100}"
+
+    m = re.fullmatch(r"bg-(.+)", base)
+    if m:
+        rule = _color_rule("background-color", "--tw-bg-opacity", m.group(1))
+        if rule:
+            return "", rule
+
+    # borders
+    m = re.fullmatch(r"border(?:-([tblr]))?-(\d+)", base)
+    if m:
+        side = {"t": "-top", "b": "-bottom", "l": "-left", "r": "-right"}.get(m.group(1), "")
+        return "", f"border{side}-width:{m.group(2)}px"
+
+    m = re.fullmatch(r"border-(.+)", base)
+    if m:
+        rule = _color_rule("border-color", "--tw-border-opacity", m.group(1))
+        if rule:
+            return "", rule
+
+    m = re.fullmatch(r"rounded(?:-(.+))?", base)
+    if m and (m.group(1) or "") in RADII:
+        return "", f"border-radius:{RADII[m.group(1) or '']}"
+
+    # effects
+    m = re.fullmatch(r"shadow(?:-(.+))?", base)
+    if m and (m.group(1) or "") in SHADOWS:
+        return "", (
+            f"--tw-shadow:{SHADOWS[m.group(1) or '']};"
+            "box-shadow:var(--tw-ring-offset-shadow),var(--tw-ring-shadow),var(--tw-shadow)"
+        )
+
+    m = re.fullmatch(r"ring(?:-(\d+))?", base)
+    if m:
+        width = m.group(1) or "3"
+        return "", (
+            f"--tw-ring-shadow:0 0 0 {width}px var(--tw-ring-color);"
+            "box-shadow:var(--tw-ring-offset-shadow),var(--tw-ring-shadow),var(--tw-shadow)"
+        )
+
+    m = re.fullmatch(r"ring-(.+)", base)
+    if m:
+        found = _color(m.group(1))
+        if found:
+            rgb, alpha = found
+            return "", f"--tw-ring-color:rgb({rgb} / {alpha or 1})"
+
+    return None
+
+
+# -------------------------------------------------
+# VARIANTS + SCANNING
+# -------------------------------------------------
+PSEUDO = {"hover": ":hover", "focus": ":focus", "active": ":active"}
+
+_TOKEN = re.compile(r"[A-Za-z0-9_\-:/.\[\]%]+")
+
+
+def _escape(name):
+    return re.sub(r"([^A-Za-z0-9_-])", r"\\\1", name)
+
+
+def scan(pattern=TEMPLATE_GLOB):
+    """Every class-like token in the templates (HTML, Jinja and inline JS)."""
+    tokens = set()
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as fh:
+            tokens.update(_TOKEN.findall(fh.read()))
+    return tokens
+
+
+def build_rule(token):
+    """(screen index, css rule) for a token, or None."""
+    *variants, name = token.split(":")
+    screen = 0
+    pseudo = ""
+    for variant in variants:
+        names = [s for s, _ in SCREENS]
+        if variant in names and not screen and not pseudo:
+            screen = names.index(variant) + 1
+        elif variant in PSEUDO:
+            pseudo += PSEUDO[variant]
+        else:
+            return None
+
+    found = utility(name)
+    if not found:
+        return None
+    suffix, decls = found
+    return screen, f".{_escape(token)}{pseudo}{suffix}{{{decls}}}"
+
+
+def _container():
+    rules = [".container{width:100%}"]
+    for _, width in SCREENS + (("2xl", "1536px"),):
+        rules.append(f"@media (min-width:{width}){{.container{{max-width:{width}}}}}")
+    return "".join(rules)
+
+
+def build_utilities(tokens):
+    """Minified CSS for the recognised tokens, responsive variants last."""
+    layers = [[] for _ in range(len(SCREENS) + 1)]
+    for token in sorted(tokens):
+        built = build_rule(token)
+        if built:
+            layers[built[0]].append(built[1])
+
+    css = ["".join(layers[0])]
+    for i, (_, width) in enumerate(SCREENS, start=1):
+        if layers[i]:
+            css.append(f"@media (min-width:{width}){{{''.join(layers[i])}}}")
+    return "".join(css)
+
+
+# -------------------------------------------------
+# ICONS (Font Awesome Free SVGs inlined as CSS masks)
+# -------------------------------------------------
+ICON_STYLES = ("solid", "brands", "regular")
+ICON_PREFIX_CLASSES = {"fa-solid", "fa-brands", "fa-regular", "fa-fw", "fa-spin"}
+
+# Bootstrap Icons used by the templates -> closest Font Awesome glyph
+BOOTSTRAP_ICONS = {
+    "bi-search": "magnifying-glass",
+    "bi-whatsapp": "whatsapp",
+    "bi-person-plus": "user-plus",
+    "bi-trash": "trash",
+    "bi-telephone-fill": "phone",
+    "bi-send-fill": "paper-plane",
+    "bi-pencil-square": "pen-to-square",
+    "bi-envelope-fill": "envelope",
+}
+
+ICON_BASE = (
+    ".fa-solid,.fa-brands,.fa-regular,.bi{display:inline-block;width:1em;height:1em;"
+    "vertical-align:-0.125em;background-color:currentColor;"
+    "-webkit-mask:var(--icon) center / contain no-repeat;"
+    "mask:var(--icon) center / contain no-repeat}"
+)
+
+
+def default_icon_dir():
+    """SVG folder of the `fontawesomefree` package (None if not installed)."""
+    try:
+        import fontawesomefree
+    except ImportError:
+        return None
+    return os.path.join(
+        os.path.dirname(fontawesomefree.__file__), "static", "fontawesomefree", "svgs"
+    )
+
+
+def _find_svg(icon_dir, glyph):
+    for style in ICON_STYLES:
+        path = os.path.join(icon_dir, style, glyph + ".svg")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _svg_mask(path):
+    """(data: URI, width in em) of one SVG."""
+    with open(path, encoding="utf-8") as fh:
+        svg = re.sub(r"<!--.*?-->", "", fh.read(), flags=re.S).strip()
+    vb = re.search(r'viewBox="0 0 (\d+) (\d+)"', svg)
+    width = round(int(vb.group(1)) / int(vb.group(2)), 4) if vb else 1
+    uri = "data:image/svg+xml," + quote(svg.replace('"', "'"), safe=" /:=',.-")
+    return uri, width
+
+
+def icon_names(tokens):
+    """{css class: glyph name} for the icon classes found in the templates."""
+    icons = {}
+    for token in tokens:
+        if token in BOOTSTRAP_ICONS:
+            icons[token] = BOOTSTRAP_ICONS[token]
+        elif token.startswith("fa-") and token not in ICON_PREFIX_CLASSES:
+            icons[token] = token[3:]
+    return icons
+
+
+def build_icons(tokens, icon_dir):
+    """Returns (css, missing glyph classes)."""
+    rules, missing = [ICON_BASE], []
+    for cls, glyph in sorted(icon_names(tokens).items()):
+        path = _find_svg(icon_dir, glyph)
+        if not path:
+            missing.append(cls)
+            continue
+        uri, width = _svg_mask(path)
+        rules.append(f'.{_escape(cls)}{{--icon:url("{uri}");width:{width}em}}')
+    return "".join(rules), missing
+
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def _minify(css):
+    return "".join(line.strip() for line in css.strip().splitlines())
+
+
+def build(icon_dir, output=OUTPUT, pattern=TEMPLATE_GLOB):
+    """
+    Writes the stylesheet and returns a summary dict
+    (bytes, rules, icons, missing_icons).
+    """
+    tokens = scan(pattern)
+    utilities = build_utilities(tokens)
+    icons, missing = build_icons(tokens, icon_dir)
+
+    css = (
+        "/*! generated by `flask build-css` from templates/*.html, do not edit */"
+        "/*! Icons: Font Awesome Free by @fontawesome - https://fontawesome.com"
+        " License - https://fontawesome.com/license/free (Icons: CC BY 4.0) */"
+        + _minify(PREFLIGHT) + _container() + utilities + icons
+    )
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        fh.write(css + "\n")
+
+    return {
+        "bytes": len(css.encode("utf-8")),
+        "rules": utilities.count("{"),
+        "icons": len(icon_names(tokens)) - len(missing),
+        "missing_icons": missing,
+    }
@@ -1,21 +1,219 @@
 import os
+from contextlib import contextmanager
+from flask import g, has_app_context
 
 # Render sets DATABASE_URL automatically.
 ON_RENDER = "RENDER" in os.environ or "DATABASE_URL" in os.environ
 
 if ON_RENDER:
     from db_render import (
-        init_db,
-        seed_data,
-        get_db_connection,
-        query,
-        modify,
+        DIALECT,
+        SCHEMA_TYPES,
+        get_pool,
+        dict_cursor,
+        insert_many as _insert_many,
+        stream_cursor,
+        translate,
     )
 else:
     from db_local import (
-        init_db,
-        seed_data,
-        get_db_connection,
-        query,
-        modify,
+        DIALECT,
+        SCHEMA_TYPES,
+        get_pool,
+        dict_cursor,
+        insert_many as _insert_many,
+        stream_cursor,
+        translate,
     )
+
+
+# -------------------------------------------------
+# PER-REQUEST CONNECTION
+# -------------------------------------------------
+def get_db_connection():
+    """
+    Returns the connection bound to the current app context.
+    - First call in a request checks one out of the process-wide pool.
+    - Later calls in the same request reuse it.
+    - It goes back to the pool on `conn.close()` or at teardown, whichever is first.
+    Outside an app context (scripts, CLI) the caller owns the checkout.
+    """
+    if not has_app_context():
+        return get_pool().getconn()
+
+    conn = g.get("_db_conn")
+    if conn is None or conn.released:
+        conn = g._db_conn = get_pool().getconn()
+    return conn
+
+
+def close_db_connection(exc=None):
+    conn = g.pop("_db_conn", None)
+    if conn is not None:
+        conn.close()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def init_app(app):
+    app.teardown_appcontext(close_db_connection)
+
+
+# -------------------------------------------------
+# CURSOR HOOK (profiling.py times every statement through it)
+# -------------------------------------------------
+_wrap_cursor = None
+
+
+def set_cursor_wrapper(wrapper):
+    """Installs `wrapper(cursor) -> cursor`, applied to every helper's cursor."""
+    global _wrap_cursor
+    _wrap_cursor = wrapper
+
+
+# -------------------------------------------------
+# DIALECT-NEUTRAL QUERY HELPERS
+# -------------------------------------------------
+# SQL passed to these helpers is written once for both backends:
+#   - `%s` placeholders (a literal percent sign is `%%`)
+#   - `ILIKE` for case-insensitive matching
+# and every row comes back as a plain dict.
+
+@contextmanager
+def _cursor():
+    conn = get_db_connection()
+    try:
+        cur = dict_cursor(conn)
+        if _wrap_cursor:
+            cur = _wrap_cursor(cur)
+        try:
+            yield conn, cur
+        finally:
+            cur.close()
+    except Exception:
+        # a failed statement poisons the transaction on Postgres
+        if not getattr(conn, "in_transaction_block", False):
+            conn.rollback()
+        raise
+    finally:
+        # request-bound connections are released at teardown
+        if not has_app_context():
+            conn.close()
+
+
+def _autocommit(conn):
+    if not getattr(conn, "in_transaction_block", False):
+        conn.commit()
+
+
+def query(sql, args=()):
+    """Runs a SELECT and returns every row as a dict."""
+    with _cursor() as (conn, cur):
+        cur.execute(translate(sql), args)
+        return [dict(row) for row in cur.fetchall()]
+
+
+def query_one(sql, args=()):
+    """Runs a SELECT and returns the first row as a dict (or None)."""
+    with _cursor() as (conn, cur):
+        cur.execute(translate(sql), args)
+        row = cur.fetchone()
+        return dict(row) if row is not None else None
+
+
+def stream(sql, args=(), batch_size=500):
+    """
+    Yields the rows of a SELECT one dict at a time, fetching `batch_size`
+    per round trip, so memory stays flat however many rows match.
+    - Postgres: a server-side (named) cursor
+    - SQLite:   the cursor steps through the result lazily
+    In a streamed response wrap the generator in `stream_with_context`
+    so the request's connection stays checked out until the last row.
+    """
+    conn = get_db_connection()
+    cur = stream_cursor(conn, batch_size)
+    if _wrap_cursor:
+        cur = _wrap_cursor(cur)
+    try:
+        cur.execute(translate(sql), args)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+    finally:
+        cur.close()
+        # end the read transaction the named cursor lived in
+        if not getattr(conn, "in_transaction_block", False):
+            conn.rollback()
+        if not has_app_context():
+            conn.close()
+
+
+def execute(sql, args=()):
+    """Runs an UPDATE/DELETE (or any statement) and returns the affected row count."""
+    with _cursor() as (conn, cur):
+        cur.execute(translate(sql), args)
+        _autocommit(conn)
+        return cur.rowcount
+
+
+def insert(sql, args=()):
+    """Runs a single-row INSERT and returns the new row's `id`."""
+    with _cursor() as (conn, cur):
+        if DIALECT == "postgres":
+            cur.execute(translate(sql) + " RETURNING id", args)
+            new_id = cur.fetchone()["id"]
+        else:
+            cur.execute(translate(sql), args)
+            new_id = cur.lastrowid
+        _autocommit(conn)
+        return new_id
+
+
+def insert_many(table, cols, rows):
+    """
+    Inserts many rows in one statement batch and returns their ids in order.
+    - Postgres: execute_values (multi-row VALUES ... RETURNING id)
+    - SQLite:   executemany on one prepared statement
+    """
+    with _cursor() as (conn, cur):
+        ids = _insert_many(cur, table, cols, rows)
+        _autocommit(conn)
+        return ids
+
+
+def executemany(sql, seq_of_args):
+    with _cursor() as (conn, cur):
+        cur.executemany(translate(sql), seq_of_args)
+        _autocommit(conn)
+        return cur.rowcount
+
+
+@contextmanager
+def transaction():
+    """
+    Groups several helper calls into one commit (rolled back on error).
+    Needs an app context so every call shares the request's connection.
+    """
+    if not has_app_context():
+        raise RuntimeError("db.transaction() needs an application context")
+
+    conn = get_db_connection()
+    if getattr(conn, "in_transaction_block", False):
+        # nested block: the outermost one commits
+        yield conn
+        return
+
+    conn.in_transaction_block = True
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.in_transaction_block = False
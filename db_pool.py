@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the checkout timeout."""
+
+
+# -------------------------------------------------
+# CHECKED-OUT CONNECTION
+# -------------------------------------------------
+class PooledConnection:
+    """
+    Wraps a raw DB-API connection that was checked out of a pool.
+    - Everything (cursor, commit, rollback, execute…) goes to the raw connection.
+    - `close()` hands the connection back to the pool instead of closing it.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def close(self):
+        if self.released:
+            return
+        self.released = True
+        self._pool.putconn(self._raw)
+
+    def discard(self):
+        """Drop a broken connection instead of returning it to the pool."""
+        if self.released:
+            return
+        self.released = True
+        self._pool.putconn(self._raw, discard=True)
+
+    # `with conn:` keeps DB-API semantics: commit on success, rollback on error
+    def __enter__(self):
+        self._raw.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._raw.__exit__(exc_type, exc, tb)
+
+
+# -------------------------------------------------
+# POOL
+# -------------------------------------------------
+class ConnectionPool:
+    """
+    Thread-safe, process-wide pool of DB-API connections.
+
+    - `connect`   : zero-arg callable that opens a new raw connection
+    - `ping`      : callable(raw) that raises if the connection is dead
+    - `minconn`   : connections opened eagerly and kept when idle
+    - `maxconn`   : hard cap on open connections (checked out + idle)
+    - `timeout`   : seconds `getconn()` waits for a free slot before `PoolTimeout`
+    - `ping_after`: only ping connections idle longer than this many seconds
+    """
+
+    def __init__(self, connect, ping=None, minconn=1, maxconn=10,
+                 timeout=30.0, ping_after=10.0):
+        if maxconn < 1 or minconn > maxconn:
+            raise ValueError("pool needs 1 <= maxconn and minconn <= maxconn")
+
+        self._connect = connect
+        self._ping = ping
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()          # (raw, returned_at)
+        self._in_use = {}             # id(raw) -> raw
+        self._pending = 0             # slots taken by a connect / ping in progress
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "failed_checks": 0,
+        }
+
+    # -----------------------------
+    # FORK SAFETY
+    # -----------------------------
+    def _check_pid(self):
+        # A forked worker must never talk over the parent's sockets:
+        # forget the inherited connections without closing them.
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    def reset(self):
+        """Forget every connection (used right after a fork)."""
+        with self._cond:
+            self._reset_state()
+            self._cond.notify_all()
+
+    # -----------------------------
+    # CHECKOUT / RETURN
+    # -----------------------------
+    # Connecting (TCP + TLS + auth on Postgres), pinging, rolling back and
+    # closing all run WITHOUT the lock: a slot is reserved under it first
+    # (`_pending`, counted against maxconn) and given back on failure, so
+    # one slow handshake never holds up the other checkouts.
+    def _close_quietly(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _healthy(self, raw, returned_at):
+        if getattr(raw, "closed", 0):
+            return False
+        if self._ping is None or time.monotonic() - returned_at < self.ping_after:
+            return True
+        try:
+            self._ping(raw)
+            return True
+        except Exception:
+            return False
+
+    def _reserve(self, deadline):
+        """
+        Takes a slot (lock held). Returns an idle (raw, returned_at) to
+        check, or (None, None) when the caller is to open a new connection.
+        """
+        while True:
+            # 1) reuse an idle connection (most recently returned first)
+            if self._idle:
+                self._pending += 1
+                return self._idle.pop()
+
+            # 2) open a new one if we are below the cap
+            if len(self._in_use) + self._pending < self.maxconn:
+                self._pending += 1
+                return None, None
+
+            # 3) wait for somebody to give one back
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stats["timeouts"] += 1
+                raise PoolTimeout(
+                    f"no database connection free after {self.timeout}s "
+                    f"(max {self.maxconn})"
+                )
+            self._stats["waits"] += 1
+            self._cond.wait(remaining)
+
+    def _release_slot(self):
+        self._pending -= 1
+        self._cond.notify()
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._cond:
+                self._check_pid()
+                raw, returned_at = self._reserve(deadline)
+
+            if raw is not None:
+                if self._healthy(raw, returned_at):
+                    with self._cond:
+                        self._pending -= 1
+                        return self._checkout(raw)
+                self._close_quietly(raw)
+                with self._cond:
+                    self._stats["failed_checks"] += 1
+                    self._stats["closed"] += 1
+                    self._release_slot()
+                continue
+
+            try:
+                raw = self._connect()
+            except BaseException:
+                with self._cond:
+                    self._release_slot()
+                raise
+            with self._cond:
+                self._stats["created"] += 1
+                self._pending -= 1
+                return self._checkout(raw)
+
+    def _checkout(self, raw):
+        self._in_use[id(raw)] = raw
+        self._stats["checkouts"] += 1
+        return PooledConnection(self, raw)
+
+    def putconn(self, raw, discard=False):
+        with self._cond:
+            if self._pid != os.getpid() or id(raw) not in self._in_use:
+                # connection from before a fork / reset: just let it go
+                return
+
+        if not discard:
+            try:
+                # never hand out a connection with a half-done transaction
+                raw.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if self._pid != os.getpid() or self._in_use.pop(id(raw), None) is None:
+                return
+            keep = not discard and len(self._idle) < self.maxconn
+            if keep:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._stats["closed"] += 1
+            self._cond.notify()
+        if not keep:
+            self._close_quietly(raw)
+
+    def warm(self):
+        """Open `minconn` connections up front so the first requests skip the handshake."""
+        with self._cond:
+            self._check_pid()
+            missing = self.minconn - (len(self._idle) + len(self._in_use) + self._pending)
+            missing = max(0, min(missing, self.maxconn - len(self._in_use) - self._pending))
+            self._pending += missing
+
+        for opened in range(missing):
+            try:
+                raw = self._connect()
+            except BaseException:
+                with self._cond:
+                    self._pending -= missing - opened
+                    self._cond.notify_all()
+                raise
+            with self._cond:
+                self._stats["created"] += 1
+                self._pending -= 1
+                self._idle.append((raw, time.monotonic()))
+                self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._stats["closed"] += len(idle)
+        for raw in idle:
+            self._close_quietly(raw)
+
+    # -----------------------------
+    # STATS
+    # -----------------------------
+    def stats(self):
+        with self._cond:
+            self._check_pid()
+            data = dict(self._stats)
+            data.update(
+                pid=self._pid,
+                max=self.maxconn,
+                min=self.minconn,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                size=len(self._idle) + len(self._in_use) + self._pending,
+            )
+            return data
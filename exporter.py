@@ -0,0 +1,70 @@
+# inventory export (/admin/export/<table>?format=csv|ndjson)
+#
+# - rows come from db.stream: a server-side cursor on Postgres, a lazily
+#   stepped cursor on SQLite, so memory stays flat however big the table
+# - every row is encoded and handed to the response as soon as it is read;
+#   nothing is assembled in RAM
+# - a cars export carries the seller's name in a `seller` column, so the
+#   file can be fed straight back to `flask import-cars`
+import csv
+import json
+from datetime import date, datetime
+
+import db
+from repository import CAR_FIELDS, SELLER_FIELDS
+
+# table -> (columns, SELECT producing them, in id order)
+EXPORTS = {
+    "cars": (
+        ("id",) + CAR_FIELDS + ("date_added", "seller"),
+        "SELECT cars.id, {car_cols}, cars.date_added, sellers.name AS seller "
+        "FROM cars LEFT JOIN sellers ON sellers.id = cars.seller_id "
+        "ORDER BY cars.id".format(car_cols=", ".join(f"cars.{f}" for f in CAR_FIELDS)),
+    ),
+    "sellers": (
+        ("id",) + SELLER_FIELDS,
+        f"SELECT id, {', '.join(SELLER_FIELDS)} FROM sellers ORDER BY id",
+    ),
+    "car_images": (
+        ("id", "car_id", "image_path"),
+        "SELECT id, car_id, image_path FROM car_images ORDER BY id",
+    ),
+}
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _plain(value):
+    # Postgres hands back datetimes, SQLite ISO strings already
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class _Line:
+    """File-like sink for csv.writer: `write` returns the encoded line."""
+
+    def write(self, line):
+        return line
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_plain(row[c]) for c in columns])
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps({c: _plain(row[c]) for c in columns},
+                         separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+def export(table, fmt):
+    """Generator of text chunks for one table in one format."""
+    columns, sql = EXPORTS[table]
+    rows = db.stream(sql)
+    if fmt == "ndjson":
+        return ndjson_lines(columns, rows)
+    return csv_lines(columns, rows)
@@ -0,0 +1,150 @@
+# facet counts for the catalogue filters (category, price, seller, mileage)
+#
+# - Unfiltered counts live in the `car_facets` aggregate table, kept up to
+#   date by every car write (repository._adjust_facets), so the landing
+#   pages read them with one small indexed query instead of a GROUP BY per
+#   facet.
+# - With a search or filters active, every facet is counted in a single
+#   UNION ALL query (each facet ignores its own filter, so picking a
+#   category still shows the other categories), cached per filter set.
+#
+# Bands are half-open [lo, hi); the filters they link to are inclusive,
+# hence the `hi - 1` in `bucket_args`.
+
+FACETS = ("category", "price", "seller", "mileage")
+
+# key, label, lo, hi (None = unbounded)
+PRICE_BANDS = (
+    ("lt5m", "Under ₦5M", None, 5_000_000),
+    ("5m-10m", "₦5M – ₦10M", 5_000_000, 10_000_000),
+    ("10m-20m", "₦10M – ₦20M", 10_000_000, 20_000_000),
+    ("20m-50m", "₦20M – ₦50M", 20_000_000, 50_000_000),
+    ("50m+", "₦50M and above", 50_000_000, None),
+)
+
+MILEAGE_BANDS = (
+    ("lt10k", "Under 10,000 km", None, 10_000),
+    ("10k-50k", "10,000 – 50,000 km", 10_000, 50_000),
+    ("50k-100k", "50,000 – 100,000 km", 50_000, 100_000),
+    ("100k+", "100,000 km and above", 100_000, None),
+)
+
+BANDS = {"price": PRICE_BANDS, "mileage": MILEAGE_BANDS}
+
+# facet -> (cars column, query args that filter on it)
+FACET_COLUMNS = {
+    "category": ("category", ("category",)),
+    "price": ("price", ("min_price", "max_price")),
+    "seller": ("seller_id", ("seller_id",)),
+    "mileage": ("mileage_km", ("min_mileage", "max_mileage")),
+}
+
+
+def band_of(value, bands):
+    if value is None:
+        return None
+    for key, _, lo, hi in bands:
+        if (lo is None or value >= lo) and (hi is None or value < hi):
+            return key
+    return None
+
+
+def buckets(car):
+    """(facet, value) pairs one car counts towards; NULL specs count nowhere."""
+    found = []
+    if car.get("category"):
+        found.append(("category", car["category"]))
+    price = band_of(car.get("price"), PRICE_BANDS)
+    if price:
+        found.append(("price", price))
+    if car.get("seller_id") is not None:
+        found.append(("seller", str(car["seller_id"])))
+    mileage = band_of(car.get("mileage_km"), MILEAGE_BANDS)
+    if mileage:
+        found.append(("mileage", mileage))
+    return found
+
+
+def value_sql(facet):
+    """SQL expression giving a `cars` row's bucket key for `facet` (as TEXT)."""
+    column, _ = FACET_COLUMNS[facet]
+    if facet not in BANDS:
+        return f"CAST(cars.{column} AS TEXT)"
+
+    cases = []
+    for key, _, lo, hi in BANDS[facet]:
+        cond = []
+        if lo is not None:
+            cond.append(f"cars.{column} >= {lo}")
+        if hi is not None:
+            cond.append(f"cars.{column} < {hi}")
+        cases.append(f"WHEN {' AND '.join(cond)} THEN '{key}'")
+    return f"CASE {' '.join(cases)} END"
+
+
+def bucket_args(facet, value):
+    """Query args that narrow a listing to one bucket."""
+    if facet == "category":
+        return {"category": value}
+    if facet == "seller":
+        return {"seller_id": value}
+
+    low_arg, high_arg = FACET_COLUMNS[facet][1]
+    for key, _, lo, hi in BANDS[facet]:
+        if key == value:
+            return {low_arg: lo if lo is not None else "", high_arg: hi - 1 if hi else ""}
+    return {}
+
+
+def assemble(rows):
+    """
+    Rows of (facet, value, count, seller_name) -> {facet: [bucket, ...]}.
+    Each bucket is {"value", "label", "count", "args"}; bands keep their
+    natural order, categories and sellers are sorted by label.
+    """
+    counts = {facet: {} for facet in FACETS}
+    names = {}
+    for row in rows:
+        if row["value"] is None or not row["count"]:
+            continue
+        counts[row["facet"]][row["value"]] = row["count"]
+        if row["facet"] == "seller":
+            names[row["value"]] = row["seller_name"]
+
+    facets = {}
+    for facet in FACETS:
+        found = counts[facet]
+        if facet in BANDS:
+            entries = [(key, label) for key, label, _, _ in BANDS[facet] if key in found]
+        elif facet == "seller":
+            entries = sorted(
+                ((v, names.get(v) or f"Seller #{v}") for v in found), key=lambda e: e[1]
+            )
+        else:
+            entries = sorted((v, v) for v in found)
+
+        facets[facet] = [
+            {"value": value, "label": label, "count": found[value],
+             "args": bucket_args(facet, value)}
+            for value, label in entries
+        ]
+    return facets
+
+
+def is_active(bucket, current):
+    return all(str(current.get(k, "")) == str(v) for k, v in bucket["args"].items())
+
+
+def link_args(bucket, current):
+    """
+    `current` listing args with `bucket` applied, or removed again when it
+    is already the active one. The cursor always restarts.
+    """
+    args = {k: v for k, v in current.items() if k not in ("cursor", "page") and v != ""}
+    active = is_active(bucket, current)
+    for key, value in bucket["args"].items():
+        if active or value == "":
+            args.pop(key, None)
+        else:
+            args[key] = value
+    return args
@@ -0,0 +1,134 @@
+# template fragment cache: {% cache key[, ttl] %} ... {% endcache %}
+#
+# Renders the block once per key and replays the stored markup afterwards.
+# Keys are tuples whose leading items name what the fragment depends on, e.g.
+#
+#   {% cache ("car", car.id, "index-card", car.revision) %}   car cards
+#   {% cache ("layout", "header", logged_in) %}               nav chrome
+#
+# so a key changes whenever its inputs do (cars.revision is bumped by every
+# edit) and stale markup is never served, even by other workers. The admin
+# routes still call `invalidate("car", id)` so this process frees the old
+# entries right away instead of waiting for the LRU.
+#
+# Only cache markup that is the same for every visitor sharing the key:
+# no flash messages, CSRF tokens or usernames inside a {% cache %} block.
+import threading
+
+from jinja2 import nodes, Undefined
+from jinja2.ext import Extension
+
+from cache import MemoryBackend
+from config import FRAGMENT_CACHE, FRAGMENT_CACHE_TTL, FRAGMENT_CACHE_MAX_ENTRIES
+
+
+# -------------------------------------------------
+# STORE
+# -------------------------------------------------
+class FragmentCache:
+    """Bounded per-process LRU of rendered markup."""
+
+    def __init__(self):
+        self.enabled = False
+        self.ttl = FRAGMENT_CACHE_TTL
+        self.backend = MemoryBackend(FRAGMENT_CACHE_MAX_ENTRIES)
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0}
+
+    def configure(self, enabled=True, ttl=3600, max_entries=2048):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.backend = MemoryBackend(max_entries)
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def get_or_render(self, key, render, ttl=None):
+        """Stored markup for `key`, or `render()` (stored for next time)."""
+        if not self.enabled or key is None:
+            return render()
+
+        found, markup = self.backend.get(key)
+        if found:
+            self._count("hits")
+            return markup
+
+        self._count("misses")
+        markup = render()
+        self.backend.set(key, markup, ttl or self.ttl)
+        return markup
+
+    def invalidate(self, *prefix):
+        """Drops every fragment whose key starts with `prefix`; returns how many."""
+        size = len(prefix)
+        return self.backend.delete_where(lambda key: key[:size] == prefix)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._counts)
+        lookups = data["hits"] + data["misses"]
+        data.update(
+            enabled=self.enabled,
+            entries=len(self.backend),
+            evictions=self.backend.evictions,
+            hit_ratio=round(data["hits"] / lookups, 3) if lookups else None,
+        )
+        return data
+
+
+fragments = FragmentCache()
+
+
+def invalidate(*prefix):
+    return fragments.invalidate(*prefix)
+
+
+def _normalise_key(key):
+    """Hashable tuple key, or None (render uncached) if any part is undefined."""
+    parts = key if isinstance(key, (tuple, list)) else (key,)
+    if any(isinstance(part, Undefined) for part in parts):
+        return None
+    try:
+        hash(tuple(parts))
+    except TypeError:
+        return None
+    return tuple(parts)
+
+
+# -------------------------------------------------
+# JINJA EXTENSION
+# -------------------------------------------------
+class FragmentCacheExtension(Extension):
+    """Adds the `{% cache key[, ttl] %}...{% endcache %}` tag."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render", args), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, ttl, caller):
+        return fragments.get_or_render(_normalise_key(key), caller, ttl)
+
+
+def init_app(app):
+    fragments.configure(
+        enabled=app.config.get("FRAGMENT_CACHE", FRAGMENT_CACHE),
+        ttl=app.config.get("FRAGMENT_CACHE_TTL", FRAGMENT_CACHE_TTL),
+        max_entries=app.config.get("FRAGMENT_CACHE_MAX_ENTRIES", FRAGMENT_CACHE_MAX_ENTRIES),
+    )
+    app.jinja_env.add_extension(FragmentCacheExtension)
@@ -0,0 +1,88 @@
+# gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# - the app is preloaded in the master (migrations, autocomplete index and
+#   cache warm-up run once, see wsgi.py); workers are forked from it
+# - each worker re-creates its DB pool after the fork and opens its first
+#   connections before taking traffic
+# - sizing comes from the environment:
+#     WEB_CONCURRENCY   worker processes (default 2: Render free has 512 MB)
+#     GUNICORN_THREADS  threads per worker (default 4; keep DB_POOL_MAX >= it)
+#     GUNICORN_TIMEOUT, GUNICORN_MAX_REQUESTS, PORT
+# - boot and per-worker init times are logged
+import os
+import shutil
+import tempfile
+import time
+
+_boot_started = time.perf_counter()
+
+# Prometheus multiprocess mode: every worker writes its samples here and
+# /metrics merges them. Must be set before prometheus_client is imported.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "stellar-metrics")
+)
+
+try:
+    # imported up front: child_exit runs in a signal handler, where a
+    # first-time import can be re-entered by the next exiting worker
+    from prometheus_client import multiprocess
+except ImportError:
+    multiprocess = None
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers now and then (forked again from the warm master)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    # samples left by a previous run would be merged into this one's
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    # the master answered warm-up requests while preloading: its live
+    # gauges must not be summed with the workers'
+    if multiprocess is not None:
+        multiprocess.mark_process_dead(os.getpid())
+    server.log.info(
+        "🚀 Master ready in %.2fs: %d worker(s) x %d thread(s)",
+        time.perf_counter() - _boot_started, workers, threads,
+    )
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+    import db
+
+    # fresh pool for this process, connected before the first request
+    pool = db.get_pool()
+    pool.reset()
+    try:
+        pool.warm()
+    except Exception as e:
+        # the first request connects instead
+        worker.log.warning("DB pool not warmed: %s", e)
+
+
+def post_worker_init(worker):
+    worker.log.info(
+        "Worker %s ready in %.0f ms", worker.pid,
+        (time.perf_counter() - worker.forked_at) * 1000,
+    )
+
+
+def child_exit(server, worker):
+    # drop the exited worker's live gauges (counters keep their totals)
+    if multiprocess is not None:
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,77 @@
+# HTTP validators for the public catalogue pages
+#
+# A catalogue page only changes when the catalogue generation does (every
+# car/seller write bumps it, see cache.py) or when a new release ships.
+# So the ETag is simply hash(release, generation, URL) and Last-Modified
+# is the time of the last write. A browser or proxy revalidating a page it
+# already holds gets a 304 after one tiny query: no listing queries,
+# no Jinja.
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request, session
+from werkzeug.http import is_resource_modified
+
+from cache import catalogue_version
+from config import APP_VERSION, HTTP_CACHE_MAX_AGE
+
+
+def _as_utc(value):
+    """catalogue_state.updated_at as an aware UTC datetime (None if unknown)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _public_cache_control(response):
+    if HTTP_CACHE_MAX_AGE > 0:
+        response.headers["Cache-Control"] = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+    else:
+        # proxies may store the page but must revalidate (cheap 304) each time
+        response.headers["Cache-Control"] = "public, no-cache"
+    response.vary.add("Cookie")
+    return response
+
+
+def conditional(view):
+    """
+    Makes a GET view answer If-None-Match / If-Modified-Since with 304.
+    Visitors with a session (logged-in admin, pending flash messages) see
+    per-user content, so they bypass validation and get `private, no-cache`.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != "GET" or session:
+            response = make_response(view(*args, **kwargs))
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        generation, updated_at = catalogue_version()
+        etag = hashlib.sha1(
+            f"{APP_VERSION}:{generation}:{request.full_path}".encode("utf-8")
+        ).hexdigest()
+        last_modified = _as_utc(updated_at)
+
+        if not is_resource_modified(
+            request.environ, etag=etag, last_modified=last_modified
+        ):
+            response = make_response("", 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        return _public_cache_control(response)
+
+    return wrapper
@@ -0,0 +1,158 @@
+# responsive image derivatives generated at upload time
+import hashlib
+import os
+
+import jobs
+from config import BASE_DIR, VARIANTS_FOLDER
+
+IMAGE_VARIANTS = "image_variants"
+
+# label -> target width in px (never upscaled past the original)
+VARIANT_WIDTHS = {
+    "thumb": 320,     # listing cards
+    "detail": 800,    # car detail gallery
+    "full": 1600,     # lightbox / large screens
+}
+
+# modern formats first; the original format is always produced as fallback
+MODERN_FORMATS = ("avif", "webp")
+
+_SAVE_OPTIONS = {
+    "avif": {"quality": 50},
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+    "png": {"optimize": True},
+}
+
+
+def static_fs_path(url):
+    """Maps a stored `/static/...` URL onto its file on disk (None if it isn't one)."""
+    if not url:
+        return None
+    path = url.split("?", 1)[0].lstrip("/")
+    if not path.startswith("static/"):
+        return None
+    full = os.path.normpath(os.path.join(BASE_DIR, path))
+    if not full.startswith(os.path.join(BASE_DIR, "static") + os.sep):
+        return None
+    return full
+
+
+def _static_url(fs_path):
+    return "/" + os.path.relpath(fs_path, BASE_DIR).replace(os.sep, "/")
+
+
+def content_digest(path):
+    """SHA-256 of a file's bytes (a blob's digest is its file name already)."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(64 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _available_formats():
+    from PIL import features
+
+    return [fmt for fmt in MODERN_FORMATS if features.check(fmt)]
+
+
+def generate_variants(src_path, dest_dir=VARIANTS_FOLDER):
+    """
+    Writes resized copies of one image and returns their descriptions.
+    - one file per (width, format) for VARIANT_WIDTHS × (AVIF, WebP, original)
+    - EXIF orientation is applied, then all metadata (EXIF/GPS/XMP) is dropped
+    - files are named after the source's content digest, so two sources
+      sharing a base name (chasis.jpg / chasis.jpeg) never overwrite each
+      other and a changed source gets new names
+    Returns a list of dicts: label, width, height, format, variant_path (URL).
+    """
+    from PIL import Image, ImageOps
+
+    os.makedirs(dest_dir, exist_ok=True)
+    stem = content_digest(src_path)
+
+    with Image.open(src_path) as im:
+        original_format = "png" if im.format in ("PNG", "GIF") else "jpeg"
+        im = ImageOps.exif_transpose(im)
+        im.load()
+
+    has_alpha = im.mode in ("RGBA", "LA", "P")
+    im = im.convert("RGBA" if has_alpha else "RGB")
+
+    formats = _available_formats() + [original_format]
+    variants = []
+    done_widths = set()
+
+    for label, target in VARIANT_WIDTHS.items():
+        width = min(target, im.width)
+        if width in done_widths:
+            continue
+        done_widths.add(width)
+
+        height = max(1, round(im.height * width / im.width))
+        resized = im if width == im.width else im.resize((width, height), Image.LANCZOS)
+
+        for fmt in formats:
+            frame = resized
+            if fmt == "jpeg" and frame.mode != "RGB":
+                frame = frame.convert("RGB")
+
+            ext = "jpg" if fmt == "jpeg" else fmt
+            out = os.path.join(dest_dir, f"{stem}-{label}.{ext}")
+            # no `exif=` argument: the derivative carries no metadata
+            frame.save(out, fmt.upper(), **_SAVE_OPTIONS[fmt])
+
+            variants.append({
+                "label": label,
+                "width": width,
+                "height": height,
+                "format": fmt,
+                "variant_path": _static_url(out),
+            })
+
+    return variants
+
+
+def process_upload(url):
+    """
+    Builds and records the variants of a freshly stored upload.
+    A broken or non-image file is left as-is (the original still works).
+    """
+    src = static_fs_path(url)
+    if not src or not os.path.exists(src):
+        return []
+
+    try:
+        variants = generate_variants(src)
+    except Exception as e:
+        print("Image variant error:", e)
+        return []
+
+    import repository
+
+    repository.record_image_variants(url, variants)
+    return variants
+
+
+@jobs.handler(IMAGE_VARIANTS)
+def process_batches(batch):
+    """Variants for blobs stored in bulk (e.g. an inventory import's photos)."""
+    outcome = {}
+    for job in batch:
+        try:
+            for url in job["payload"]["urls"]:
+                process_upload(url)
+            outcome[job["id"]] = None
+        except Exception as e:
+            outcome[job["id"]] = e
+    return outcome
+
+
+def build_srcsets(variants):
+    """Groups variant rows into {"avif": "url 320w, …", "webp": …, "original": …}."""
+    groups = {}
+    for v in sorted(variants, key=lambda v: v["width"]):
+        key = v["format"] if v["format"] in MODERN_FORMATS else "original"
+        groups.setdefault(key, []).append(f"{v['variant_path']} {v['width']}w")
+    return {fmt: ", ".join(items) for fmt, items in groups.items()}
@@ -0,0 +1,255 @@
+# bulk inventory import (admin upload and `flask import-cars`)
+#
+# - rows stream from CSV, NDJSON (.ndjson/.jsonl) or a JSON array (.json)
+# - each row is validated on its own; bad rows are reported by line and
+#   skipped, the rest go in
+# - valid rows are inserted BATCH_SIZE at a time, one transaction per batch
+#   (repository.import_cars: execute_values on Postgres, executemany on SQLite)
+# - seller names are resolved to sellers.id from one lookup table
+# - photos named in the file are taken from an optional zip and stored in
+#   the blob store; their responsive variants are left to the job worker
+#
+# Columns (CSV header / JSON keys):
+#   title (required), price, description, category, mileage, body_condition,
+#   fuel_efficiency, engine_performance, seller (name) or seller_id,
+#   main_image (zip entry or /static/... path), images ("a.jpg; b.jpg")
+import csv
+import io
+import json
+import math
+import os
+import re
+import time
+import zipfile
+
+from werkzeug.datastructures import FileStorage
+
+import jobs
+import repository
+import storage
+from images import IMAGE_VARIANTS
+from utils import allowed_file
+
+BATCH_SIZE = 500
+MAX_ERRORS = 1000       # the report keeps the first N errors
+
+TEXT_FIELDS = (
+    "description", "category", "mileage", "body_condition",
+    "fuel_efficiency", "engine_performance",
+)
+
+_PRICE_JUNK = re.compile(r"[₦$,\s]|NGN", re.IGNORECASE)
+
+
+class RowError(ValueError):
+    """A row that cannot be imported (reported, then skipped)."""
+
+
+# -------------------------------------------------
+# READING
+# -------------------------------------------------
+def read_rows(stream, filename):
+    """
+    Yields (line number, dict) from an uploaded CSV / NDJSON / JSON file.
+    `stream` is a binary file object; CSV and NDJSON are read line by line.
+    """
+    name = (filename or "").lower()
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if name.endswith((".ndjson", ".jsonl")):
+        for number, line in enumerate(text, start=1):
+            if line.strip():
+                yield number, _json_object(line)
+    elif name.endswith(".json"):
+        # a JSON array has to be parsed whole; prefer NDJSON for big feeds
+        data = json.load(text)
+        if not isinstance(data, list):
+            raise RowError("a .json import must be an array of objects")
+        for number, item in enumerate(data, start=1):
+            yield number, item
+    else:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def _json_object(line):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return RowError(f"invalid JSON: {e}")
+
+
+# -------------------------------------------------
+# VALIDATION
+# -------------------------------------------------
+def _text(row, key):
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _price(value):
+    if value in (None, ""):
+        return 0
+    try:
+        price = float(_PRICE_JUNK.sub("", str(value)))
+    except ValueError:
+        raise RowError(f"price {value!r} is not a number")
+    if not math.isfinite(price):
+        raise RowError(f"price {value!r} is not a number")
+    if price < 0:
+        raise RowError("price cannot be negative")
+    return price
+
+
+def _image_names(value):
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in re.split(r"[;|]", value or "") if v.strip()]
+
+
+def validate(row, sellers):
+    """
+    Turns one input row into (car dict, main image name, [photo names]).
+    `sellers` maps lower-cased seller names to ids. Raises RowError.
+    """
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError("expected an object with car fields")
+
+    title = _text(row, "title")
+    if not title:
+        raise RowError("title is required")
+
+    car = {"title": title, "price": _price(row.get("price"))}
+    for key in TEXT_FIELDS:
+        car[key] = _text(row, key)
+    # like an empty form field (the card templates truncate it)
+    car["description"] = car["description"] or ""
+
+    seller_id = _text(row, "seller_id")
+    seller_name = _text(row, "seller")
+    if seller_id:
+        if not seller_id.isdigit() or int(seller_id) not in sellers.values():
+            raise RowError(f"unknown seller_id {seller_id}")
+        car["seller_id"] = int(seller_id)
+    elif seller_name:
+        found = sellers.get(seller_name.lower())
+        if found is None:
+            raise RowError(f"unknown seller {seller_name!r}")
+        car["seller_id"] = found
+
+    return car, _text(row, "main_image"), _image_names(row.get("images"))
+
+
+# -------------------------------------------------
+# PHOTOS FROM A ZIP
+# -------------------------------------------------
+class ImageArchive:
+    """Photos referenced by the import, looked up by file name in a zip."""
+
+    def __init__(self, zip_file=None, dry_run=False):
+        self.dry_run = dry_run  # check names only, store nothing
+        self.zip = zipfile.ZipFile(zip_file) if zip_file else None
+        self.names = {}
+        if self.zip:
+            for info in self.zip.infolist():
+                if not info.is_dir():
+                    self.names.setdefault(os.path.basename(info.filename).lower(), info)
+        self.stored = {}        # name -> blob url
+        self.new_urls = []      # blobs stored for the first time (need variants)
+
+    def url_for(self, name):
+        """Blob URL for a photo name; /static/ paths pass through unchanged."""
+        if name.startswith("/static/"):
+            return name
+        key = os.path.basename(name).lower()
+        if key in self.stored:
+            return self.stored[key]
+
+        info = self.names.get(key)
+        if info is None:
+            raise RowError(f"photo {name!r} is not in the zip")
+        if not allowed_file(key):
+            raise RowError(f"photo {name!r} is not an allowed image type")
+        if self.dry_run:
+            return name
+
+        with self.zip.open(info) as fh:
+            url, is_new = storage.store(FileStorage(stream=fh, filename=key))
+        if is_new:
+            self.new_urls.append(url)
+        self.stored[key] = url
+        return url
+
+    def close(self):
+        if self.zip:
+            self.zip.close()
+
+
+# -------------------------------------------------
+# IMPORT
+# -------------------------------------------------
+def run_import(stream, filename, images_zip=None, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Imports every valid row of an inventory file; returns a report dict:
+    {"inserted", "rows", "failed", "errors": [(line, message)], "seconds",
+     "rate", "variants_queued"}.
+    `dry_run` validates (and resolves photos) without writing cars.
+    """
+    started = time.perf_counter()
+    sellers = {s["name"].strip().lower(): s["id"] for s in repository.list_sellers()}
+    archive = ImageArchive(images_zip, dry_run=dry_run)
+    report = {"inserted": 0, "rows": 0, "failed": 0, "errors": [], "variants_queued": 0}
+
+    def error(number, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_ERRORS:
+            report["errors"].append((number, message))
+
+    def flush(batch):
+        if not batch or dry_run:
+            return
+        try:
+            repository.import_cars([(car, photos) for _, car, photos in batch])
+        except Exception as e:
+            # the whole batch rolled back: report every row in it
+            for number, _, _ in batch:
+                error(number, f"not saved: {e}")
+            return
+        report["inserted"] += len(batch)
+
+    batch = []
+    try:
+        for number, row in read_rows(stream, filename):
+            report["rows"] += 1
+            try:
+                car, main_image, photo_names = validate(row, sellers)
+                if main_image:
+                    car["main_image"] = archive.url_for(main_image)
+                photos = [archive.url_for(name) for name in photo_names]
+            except RowError as e:
+                error(number, str(e))
+                continue
+
+            batch.append((number, car, photos))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        flush(batch)
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        report["errors"].append((report["rows"] + 1, f"file could not be read: {e}"))
+    finally:
+        archive.close()
+
+    if archive.new_urls and not dry_run:
+        jobs.enqueue(IMAGE_VARIANTS, {"urls": archive.new_urls})
+        report["variants_queued"] = len(archive.new_urls)
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rate"] = round(report["inserted"] / report["seconds"]) if report["seconds"] else None
+    return report
@@ -0,0 +1,237 @@
+# durable job queue stored in the application database
+#
+# Web requests `enqueue()` work and return immediately; `flask run-worker`
+# claims ready jobs in batches, hands each batch to its handler and
+# retries failures with exponential backoff. Done jobs are purged after
+# JOB_DONE_RETENTION seconds.
+import json
+import os
+import random
+import signal
+import socket
+import time
+import uuid
+
+from flask import has_app_context
+
+import db
+from config import (
+    JOB_BATCH_SIZE, JOB_DONE_RETENTION, JOB_MAX_ATTEMPTS, JOB_POLL_INTERVAL,
+    JOB_RETRY_BASE, JOB_RETRY_MAX, JOB_VISIBILITY_TIMEOUT,
+)
+
+# seconds between purges of old done jobs by an idle worker
+PURGE_INTERVAL = 3600
+
+# kind -> handler(list of job dicts) -> {job_id: exception or None}
+HANDLERS = {}
+
+
+def handler(kind):
+    """Registers a batch handler for one job kind."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+# -------------------------------------------------
+# PRODUCER SIDE
+# -------------------------------------------------
+def enqueue(kind, payload, queue="default", delay=0, max_attempts=JOB_MAX_ATTEMPTS):
+    """Stores a job and returns its id (one INSERT, no network I/O)."""
+    return db.insert(
+        "INSERT INTO jobs (queue, kind, payload, status, attempts, max_attempts, run_after) "
+        "VALUES (%s, %s, %s, 'queued', 0, %s, %s)",
+        (queue, kind, json.dumps(payload), max_attempts, time.time() + delay),
+    )
+
+
+# -------------------------------------------------
+# WORKER SIDE
+# -------------------------------------------------
+def requeue_stale(queue="default", timeout=JOB_VISIBILITY_TIMEOUT):
+    """
+    Puts back jobs whose worker died while they were running.
+    A job out of attempts is marked failed instead: one that kills its
+    worker every time would otherwise loop forever.
+    """
+    cutoff = time.time() - timeout
+    dead = db.execute(
+        "UPDATE jobs SET status = 'failed', claimed_by = NULL, "
+        "last_error = 'worker died while running it' "
+        "WHERE queue = %s AND status = 'running' AND claimed_at < %s "
+        "AND attempts >= max_attempts",
+        (queue, cutoff),
+    )
+    if dead:
+        print(f"⚠️ {dead} stale job(s) out of attempts marked failed")
+    return db.execute(
+        "UPDATE jobs SET status = 'queued', claimed_by = NULL "
+        "WHERE queue = %s AND status = 'running' AND claimed_at < %s",
+        (queue, cutoff),
+    )
+
+
+def purge_done(queue="default", older_than=JOB_DONE_RETENTION):
+    """
+    Deletes finished jobs (failed ones stay for inspection). A done job's
+    run_after is its last scheduled time, so it finished after that.
+    """
+    return db.execute(
+        "DELETE FROM jobs WHERE queue = %s AND status = 'done' AND run_after < %s",
+        (queue, time.time() - older_than),
+    )
+
+
+def claim(queue="default", limit=JOB_BATCH_SIZE):
+    """
+    Atomically marks up to `limit` ready jobs as running for this worker
+    and returns them (payload decoded). Concurrent workers never get the
+    same job: the claim is a single UPDATE, with SKIP LOCKED on Postgres.
+    """
+    token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    now = time.time()
+
+    pick = (
+        "SELECT id FROM jobs WHERE queue = %s AND status = 'queued' "
+        "AND run_after <= %s ORDER BY run_after, id LIMIT %s"
+    )
+    if db.DIALECT == "postgres":
+        pick += " FOR UPDATE SKIP LOCKED"
+
+    with db.transaction():
+        db.execute(
+            "UPDATE jobs SET status = 'running', claimed_by = %s, claimed_at = %s, "
+            "attempts = attempts + 1 WHERE id IN (" + pick + ")",
+            (token, now, queue, now, limit),
+        )
+        rows = db.query(
+            "SELECT * FROM jobs WHERE claimed_by = %s AND status = 'running' ORDER BY id",
+            (token,),
+        )
+
+    for row in rows:
+        row["payload"] = json.loads(row["payload"])
+    return rows
+
+
+def complete(job_id):
+    db.execute(
+        "UPDATE jobs SET status = 'done', claimed_by = NULL, last_error = NULL "
+        "WHERE id = %s",
+        (job_id,),
+    )
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts` (capped, with jitter)."""
+    delay = min(JOB_RETRY_BASE * 2 ** (attempts - 1), JOB_RETRY_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail(job, error):
+    """Schedules a retry, or marks the job failed once attempts run out."""
+    if job["attempts"] >= job["max_attempts"]:
+        db.execute(
+            "UPDATE jobs SET status = 'failed', claimed_by = NULL, last_error = %s "
+            "WHERE id = %s",
+            (str(error)[:1000], job["id"]),
+        )
+        return False
+
+    db.execute(
+        "UPDATE jobs SET status = 'queued', claimed_by = NULL, last_error = %s, "
+        "run_after = %s WHERE id = %s",
+        (str(error)[:1000], time.time() + backoff(job["attempts"]), job["id"]),
+    )
+    return True
+
+
+def run_batch(jobs):
+    """Dispatches claimed jobs to their handlers, grouped by kind."""
+    by_kind = {}
+    for job in jobs:
+        by_kind.setdefault(job["kind"], []).append(job)
+
+    done = failed = 0
+    for kind, batch in by_kind.items():
+        fn = HANDLERS.get(kind)
+        if fn is None:
+            outcome = {job["id"]: RuntimeError(f"no handler for job kind {kind!r}")
+                       for job in batch}
+        else:
+            try:
+                outcome = fn(batch)
+            except Exception as e:
+                outcome = {job["id"]: e for job in batch}
+
+        for job in batch:
+            error = outcome.get(job["id"])
+            if error is None:
+                complete(job["id"])
+                done += 1
+            else:
+                fail(job, error)
+                failed += 1
+
+    return done, failed
+
+
+def queue_stats(queue="default"):
+    rows = db.query(
+        "SELECT status, COUNT(*) AS n FROM jobs WHERE queue = %s GROUP BY status",
+        (queue,),
+    )
+    return {row["status"]: row["n"] for row in rows}
+
+
+def _release_connection():
+    # hand the connection back between batches so the pool can health-check
+    # it; a long-lived worker then survives database restarts
+    if has_app_context():
+        db.close_db_connection()
+
+
+def run_worker(queue="default", batch_size=JOB_BATCH_SIZE,
+               poll_interval=JOB_POLL_INTERVAL, once=False, on_idle=None):
+    """
+    Worker loop: claim → run → repeat; sleeps `poll_interval` when idle.
+    SIGTERM/SIGINT finish the current batch and exit cleanly.
+    `once=True` drains what is ready now and returns (handy for cron/tests).
+    """
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    totals = {"done": 0, "failed": 0}
+    requeue_stale(queue)
+    purge_done(queue)
+    purged_at = time.monotonic()
+
+    while not stopping:
+        jobs = claim(queue, batch_size)
+        if jobs:
+            done, failed = run_batch(jobs)
+            totals["done"] += done
+            totals["failed"] += failed
+            print(f"📬 batch of {len(jobs)}: {done} done, {failed} failed")
+            _release_connection()
+            continue
+
+        if once:
+            break
+        _release_connection()
+        if on_idle:
+            on_idle()
+        time.sleep(poll_interval)
+        requeue_stale(queue)
+        if time.monotonic() - purged_at > PURGE_INTERVAL:
+            purge_done(queue)
+            purged_at = time.monotonic()
+
+    return totals
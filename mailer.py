@@ -0,0 +1,129 @@
+# inquiry email delivery, done by the background worker (flask run-worker)
+#
+# The web request only stores a job; the worker sends queued inquiries in
+# batches over one authenticated SMTP connection (Flask-Mail's, configured
+# from MAIL_* in config.py) that stays open while there is work and is
+# closed after SMTP_IDLE_TIMEOUT seconds without any.
+#
+# Flask-Mail is imported on first send, so web processes (which only
+# enqueue) never load it.
+import smtplib
+import time
+
+from flask import current_app
+
+import jobs
+from config import SMTP_IDLE_TIMEOUT
+
+INQUIRY_EMAIL = "inquiry_email"
+
+
+# -------------------------------------------------
+# PRODUCER (web request)
+# -------------------------------------------------
+def enqueue_inquiry(name, email, message, seller_email, car_title):
+    return jobs.enqueue(INQUIRY_EMAIL, {
+        "name": name,
+        "email": email,
+        "message": message,
+        "seller_email": seller_email,
+        "car_title": car_title,
+    })
+
+
+def _mail():
+    """The app's Flask-Mail extension, set up from app.config on first use."""
+    mail = current_app.extensions.get("mail")
+    if mail is None:
+        from flask_mail import Mail
+
+        Mail(current_app._get_current_object())
+        mail = current_app.extensions["mail"]
+    return mail
+
+
+def build_inquiry(payload):
+    from flask_mail import Message
+
+    # sent from our own (authenticated) address; replies go to the buyer
+    sender = current_app.config.get("MAIL_DEFAULT_SENDER") or payload["email"]
+    return Message(
+        subject=f"New inquiry: {payload['car_title']}",
+        sender=(payload["name"], sender),
+        recipients=[payload["seller_email"]],
+        reply_to=payload["email"],
+        body=payload["message"],
+    )
+
+
+# -------------------------------------------------
+# SMTP SESSION (worker)
+# -------------------------------------------------
+class SMTPSession:
+    """One Flask-Mail connection reused across messages and batches."""
+
+    def __init__(self, idle_timeout=SMTP_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.conn = None
+        self.last_used = 0.0
+        self.opened = 0
+
+    def connection(self):
+        if self.conn is not None and time.monotonic() - self.last_used > self.idle_timeout:
+            self.close()
+        if self.conn is None:
+            # connect + STARTTLS + LOGIN happen here, once per session
+            self.conn = _mail().connect().__enter__()
+            self.opened += 1
+            self.last_used = time.monotonic()
+        return self.conn
+
+    def send(self, message):
+        try:
+            self.connection().send(message)
+        except smtplib.SMTPServerDisconnected:
+            # the server dropped an idle connection: reconnect once
+            self.conn = None
+            self.connection().send(message)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        conn, self.conn = self.conn, None
+        if conn is not None and conn.host is not None:
+            try:
+                conn.host.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+    def close_if_idle(self):
+        if self.conn is not None and time.monotonic() - self.last_used > self.idle_timeout:
+            self.close()
+
+
+session = SMTPSession()
+
+
+@jobs.handler(INQUIRY_EMAIL)
+def send_inquiries(batch):
+    """Sends a batch of inquiries; returns {job_id: error or None}."""
+    try:
+        session.connection()
+    except Exception as e:
+        # server unreachable or login refused: retry the whole batch later
+        session.close()
+        return {job["id"]: e for job in batch}
+
+    outcome = {}
+    for job in batch:
+        try:
+            session.send(build_inquiry(job["payload"]))
+            outcome[job["id"]] = None
+        except Exception as e:
+            outcome[job["id"]] = e
+            # a refused message leaves the session usable; a dead socket doesn't
+            dead = isinstance(e, smtplib.SMTPServerDisconnected) or (
+                isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+            )
+            if dead:
+                session.close()
+    return outcome
@@ -0,0 +1,247 @@
+# Prometheus metrics for the web tier (GET /metrics)
+#
+# - per-endpoint request latency histogram and request counter (by status,
+#   so error rates are `status=~"5.."`), labelled by Flask endpoint, never
+#   by raw URL
+# - per-process gauges: DB pool, result / fragment cache, uploads
+# - email / job queue depth, read from the jobs table when scraped
+# - only served with METRICS_TOKEN set, to `Authorization: Bearer <token>`
+#
+# Gunicorn pre-forks workers and each scrape lands on one of them, so with
+# PROMETHEUS_MULTIPROC_DIR set every process writes its samples to files in
+# that directory and /metrics merges them (prometheus_client multiprocess
+# mode). gunicorn.conf.py sets the directory, empties it at boot and marks
+# exited workers dead (their live gauges go; counters keep their totals).
+# Without it (flask run) the process's own registry is served.
+#
+# Hot path cost: one histogram observe and one counter inc per request
+# (label children are cached); the per-process stats are copied over at
+# most every METRICS_REFRESH seconds.
+import os
+import threading
+import time
+
+from flask import Response, abort, request
+
+from config import METRICS, METRICS_REFRESH, METRICS_TOKEN
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# seconds; catalogue pages are tens of ms, exports and imports take longer
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_metrics = {}
+
+
+def _define():
+    """Creates the metric objects (once per process, after the multiproc env is set)."""
+    if _metrics:
+        return _metrics
+    # gauges: live workers summed, exited workers dropped
+    live = {"multiprocess_mode": "livesum"}
+    _metrics.update(
+        latency=Histogram(
+            "stellar_http_request_duration_seconds", "Request latency by endpoint.",
+            ("endpoint", "method"), buckets=LATENCY_BUCKETS,
+        ),
+        requests=Counter(
+            "stellar_http_requests", "Requests by endpoint and status.",
+            ("endpoint", "method", "status"),
+        ),
+        pool=Gauge("stellar_db_pool_connections", "DB pool connections.", ("state",), **live),
+        pool_events=Counter(
+            "stellar_db_pool_events", "DB pool checkouts, waits, timeouts, ...", ("event",)
+        ),
+        cache_lookups=Counter(
+            "stellar_cache_lookups", "Cache lookups.", ("cache", "result")
+        ),
+        cache_evictions=Counter("stellar_cache_evictions", "Cache evictions.", ("cache",)),
+        cache_entries=Gauge("stellar_cache_entries", "Entries held.", ("cache",), **live),
+        uploads=Counter("stellar_uploads", "Stored uploads (new or deduplicated).", ("result",)),
+        upload_bytes=Counter("stellar_upload_bytes", "Bytes of new blobs written."),
+    )
+    if not MULTIPROC_DIR:
+        prometheus_client.REGISTRY.register(QueueCollector())
+    return _metrics
+
+
+# -------------------------------------------------
+# PER-PROCESS STATS -> METRICS
+# -------------------------------------------------
+class _Sync:
+    """Copies the modules' cumulative stats into counters as deltas."""
+
+    def __init__(self):
+        self._seen = {}
+        self._lock = threading.Lock()
+        self.synced_at = 0.0
+
+    def _inc(self, counter, key, total):
+        delta = total - self._seen.get(key, 0)
+        if delta > 0:
+            counter.inc(delta)
+        self._seen[key] = total
+
+    def __call__(self):
+        if not self._lock.acquire(blocking=False):
+            return      # another thread is on it
+        try:
+            self.synced_at = time.monotonic()
+            self._sync()
+        finally:
+            self._lock.release()
+
+    def _sync(self):
+        import db
+        import storage
+        from cache import results
+        from fragments import fragments
+
+        m = _metrics
+        pool = db.pool_stats()
+        for state in ("idle", "in_use", "size"):
+            m["pool"].labels(state).set(pool[state])
+        for event in ("created", "closed", "checkouts", "waits", "timeouts", "failed_checks"):
+            self._inc(m["pool_events"].labels(event), ("pool", event), pool[event])
+
+        for name, cache in (("results", results), ("fragments", fragments)):
+            stats = cache.stats()
+            for result in ("hits", "misses"):
+                self._inc(m["cache_lookups"].labels(name, result), (name, result), stats[result])
+            self._inc(m["cache_evictions"].labels(name), (name, "evictions"), stats["evictions"])
+            m["cache_entries"].labels(name).set(stats["entries"])
+
+        uploads = storage.upload_stats()
+        self._inc(m["uploads"].labels("new"), ("uploads", "new"), uploads["stored"])
+        self._inc(m["uploads"].labels("duplicate"), ("uploads", "dup"), uploads["duplicates"])
+        self._inc(m["upload_bytes"], ("uploads", "bytes"), uploads["bytes"])
+
+
+sync_process_stats = _Sync()
+
+
+class QueueCollector:
+    """Job queue depth by kind and status, read from the DB when scraped."""
+
+    def describe(self):
+        # no names up front: registering must not run the query
+        return []
+
+    def collect(self):
+        import db
+
+        family = GaugeMetricFamily(
+            "stellar_jobs", "Background jobs (inquiry emails, image variants) by status.",
+            labels=("queue", "kind", "status"),
+        )
+        try:
+            rows = db.query(
+                "SELECT queue, kind, status, COUNT(*) AS n FROM jobs "
+                "GROUP BY queue, kind, status"
+            )
+        except Exception as e:
+            print("⚠️ Metrics: job queue not read:", e)
+            rows = []
+        for row in rows:
+            family.add_metric((row["queue"], row["kind"], row["status"]), row["n"])
+        yield family
+
+
+# -------------------------------------------------
+# REQUEST HOOKS
+# -------------------------------------------------
+_children = {}
+
+
+def _child(metric, *labels):
+    """Cached label child: skips label validation on every request."""
+    key = (metric, labels)
+    child = _children.get(key)
+    if child is None:
+        child = _children[key] = _metrics[metric].labels(*labels)
+    return child
+
+
+def _before_request():
+    request.environ["stellar.started"] = time.perf_counter()
+
+
+def _after_request(response):
+    started = request.environ.pop("stellar.started", None)
+    if started is None:
+        return response
+    endpoint = request.endpoint or "unmatched"
+    _child("latency", endpoint, request.method).observe(time.perf_counter() - started)
+    _child("requests", endpoint, request.method, str(response.status_code)).inc()
+    return response
+
+
+def _teardown_request(exc):
+    # only reached with the start time still set when after_request never
+    # ran (an exception inside another hook): count it as a 500 here
+    if exc is None:
+        return
+    started = request.environ.pop("stellar.started", None)
+    if started is not None:
+        endpoint = request.endpoint or "unmatched"
+        _child("latency", endpoint, request.method).observe(time.perf_counter() - started)
+        _child("requests", endpoint, request.method, "500").inc()
+
+
+def _teardown_appcontext(exc):
+    # runs after the request's DB connection went back to the pool, so the
+    # pool gauges never count the request that samples them
+    if time.monotonic() - sync_process_stats.synced_at > METRICS_REFRESH:
+        sync_process_stats()
+
+
+def metrics_view():
+    if request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        abort(404)
+
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        # a fresh registry per scrape, merging every process's files
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(QueueCollector())
+    else:
+        registry = prometheus_client.REGISTRY
+
+    # the constant carries its charset already: content_type, not mimetype
+    response = Response(prometheus_client.generate_latest(registry),
+                        content_type=prometheus_client.CONTENT_TYPE_LATEST)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def init_app(app, enabled=METRICS):
+    if not enabled:
+        return
+    if not METRICS_TOKEN:
+        # per-endpoint traffic and pool / queue internals are not public
+        print("⚠️ Metrics off: set METRICS_TOKEN to serve /metrics")
+        return
+    if prometheus_client is None:
+        print("⚠️ Metrics off: prometheus_client is not installed")
+        return
+    if MULTIPROC_DIR:
+        os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+    _define()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    # teardown_appcontext hooks run last-registered first: go to the front
+    # so this one follows db.close_db_connection
+    app.teardown_appcontext_funcs.insert(0, _teardown_appcontext)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+    print(f"📈 Metrics at /metrics{' (multiprocess)' if MULTIPROC_DIR else ''}")
@@ -0,0 +1,472 @@
+# versioned schema migrations (flask migrate)
+#
+# Every schema change is one numbered entry in MIGRATIONS, applied once and
+# recorded in `schema_version`. Boot only runs `check()`: a single
+# `SELECT MAX(version)`. DDL is written once for both backends; the few
+# type names that differ come from the backend's SCHEMA_TYPES.
+#
+# The first migrations use IF NOT EXISTS so databases created by the old
+# per-boot init_db() are adopted without changes.
+from collections import Counter
+
+from werkzeug.security import generate_password_hash
+
+from db import DIALECT, SCHEMA_TYPES, get_pool, translate
+from facets import buckets as facet_buckets
+from specs import parse_fuel_km_per_l, parse_mileage_km, parse_year
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# any constant: serialises concurrent `upgrade()` calls on Postgres
+_PG_LOCK_KEY = 72541
+
+
+def _run(cur, statements):
+    for sql in statements:
+        cur.execute(sql.format(**SCHEMA_TYPES))
+
+
+# -------------------------------------------------
+# 001 INITIAL SCHEMA
+# -------------------------------------------------
+INITIAL_SCHEMA = [
+    # USERS (admin login)
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id {pk},
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL
+    )
+    """,
+    # SELLERS
+    """
+    CREATE TABLE IF NOT EXISTS sellers (
+        id {pk},
+        name TEXT NOT NULL,
+        contact_email TEXT,
+        phone TEXT,
+        address TEXT,
+        about TEXT,
+        photo TEXT
+    )
+    """,
+    # CARS
+    """
+    CREATE TABLE IF NOT EXISTS cars (
+        id {pk},
+        title TEXT NOT NULL,
+        description TEXT,
+        price REAL,
+        category TEXT,
+        mileage TEXT,
+        body_condition TEXT,
+        fuel_efficiency TEXT,
+        engine_performance TEXT,
+        seller_id INTEGER REFERENCES sellers(id),
+        main_image TEXT,
+        date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # CAR IMAGES (gallery)
+    """
+    CREATE TABLE IF NOT EXISTS car_images (
+        id {pk},
+        car_id INTEGER REFERENCES cars(id),
+        image_path TEXT
+    )
+    """,
+    # BLOBS (content-addressed uploads, reference counted)
+    """
+    CREATE TABLE IF NOT EXISTS blobs (
+        digest TEXT PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        ext TEXT NOT NULL,
+        size {bigint} NOT NULL,
+        refcount INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    # IMAGE VARIANTS (resized AVIF/WebP/original copies of each upload)
+    """
+    CREATE TABLE IF NOT EXISTS image_variants (
+        id {pk},
+        image_path TEXT NOT NULL,
+        label TEXT NOT NULL,
+        width INTEGER NOT NULL,
+        height INTEGER,
+        format TEXT NOT NULL,
+        variant_path TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_image_variants_path ON image_variants (image_path)",
+    # CATALOGUE GENERATION (bumped by every write, keys the result cache)
+    """
+    CREATE TABLE IF NOT EXISTS catalogue_state (
+        id INTEGER PRIMARY KEY,
+        generation INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    INSERT INTO catalogue_state (id, generation) VALUES (1, 0)
+    ON CONFLICT (id) DO NOTHING
+    """,
+    # JOB QUEUE (background work such as inquiry emails; flask run-worker)
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id {pk},
+        queue TEXT NOT NULL DEFAULT 'default',
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 6,
+        run_after {double} NOT NULL,
+        claimed_by TEXT,
+        claimed_at {double},
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (queue, status, run_after)",
+    # KEYSET PAGINATION (sort column + id tiebreak)
+    "CREATE INDEX IF NOT EXISTS idx_cars_price_id ON cars (price, id)",
+    "CREATE INDEX IF NOT EXISTS idx_cars_title_id ON cars (title, id)",
+]
+
+
+def _initial_schema(cur):
+    if DIALECT == "sqlite":
+        # local DBs from before the Postgres-style schema kept the cover in `image`
+        cur.execute("SELECT name FROM pragma_table_info('cars')")
+        cols = [row[0] for row in cur.fetchall()]
+        if cols and "main_image" not in cols:
+            cur.execute("ALTER TABLE cars ADD COLUMN main_image TEXT")
+            if "image" in cols:
+                cur.execute("UPDATE cars SET main_image = image")
+
+    _run(cur, INITIAL_SCHEMA)
+
+
+# -------------------------------------------------
+# 002 FULL-TEXT SEARCH
+# -------------------------------------------------
+SQLITE_SEARCH = [
+    # FTS5 mirror of cars, kept in sync by triggers
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS cars_fts USING fts5(
+        title, category, description,
+        content='cars', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cars_fts_ai AFTER INSERT ON cars BEGIN
+        INSERT INTO cars_fts (rowid, title, category, description)
+        VALUES (new.id, new.title, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cars_fts_ad AFTER DELETE ON cars BEGIN
+        INSERT INTO cars_fts (cars_fts, rowid, title, category, description)
+        VALUES ('delete', old.id, old.title, old.category, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cars_fts_au
+    AFTER UPDATE OF title, category, description ON cars BEGIN
+        INSERT INTO cars_fts (cars_fts, rowid, title, category, description)
+        VALUES ('delete', old.id, old.title, old.category, old.description);
+        INSERT INTO cars_fts (rowid, title, category, description)
+        VALUES (new.id, new.title, new.category, new.description);
+    END
+    """,
+    # index the cars that were there before search existed
+    "INSERT INTO cars_fts (cars_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_SEARCH = [
+    # generated tsvector + GIN index
+    """
+    ALTER TABLE cars ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cars_search_vector ON cars USING GIN (search_vector)",
+]
+
+
+def _search_index(cur):
+    _run(cur, SQLITE_SEARCH if DIALECT == "sqlite" else POSTGRES_SEARCH)
+
+
+# -------------------------------------------------
+# 003 LOOKUP INDEXES
+# -------------------------------------------------
+# cars.price is already served by idx_cars_price_id (price leads the key)
+LOOKUP_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_cars_category_id ON cars (category, id)",
+    "CREATE INDEX IF NOT EXISTS idx_cars_seller_id ON cars (seller_id)",
+    "CREATE INDEX IF NOT EXISTS idx_car_images_car_id ON car_images (car_id)",
+]
+
+
+def _lookup_indexes(cur):
+    _run(cur, LOOKUP_INDEXES)
+
+
+# -------------------------------------------------
+# 004 SAMPLE DATA
+# -------------------------------------------------
+SAMPLE_SELLERS = [
+    ("Alice Johnson", "alice@example.com", "08012345678", "Lagos",
+     "Trusted luxury car dealer.", None),
+    ("Bob Smith", "bob@example.com", "08123456789", "Abuja",
+     "Certified used car dealer.", None),
+    ("Carol White", "carol@example.com", "09098765432", "Port Harcourt",
+     "SUV specialist.", None),
+]
+
+SAMPLE_CARS = [
+    ("2023 Executive Sedan", "Luxury sedan.", 24500000, "Sedan",
+     "10,000 km", "Excellent", "15 km/L", "V6 Turbo Engine", 1,
+     "/static/images/sedan.jpg"),
+
+    ("2022 Sport Coupe", "Sport coupe.", 13850000, "Coupe",
+     "8,000 km", "Very Good", "14 km/L", "2.0L Turbo", 2,
+     "/static/images/coupe.jpg"),
+
+    ("2021 Family SUV", "Spacious SUV.", 19900000, "SUV",
+     "20,000 km", "Good", "12 km/L", "3.0L V6", 3,
+     "/static/images/suv.jpg"),
+]
+
+
+def _is_empty(cur, table):
+    cur.execute(f"SELECT COUNT(*) FROM {table}")
+    return cur.fetchone()[0] == 0
+
+
+def _sample_data(cur):
+    # only fills tables that are still empty (adopted DBs keep their data)
+    if _is_empty(cur, "users"):
+        cur.execute(
+            translate("INSERT INTO users (username, password) VALUES (%s, %s)"),
+            ("admin", generate_password_hash("password123")),
+        )
+        print("➡️ Default admin user created")
+
+    if _is_empty(cur, "sellers"):
+        cur.executemany(translate("""
+            INSERT INTO sellers (name, contact_email, phone, address, about, photo)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """), SAMPLE_SELLERS)
+        print("➡️ Sample sellers added")
+
+    if _is_empty(cur, "cars"):
+        cur.executemany(translate("""
+            INSERT INTO cars (
+                title, description, price, category, mileage, body_condition,
+                fuel_efficiency, engine_performance, seller_id, main_image
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """), SAMPLE_CARS)
+        print("➡️ Sample cars added")
+
+
+# -------------------------------------------------
+# 005 CAR REVISIONS
+# -------------------------------------------------
+# bumped by every change to what a car card shows (row edits, new cover
+# variants); template fragments are keyed by (car id, revision)
+CAR_REVISIONS = [
+    "ALTER TABLE cars ADD COLUMN revision INTEGER NOT NULL DEFAULT 0",
+]
+
+
+def _car_revisions(cur):
+    _run(cur, CAR_REVISIONS)
+
+
+# -------------------------------------------------
+# 006 NUMERIC SPECS
+# -------------------------------------------------
+# numeric copies of the free-text mileage / fuel_efficiency and the model
+# year from the title, for range filters (parsed on write, see specs.py)
+NUMERIC_SPECS = [
+    "ALTER TABLE cars ADD COLUMN mileage_km INTEGER",
+    "ALTER TABLE cars ADD COLUMN fuel_km_per_l {double}",
+    "ALTER TABLE cars ADD COLUMN year INTEGER",
+    "CREATE INDEX IF NOT EXISTS idx_cars_mileage_km_id ON cars (mileage_km, id)",
+    "CREATE INDEX IF NOT EXISTS idx_cars_year_id ON cars (year, id)",
+]
+
+
+def _numeric_specs(cur):
+    _run(cur, NUMERIC_SPECS)
+
+    # backfill existing rows with the same parser the app writes with
+    cur.execute("SELECT id, title, mileage, fuel_efficiency FROM cars")
+    rows = cur.fetchall()
+    cur.executemany(
+        translate(
+            "UPDATE cars SET mileage_km = %s, fuel_km_per_l = %s, year = %s "
+            "WHERE id = %s"
+        ),
+        [
+            (parse_mileage_km(mileage), parse_fuel_km_per_l(fuel),
+             parse_year(title), car_id)
+            for car_id, title, mileage, fuel in rows
+        ],
+    )
+    print(f"➡️ Numeric specs backfilled for {len(rows)} cars")
+
+
+# -------------------------------------------------
+# 007 FACET COUNTS
+# -------------------------------------------------
+# unfiltered facet counts, maintained by every car write (see facets.py)
+FACET_TABLE = [
+    """
+    CREATE TABLE IF NOT EXISTS car_facets (
+        facet TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (facet, value)
+    )
+    """,
+]
+
+
+def _facet_counts(cur):
+    _run(cur, FACET_TABLE)
+
+    cur.execute("SELECT category, price, seller_id, mileage_km FROM cars")
+    totals = Counter()
+    for category, price, seller_id, mileage_km in cur.fetchall():
+        totals.update(facet_buckets({
+            "category": category, "price": price,
+            "seller_id": seller_id, "mileage_km": mileage_km,
+        }))
+    cur.executemany(
+        translate("INSERT INTO car_facets (facet, value, count) VALUES (%s, %s, %s)"),
+        [(facet, value, count) for (facet, value), count in sorted(totals.items())],
+    )
+
+
+# -------------------------------------------------
+# REGISTRY (append only: never edit a released migration)
+# -------------------------------------------------
+MIGRATIONS = [
+    (1, "initial schema", _initial_schema),
+    (2, "full-text search", _search_index),
+    (3, "lookup indexes", _lookup_indexes),
+    (4, "sample data", _sample_data),
+    (5, "car revisions", _car_revisions),
+    (6, "numeric specs", _numeric_specs),
+    (7, "facet counts", _facet_counts),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+
+# -------------------------------------------------
+# RUNNER
+# -------------------------------------------------
+def current_version():
+    """Highest applied migration (0 for a new or pre-migration database)."""
+    conn = get_pool().getconn()
+    try:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT MAX(version) FROM schema_version")
+        except Exception:
+            # no schema_version table yet
+            conn.rollback()
+            return 0
+        return cur.fetchone()[0] or 0
+    finally:
+        conn.close()
+
+
+def pending():
+    version = current_version()
+    return [(v, name) for v, name, _ in MIGRATIONS if v > version]
+
+
+def _lock(cur):
+    # one migrator at a time; the others wait, then see the work done
+    if DIALECT == "sqlite":
+        cur.execute("BEGIN IMMEDIATE")
+    else:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (_PG_LOCK_KEY,))
+
+
+def upgrade(target=None):
+    """
+    Applies every pending migration up to `target` (default: all).
+    Each one runs in its own transaction together with its
+    schema_version row. Returns the list of applied (version, name).
+    """
+    applied = []
+    conn = get_pool().getconn()
+    try:
+        cur = conn.cursor()
+        cur.execute(SCHEMA_VERSION_TABLE)
+        conn.commit()
+
+        for version, name, migrate in MIGRATIONS:
+            if target is not None and version > target:
+                break
+
+            _lock(cur)
+            cur.execute(
+                translate("SELECT 1 FROM schema_version WHERE version = %s"), (version,)
+            )
+            if cur.fetchone():
+                conn.rollback()
+                continue
+
+            migrate(cur)
+            cur.execute(
+                translate("INSERT INTO schema_version (version, name) VALUES (%s, %s)"),
+                (version, name),
+            )
+            conn.commit()
+            applied.append((version, name))
+            print(f"⬆️  Migration {version:03d} applied: {name}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return applied
+
+
+def check(auto_migrate=False):
+    """
+    Boot-time check: one query when the schema is current.
+    Pending migrations are applied when `auto_migrate` is set,
+    otherwise reported (run `flask migrate`).
+    """
+    version = current_version()
+    if version >= LATEST:
+        return version
+
+    if auto_migrate:
+        print(f"📦 Migrating database schema v{version} → v{LATEST}...")
+        upgrade()
+        return LATEST
+
+    print(f"⚠️ Database schema is v{version}, v{LATEST} available: run `flask migrate`")
+    return version
@@ -0,0 +1,50 @@
+# opaque next/prev tokens for keyset ("seek") pagination
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+
+# legacy ?page=N beyond this is treated as this (keeps OFFSET in range)
+MAX_PAGE = 2 ** 31
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.secret_key, salt="cars-cursor")
+
+
+def encode_cursor(sort_by, direction, key, page):
+    """
+    Packs a page boundary into a signed, URL-safe token.
+    - `direction`: "next" (rows after `key`) or "prev" (rows before `key`)
+    - `key`      : sort-column values of the boundary row (ends with its id),
+                   or {"offset": n} for orders that cannot seek
+    - `page`     : page number the token leads to (display only)
+    """
+    return _serializer().dumps({"s": sort_by, "d": direction, "k": key, "p": page})
+
+
+def decode_cursor(token, sort_by):
+    """
+    Returns (direction, key, page) or None when the token is missing,
+    tampered with, or belongs to a different sort order.
+    """
+    if not token:
+        return None
+    try:
+        data = _serializer().loads(token)
+    except BadSignature:
+        return None
+
+    if not isinstance(data, dict) or data.get("s") != sort_by:
+        return None
+    if data.get("d") not in ("next", "prev"):
+        return None
+
+    return data["d"], data.get("k"), int(data.get("p") or 1)
+
+
+def parse_page(value):
+    """A ?page= value as a page number; missing or malformed input is page 1."""
+    try:
+        page = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return min(max(page, 1), MAX_PAGE)
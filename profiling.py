@@ -0,0 +1,309 @@
+# request-level instrumentation (INSTRUMENT=1)
+#
+# - every statement run through the db helpers is timed by a cursor
+#   wrapper (db.set_cursor_wrapper): SQL fingerprint, duration, rows
+# - render_template calls are timed through Flask's template signals
+# - each response carries a Server-Timing header (db / tpl / app), which
+#   browser dev tools show next to the request (a streamed body's queries
+#   run after the headers are sent: they reach the slow log only)
+# - statements slower than SLOW_QUERY_MS and requests slower than
+#   SLOW_REQUEST_MS go to the "stellar.slow" log (stderr or SLOW_LOG_FILE),
+#   a slow request listing its query count and costliest statements
+# - a PROFILE_SAMPLE_RATE fraction of requests (and any admin request with
+#   ?profile=1) is run under cProfile or pyinstrument, dumped to PROFILE_DIR
+#
+# With INSTRUMENT=0 nothing is installed: the db helpers skip the wrapper
+# and no request hooks run.
+import logging
+import os
+import random
+import re
+import time
+from functools import lru_cache
+
+from flask import g, has_request_context, request, session
+from flask.signals import before_render_template, template_rendered
+
+import db
+from config import (
+    INSTRUMENT, SERVER_TIMING, SLOW_QUERY_MS, SLOW_REQUEST_MS, SLOW_LOG_FILE,
+    PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILER,
+)
+
+MAX_QUERIES_KEPT = 500      # per request; the count keeps going past it
+
+slow_log = logging.getLogger("stellar.slow")
+
+
+# -------------------------------------------------
+# SQL FINGERPRINTS
+# -------------------------------------------------
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%s|\?")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """
+    The statement with literals and parameters replaced by `?`, so every
+    run of one query groups together ("... IN (?, ?, ?)" -> "... IN (...)").
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _PARAM_LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+# -------------------------------------------------
+# PER-REQUEST TIMINGS
+# -------------------------------------------------
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_seconds = 0.0
+        self.query_count = 0
+        self.queries = []           # (fingerprint, seconds, rows)
+        self.template_seconds = 0.0
+        self._templates = []        # start times of renders in progress
+        self.profiler = None
+
+    def add_query(self, sql, seconds, rows):
+        self.db_seconds += seconds
+        self.query_count += 1
+        if len(self.queries) < MAX_QUERIES_KEPT:
+            self.queries.append((sql, seconds, rows))
+
+    def slowest(self, n=3):
+        totals = {}
+        for sql, seconds, _ in self.queries:
+            count, total = totals.get(sql, (0, 0.0))
+            totals[sql] = (count + 1, total + seconds)
+        return sorted(totals.items(), key=lambda item: -item[1][1])[:n]
+
+
+def current_timings():
+    """This request's RequestTimings, or None outside a request."""
+    return g.get("_timings") if has_request_context() else None
+
+
+def record_query(sql, seconds, rows):
+    timings = current_timings()
+    if timings is not None:
+        timings.add_query(fingerprint(sql), seconds, rows)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        where = request.endpoint if has_request_context() else "-"
+        slow_log.warning(
+            "slow query %.1f ms rows=%s endpoint=%s: %s",
+            seconds * 1000, rows, where, fingerprint(sql),
+        )
+
+
+# -------------------------------------------------
+# TIMED CURSOR
+# -------------------------------------------------
+class TimedCursor:
+    """
+    Wraps a DB-API cursor. A statement's time covers its execute() and
+    the fetches that follow it (on a server-side cursor the fetches are
+    where the rows are actually read); it is recorded when the next
+    statement starts or the cursor closes.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._sql = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _flush(self):
+        if self._sql is not None:
+            # SELECT rowcount is -1 on SQLite: count what was fetched instead
+            rows = self._fetched if self._fetched is not None else self._rowcount
+            record_query(self._sql, self._seconds, rows)
+            self._sql = None
+
+    def _start(self, sql):
+        self._flush()
+        self._sql, self._seconds, self._rowcount, self._fetched = sql, 0.0, 0, None
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._seconds += time.perf_counter() - started
+
+    def _count(self, rows):
+        if self._sql is not None:
+            self._fetched = (self._fetched or 0) + rows
+
+    def execute(self, sql, args=None):
+        self._start(sql)
+        result = self._timed(self._cursor.execute, sql, args if args is not None else ())
+        self._rowcount = max(self._cursor.rowcount, 0)
+        return result
+
+    def executemany(self, sql, seq_of_args):
+        self._start(sql)
+        result = self._timed(self._cursor.executemany, sql, seq_of_args)
+        self._rowcount = max(self._cursor.rowcount, 0)
+        return result
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        self._count(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(self._cursor.fetchmany, *(() if size is None else (size,)))
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._count(len(rows))
+        return rows
+
+    def close(self):
+        self._flush()
+        self._cursor.close()
+
+
+# -------------------------------------------------
+# TEMPLATES
+# -------------------------------------------------
+def _template_started(sender, template, context, **extra):
+    timings = current_timings()
+    if timings is not None:
+        timings._templates.append(time.perf_counter())
+
+
+def _template_done(sender, template, context, **extra):
+    timings = current_timings()
+    if timings is not None and timings._templates:
+        started = timings._templates.pop()
+        if not timings._templates:      # nested renders count once
+            timings.template_seconds += time.perf_counter() - started
+
+
+# -------------------------------------------------
+# PROFILES
+# -------------------------------------------------
+def _wants_profile():
+    if request.args.get("profile") == "1" and session.get("user_id"):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _start_profiler():
+    try:
+        if PROFILER == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except (ImportError, ValueError) as e:
+        # not installed, or another profiler already runs in this process
+        slow_log.warning("profiler not started: %s", e)
+        return None
+    return profiler
+
+
+def _dump_profile(profiler, elapsed_ms):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = "{}-{}-{:.0f}ms".format(
+        time.strftime("%Y%m%d-%H%M%S"),
+        (request.endpoint or "unknown").replace(".", "_"), elapsed_ms,
+    )
+    if PROFILER == "pyinstrument":
+        profiler.stop()
+        path = os.path.join(PROFILE_DIR, name + ".html")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(profiler.output_html())
+    else:
+        profiler.disable()
+        path = os.path.join(PROFILE_DIR, name + ".prof")
+        profiler.dump_stats(path)        # python -m pstats <file> / snakeviz
+    return path
+
+
+# -------------------------------------------------
+# REQUEST HOOKS
+# -------------------------------------------------
+def _before_request():
+    timings = g._timings = RequestTimings()
+    if _wants_profile():
+        timings.profiler = _start_profiler()
+
+
+def _after_request(response):
+    timings = current_timings()
+    if timings is None:
+        return response
+
+    elapsed_ms = (time.perf_counter() - timings.started) * 1000
+    db_ms = timings.db_seconds * 1000
+    tpl_ms = timings.template_seconds * 1000
+
+    if timings.profiler is not None:
+        path = _dump_profile(timings.profiler, elapsed_ms)
+        timings.profiler = None
+        response.headers["X-Profile"] = os.path.basename(path)
+
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{timings.query_count} queries", '
+            f"tpl;dur={tpl_ms:.1f}, app;dur={elapsed_ms:.1f}"
+        )
+
+    if elapsed_ms >= SLOW_REQUEST_MS:
+        top = "; ".join(
+            f"{count}x {total * 1000:.1f} ms {sql[:120]}"
+            for sql, (count, total) in timings.slowest()
+        )
+        slow_log.warning(
+            "slow request %.1f ms %s %s (db %.1f ms in %d queries, templates %.1f ms) %s",
+            elapsed_ms, request.method, request.full_path.rstrip("?"),
+            db_ms, timings.query_count, tpl_ms, top,
+        )
+    return response
+
+
+def _configure_log():
+    if slow_log.handlers:
+        return
+    handler = logging.FileHandler(SLOW_LOG_FILE) if SLOW_LOG_FILE else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s 🐢 %(message)s"))
+    slow_log.addHandler(handler)
+    slow_log.setLevel(logging.WARNING)
+    slow_log.propagate = False
+
+
+def init_app(app, enabled=INSTRUMENT):
+    """Installs the cursor wrapper and request hooks when instrumentation is on."""
+    if not enabled:
+        return
+    _configure_log()
+    db.set_cursor_wrapper(TimedCursor)
+    # registered first: the total covers every other hook
+    app.before_request_funcs.setdefault(None, []).insert(0, _before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_done, app)
+    print(f"⏱  Instrumentation on (slow query ≥ {SLOW_QUERY_MS:g} ms, "
+          f"slow request ≥ {SLOW_REQUEST_MS:g} ms)")
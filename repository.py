@@ -0,0 +1,687 @@
+# single data-access layer used by every blueprint
+# (all SQL here is dialect-neutral, see db.py)
+import json
+import math
+from collections import Counter
+
+import db
+import facets as facet_rules
+import search as search_index
+from cache import results, bump_generation
+from images import build_srcsets
+from specs import derive_specs
+from config import CARS_COUNT_MODE, CARS_COUNT_TTL, CARS_COUNT_CAP
+
+
+CAR_FIELDS = (
+    "title", "description", "price", "category", "mileage", "body_condition",
+    "fuel_efficiency", "engine_performance", "seller_id", "main_image",
+    # numeric copies of mileage / fuel_efficiency / the title's year (specs.py)
+    "mileage_km", "fuel_km_per_l", "year",
+)
+
+SELLER_FIELDS = ("name", "contact_email", "phone", "address", "about", "photo")
+
+CAR_SORTS = {
+    "price": "cars.price ASC",
+    "price_desc": "cars.price DESC",
+    "title": "cars.title ASC",
+}
+DEFAULT_CAR_SORT = "cars.id DESC"
+
+# keyset orderings: sort_by -> (columns, direction)
+# the last column is always the unique id so every row has a distinct key
+CAR_KEYSETS = {
+    "newest": (("id",), "DESC"),
+    "price": (("price", "id"), "ASC"),
+    "price_desc": (("price", "id"), "DESC"),
+    "title": (("title", "id"), "ASC"),
+}
+
+
+# numeric filters: query arg -> (column, operator, type)
+# every column is indexed (price via idx_cars_price_id, see migrations)
+RANGE_FILTERS = {
+    "min_price": ("cars.price", ">=", int),
+    "max_price": ("cars.price", "<=", int),
+    "min_mileage": ("cars.mileage_km", ">=", int),
+    "max_mileage": ("cars.mileage_km", "<=", int),
+    "min_year": ("cars.year", ">=", int),
+    "max_year": ("cars.year", "<=", int),
+    "seller_id": ("cars.seller_id", "=", int),
+}
+# what a BIGINT / SQLite INTEGER parameter can hold
+RANGE_LIMIT = 2 ** 63 - 1
+
+
+def _columns(fields, data):
+    """Picks the known columns out of `data` (in a stable order)."""
+    cols = [f for f in fields if f in data]
+    return cols, [data[c] for c in cols]
+
+
+# =========================================================
+# CARS
+# =========================================================
+def parse_ranges(args):
+    """
+    Valid range filters from a query-string mapping, as a sorted tuple of
+    (name, value) pairs (hashable, so it can be part of a cache key).
+    Empty, malformed, infinite or out-of-range values are ignored.
+    """
+    ranges = []
+    for name, (_, _, cast) in RANGE_FILTERS.items():
+        raw = (args.get(name) or "").strip().replace(",", "")
+        if not raw:
+            continue
+        try:
+            value = float(raw)
+        except ValueError:
+            continue
+        if not math.isfinite(value) or abs(value) > RANGE_LIMIT:
+            continue
+        try:
+            ranges.append((name, cast(value)))
+        except (ValueError, OverflowError):
+            continue
+    return tuple(sorted(ranges))
+
+
+def _car_filters(search="", category="", ranges=()):
+    """Returns (from_sql, where_sql, params, CarSearch-or-None)."""
+    from_sql = " FROM cars"
+    where = " WHERE 1=1"
+    params = []
+
+    match = search_index.build(search)
+    if match:
+        from_sql += match.join
+        where += " AND " + match.where
+        params.extend(match.params)
+
+    if category:
+        where += " AND cars.category = %s"
+        params.append(category)
+
+    for name, value in ranges:
+        column, op, _ = RANGE_FILTERS[name]
+        where += f" AND {column} {op} %s"
+        params.append(value)
+
+    return from_sql, where, params, match
+
+
+# listing rows carry their seller's name and photo (one LEFT JOIN, no N+1)
+LISTING_SELECT = (
+    "SELECT cars.*, sellers.name AS seller_name, sellers.photo AS seller_photo"
+)
+SELLER_JOIN = " LEFT JOIN sellers ON sellers.id = cars.seller_id"
+
+
+def _listing_sql(search, category, sort_by, limit, offset, ranges):
+    from_sql, where, params, match = _car_filters(search, category, ranges)
+    sql = LISTING_SELECT + from_sql + SELLER_JOIN + where
+
+    if sort_by == "relevance" and match:
+        sql += f" ORDER BY {match.rank}, cars.id DESC"
+        params.extend(match.rank_params)
+    else:
+        sql += " ORDER BY " + CAR_SORTS.get(sort_by, DEFAULT_CAR_SORT)
+
+    if limit is not None:
+        sql += " LIMIT %s OFFSET %s"
+        params.extend([limit, offset])
+
+    return sql, params
+
+
+def list_cars(search="", category="", sort_by="newest", limit=None, offset=0,
+              ranges=()):
+    """
+    Lists cars matching the filters.
+    `sort_by="relevance"` orders full-text matches best-first
+    (and falls back to newest when there is no search).
+    """
+    return db.query(*_listing_sql(search, category, sort_by, limit, offset, ranges))
+
+
+def stream_cars(search="", category="", sort_by="newest", ranges=()):
+    """Same rows and order as `list_cars`, yielded one at a time (db.stream)."""
+    return db.stream(*_listing_sql(search, category, sort_by, None, 0, ranges))
+
+
+def keyset_sort(sort_by):
+    """Maps any sort_by value onto one of the seekable orderings."""
+    return sort_by if sort_by in CAR_KEYSETS else "newest"
+
+
+def car_sort_key(car, sort_by):
+    """Values of the keyset columns for one row (what a cursor stores)."""
+    return [car[col] for col in CAR_KEYSETS[sort_by][0]]
+
+
+def list_cars_seek(search="", category="", sort_by="newest",
+                   after=None, before=None, limit=6, ranges=()):
+    """
+    Keyset page: the `limit` rows right after (or right before) a boundary key.
+    Costs the same on page 1 and page 10,000, because it seeks with
+    `(price, id) > (%s, %s)` instead of skipping rows with OFFSET.
+
+    Returns (rows in display order, has_more) where `has_more` tells
+    whether more rows exist further in the direction of travel.
+    """
+    cols, direction = CAR_KEYSETS[sort_by]
+    from_sql, where, params, _ = _car_filters(search, category, ranges)
+
+    backwards = before is not None
+    key = before if backwards else after
+
+    order = direction
+    if backwards:
+        order = "ASC" if direction == "DESC" else "DESC"
+
+    if key is not None:
+        op = ">" if order == "ASC" else "<"
+        lhs = ", ".join(f"cars.{col}" for col in cols)
+        rhs = ", ".join(["%s"] * len(cols))
+        where += f" AND ({lhs}) {op} ({rhs})"
+        params.extend(key)
+
+    sql = LISTING_SELECT + from_sql + SELLER_JOIN + where
+    sql += " ORDER BY " + ", ".join(f"cars.{col} {order}" for col in cols)
+    sql += " LIMIT %s"
+    params.append(limit + 1)
+
+    rows = db.query(sql, params)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+    return rows, has_more
+
+
+def count_cars(search="", category="", ranges=()):
+    from_sql, where, params, _ = _car_filters(search, category, ranges)
+    return db.query_one("SELECT COUNT(*) AS count" + from_sql + where, params)["count"]
+
+
+def estimate_cars(search="", category="", ranges=()):
+    """
+    Cheap approximate count, returned as (count, is_exact).
+    - Postgres: the planner's row estimate (no rows are read)
+    - SQLite:   an exact count that stops at CARS_COUNT_CAP rows
+    """
+    from_sql, where, params, _ = _car_filters(search, category, ranges)
+
+    if db.DIALECT == "postgres":
+        row = db.query_one(
+            "EXPLAIN (FORMAT JSON) SELECT 1" + from_sql + where, params
+        )
+        plan = row["QUERY PLAN"][0]["Plan"]
+        return int(plan["Plan Rows"]), False
+
+    count = db.query_one(
+        "SELECT COUNT(*) AS count FROM (SELECT 1" + from_sql + where
+        + " LIMIT %s) AS capped",
+        params + [CARS_COUNT_CAP],
+    )["count"]
+    return count, count < CARS_COUNT_CAP
+
+
+def total_cars(search="", category="", mode=None, ranges=()):
+    """
+    Total for the pagination label, as (count, is_exact).
+    `mode` (default CARS_COUNT_MODE):
+    - "exact"   : COUNT(*) on every call
+    - "cached"  : COUNT(*) cached per filter (until TTL or the next write)
+    - "estimate": see `estimate_cars`
+    - "none"    : skip counting, returns (None, False)
+    """
+    mode = mode or CARS_COUNT_MODE
+
+    if mode == "none":
+        return None, False
+    if mode == "estimate":
+        return estimate_cars(search, category, ranges)
+    if mode != "cached":
+        return count_cars(search, category, ranges), True
+
+    count = results.get_or_set(
+        ("count_cars", search, category, ranges),
+        lambda: count_cars(search, category, ranges),
+        ttl=CARS_COUNT_TTL,
+    )
+    return count, True
+
+
+def list_categories():
+    def load():
+        rows = db.query(
+            "SELECT DISTINCT category FROM cars "
+            "WHERE category IS NOT NULL ORDER BY category"
+        )
+        return [row["category"] for row in rows]
+
+    return results.get_or_set(("categories",), load)
+
+
+# =========================================================
+# FACETS (counts per category / price band / seller / mileage band)
+# =========================================================
+def _facet_row(car_id):
+    return db.query_one(
+        "SELECT category, price, seller_id, mileage_km FROM cars WHERE id = %s",
+        (car_id,),
+    )
+
+
+FACET_UPSERT = (
+    "INSERT INTO car_facets (facet, value, count) VALUES (%s, %s, %s) "
+    "ON CONFLICT (facet, value) "
+    "DO UPDATE SET count = car_facets.count + excluded.count"
+)
+
+
+def _adjust_facets(car, delta, skip=()):
+    """Adds `delta` to the car_facets buckets `car` counts towards."""
+    if not car:
+        return
+    pairs = [pair for pair in facet_rules.buckets(car) if pair not in skip]
+    if pairs:
+        db.executemany(FACET_UPSERT, [(facet, value, delta) for facet, value in pairs])
+
+
+def _add_facet_counts(cars):
+    """One upsert per bucket for a whole batch of new cars."""
+    totals = Counter()
+    for car in cars:
+        totals.update(facet_rules.buckets(car))
+    if totals:
+        db.executemany(
+            FACET_UPSERT, [(facet, value, n) for (facet, value), n in totals.items()]
+        )
+
+
+def _move_facets(before, after):
+    """Moves an edited car between buckets (unchanged buckets are skipped)."""
+    old = set(facet_rules.buckets(before)) if before else set()
+    new = set(facet_rules.buckets(after)) if after else set()
+    _adjust_facets(before, -1, skip=new)
+    _adjust_facets(after, +1, skip=old)
+
+
+def _facet_query(search, category, ranges):
+    """
+    One UNION ALL over the facets; each branch applies every filter except
+    its own, so the other options of an active facet keep their counts.
+    """
+    branches, params = [], []
+    for facet in facet_rules.FACETS:
+        own = facet_rules.FACET_COLUMNS[facet][1]
+        from_sql, where, branch_params, _ = _car_filters(
+            search,
+            "" if "category" in own else category,
+            tuple(r for r in ranges if r[0] not in own),
+        )
+        value = facet_rules.value_sql(facet)
+        branches.append(
+            f"SELECT '{facet}' AS facet, {value} AS value, COUNT(*) AS count"
+            + from_sql + where + f" GROUP BY {value}"
+        )
+        params.extend(branch_params)
+    return " UNION ALL ".join(branches), params
+
+
+def facet_counts(search="", category="", ranges=()):
+    """
+    {facet: [{"value", "label", "count", "args"}, ...]} for the current filters.
+    Unfiltered: the car_facets aggregate table. Filtered: one grouped
+    query. Both are cached until the next catalogue write.
+    """
+    def load():
+        if search or category or ranges:
+            source, params = _facet_query(search, category, ranges)
+        else:
+            source, params = "SELECT facet, value, count FROM car_facets", []
+
+        rows = db.query(
+            "SELECT f.facet, f.value, f.count, sellers.name AS seller_name "
+            f"FROM ({source}) AS f "
+            "LEFT JOIN sellers ON f.facet = 'seller' "
+            "AND f.value = CAST(sellers.id AS TEXT)",
+            params,
+        )
+        return facet_rules.assemble(rows)
+
+    return results.get_or_set(("facets", search, category, ranges), load)
+
+
+def suggestion_sources():
+    """(cars, sellers) rows the autocomplete index is built from."""
+    cars = db.query("SELECT id, title, category FROM cars ORDER BY id")
+    sellers = db.query("SELECT id, name FROM sellers ORDER BY id")
+    return cars, sellers
+
+
+def get_car(car_id):
+    return db.query_one("SELECT * FROM cars WHERE id = %s", (car_id,))
+
+
+def _images_json():
+    """Correlated subquery: the car's photos as a JSON array, ordered by id."""
+    if db.DIALECT == "postgres":
+        return (
+            "(SELECT COALESCE(json_agg(json_build_object("
+            "'id', ci.id, 'image_path', ci.image_path) ORDER BY ci.id), '[]'::json) "
+            "FROM car_images ci WHERE ci.car_id = cars.id)"
+        )
+    return (
+        "(SELECT json_group_array(json_object('id', ci.id, 'image_path', ci.image_path)) "
+        "FROM (SELECT id, image_path FROM car_images "
+        "WHERE car_id = cars.id ORDER BY id) ci)"
+    )
+
+
+def load_cars(car_ids):
+    """
+    Loads several cars with their seller and photos in one query.
+    Each car gets `seller` (dict or None) and `images` (list of
+    {"id", "image_path"} in upload order). Returned in `car_ids` order;
+    unknown ids are skipped.
+    """
+    car_ids = [int(i) for i in car_ids]
+    if not car_ids:
+        return []
+
+    seller_cols = ", ".join(f"sellers.{f} AS seller__{f}" for f in ("id",) + SELLER_FIELDS)
+    rows = db.query(
+        f"SELECT cars.*, {seller_cols}, {_images_json()} AS images_json "
+        "FROM cars" + SELLER_JOIN + " "
+        f"WHERE cars.id IN ({', '.join(['%s'] * len(car_ids))})",
+        car_ids,
+    )
+
+    by_id = {}
+    for row in rows:
+        seller = {
+            key[len("seller__"):]: row.pop(key)
+            for key in list(row) if key.startswith("seller__")
+        }
+        images = row.pop("images_json")
+        # psycopg2 decodes json itself; sqlite hands back the text
+        if isinstance(images, str):
+            images = json.loads(images)
+        row["seller"] = seller if seller["id"] is not None else None
+        row["images"] = images or []
+        by_id[row["id"]] = row
+
+    return [by_id[i] for i in car_ids if i in by_id]
+
+
+def load_car(car_id):
+    """One car with `seller` and `images` (see load_cars), or None."""
+    found = load_cars([car_id])
+    return found[0] if found else None
+
+
+def _clean_car(data):
+    data = dict(data)
+    if "price" in data and data["price"] is None:
+        # keyset pagination compares (price, id): NULL would hide the car
+        data["price"] = 0
+    # numeric mileage / fuel / year follow their text fields on every write
+    for col, value in derive_specs(data).items():
+        data.setdefault(col, value)
+    return data
+
+
+def create_car(data, images=()):
+    """Inserts a car (plus its extra photos) and returns the new id."""
+    cols, values = _columns(CAR_FIELDS, _clean_car(data))
+    with db.transaction():
+        car_id = db.insert(
+            f"INSERT INTO cars ({', '.join(cols)}) "
+            f"VALUES ({', '.join(['%s'] * len(cols))})",
+            values,
+        )
+        retain_blobs([data.get("main_image")])
+        add_car_images(car_id, images)
+        _adjust_facets(_facet_row(car_id), +1)
+        bump_generation()
+    return car_id
+
+
+def import_cars(batch):
+    """
+    Inserts a batch of cars with their extra photos in one transaction.
+    `batch` is a list of (car dict, [photo urls]); returns the new ids.
+    Facets, blob refcounts and the catalogue generation are updated once
+    for the whole batch.
+    """
+    cars = [_clean_car(car) for car, _ in batch]
+    cols = [f for f in CAR_FIELDS if any(f in car for car in cars)]
+    with db.transaction():
+        ids = db.insert_many("cars", cols, [[car.get(c) for c in cols] for car in cars])
+        photos = [
+            (car_id, url) for car_id, (_, urls) in zip(ids, batch) for url in urls
+        ]
+        if photos:
+            db.executemany(
+                "INSERT INTO car_images (car_id, image_path) VALUES (%s, %s)", photos
+            )
+        retain_blobs([car.get("main_image") for car in cars] + [url for _, url in photos])
+        _add_facet_counts(cars)
+        bump_generation()
+    return ids
+
+
+def update_car(car_id, data, images=()):
+    """Updates the given columns of a car and appends any new photos."""
+    cols, values = _columns(CAR_FIELDS, _clean_car(data))
+    with db.transaction():
+        before = _facet_row(car_id)
+        if "main_image" in data:
+            old = db.query_one("SELECT main_image FROM cars WHERE id = %s", (car_id,))
+            release_blobs([old and old["main_image"]])
+            retain_blobs([data["main_image"]])
+        assignments = [c + " = %s" for c in cols] + ["revision = revision + 1"]
+        db.execute(
+            f"UPDATE cars SET {', '.join(assignments)} WHERE id = %s",
+            values + [car_id],
+        )
+        add_car_images(car_id, images)
+        _move_facets(before, _facet_row(car_id))
+        bump_generation()
+
+
+def delete_car(car_id):
+    with db.transaction():
+        car = db.query_one("SELECT main_image FROM cars WHERE id = %s", (car_id,))
+        images = list_car_images(car_id)
+        release_blobs([car and car["main_image"]] + [i["image_path"] for i in images])
+
+        db.execute("DELETE FROM car_images WHERE car_id = %s", (car_id,))
+        _adjust_facets(_facet_row(car_id), -1)
+        db.execute("DELETE FROM cars WHERE id = %s", (car_id,))
+        bump_generation()
+
+
+# =========================================================
+# CAR IMAGES
+# =========================================================
+def list_car_images(car_id):
+    return db.query(
+        "SELECT * FROM car_images WHERE car_id = %s ORDER BY id", (car_id,)
+    )
+
+
+def add_car_images(car_id, paths):
+    paths = list(paths or ())
+    if paths:
+        db.executemany(
+            "INSERT INTO car_images (car_id, image_path) VALUES (%s, %s)",
+            [(car_id, path) for path in paths],
+        )
+        retain_blobs(paths)
+
+
+def delete_car_image(image_id):
+    with db.transaction():
+        image = db.query_one("SELECT image_path FROM car_images WHERE id = %s", (image_id,))
+        release_blobs([image and image["image_path"]])
+        db.execute("DELETE FROM car_images WHERE id = %s", (image_id,))
+        bump_generation()
+
+
+# =========================================================
+# BLOBS (content-addressed uploads, see storage.py)
+# =========================================================
+def get_blob(digest):
+    return db.query_one("SELECT * FROM blobs WHERE digest = %s", (digest,))
+
+
+def register_blob(digest, url, ext, size):
+    db.execute(
+        "INSERT INTO blobs (digest, url, ext, size) VALUES (%s, %s, %s, %s) "
+        "ON CONFLICT (digest) DO NOTHING",
+        (digest, url, ext, size),
+    )
+
+
+def _adjust_refcounts(urls, delta):
+    # URLs that are not blobs (defaults, legacy uploads) match no row
+    urls = [url for url in urls if url]
+    if urls:
+        db.executemany(
+            "UPDATE blobs SET refcount = refcount + %s WHERE url = %s",
+            [(delta, url) for url in urls],
+        )
+
+
+def retain_blobs(urls):
+    _adjust_refcounts(urls, 1)
+
+
+def release_blobs(urls):
+    _adjust_refcounts(urls, -1)
+
+
+def list_unreferenced_blobs():
+    return db.query("SELECT * FROM blobs WHERE refcount <= 0 ORDER BY created_at")
+
+
+def delete_blob(digest):
+    """Drops an unreferenced blob's rows; returns False if it gained a reference."""
+    with db.transaction():
+        blob = get_blob(digest)
+        if not blob or blob["refcount"] > 0:
+            return False
+        db.execute("DELETE FROM image_variants WHERE image_path = %s", (blob["url"],))
+        db.execute("DELETE FROM blobs WHERE digest = %s", (digest,))
+        return True
+
+
+# =========================================================
+# IMAGE VARIANTS (responsive derivatives of an uploaded photo)
+# =========================================================
+def list_image_variants(image_path):
+    return db.query(
+        "SELECT * FROM image_variants WHERE image_path = %s ORDER BY width",
+        (image_path,),
+    )
+
+
+def record_image_variants(image_path, variants):
+    with db.transaction():
+        db.execute("DELETE FROM image_variants WHERE image_path = %s", (image_path,))
+        if variants:
+            db.executemany(
+                "INSERT INTO image_variants "
+                "(image_path, label, width, height, format, variant_path) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                [
+                    (image_path, v["label"], v["width"], v["height"],
+                     v["format"], v["variant_path"])
+                    for v in variants
+                ],
+            )
+        # the cover's srcset is part of the cached car cards
+        db.execute(
+            "UPDATE cars SET revision = revision + 1 WHERE main_image = %s",
+            (image_path,),
+        )
+        bump_generation()
+
+
+def list_images_without_variants():
+    """Every image URL referenced by a car, car photo or seller with no variants yet."""
+    rows = db.query("""
+        SELECT url FROM (
+            SELECT main_image AS url FROM cars
+            UNION SELECT image_path FROM car_images
+            UNION SELECT photo FROM sellers
+        ) AS refs
+        WHERE url IS NOT NULL
+          AND url NOT IN (SELECT image_path FROM image_variants)
+        ORDER BY url
+    """)
+    return [row["url"] for row in rows]
+
+
+def attach_image_variants(rows, field):
+    """
+    Adds `<field>_srcset` ({"avif": …, "webp": …, "original": …}) to each row,
+    looking up the variants of every row's `field` image in one query.
+    """
+    paths = sorted({row[field] for row in rows if row.get(field)})
+    found = {}
+    if paths:
+        placeholders = ", ".join(["%s"] * len(paths))
+        for v in db.query(
+            "SELECT * FROM image_variants WHERE image_path IN (" + placeholders + ")",
+            paths,
+        ):
+            found.setdefault(v["image_path"], []).append(v)
+
+    for row in rows:
+        row[field + "_srcset"] = build_srcsets(found.get(row.get(field), []))
+    return rows
+
+
+# =========================================================
+# SELLERS
+# =========================================================
+def list_sellers(order_by="name"):
+    order = "id DESC" if order_by == "newest" else "name ASC"
+    return db.query("SELECT * FROM sellers ORDER BY " + order)
+
+
+def get_seller(seller_id):
+    return db.query_one("SELECT * FROM sellers WHERE id = %s", (seller_id,))
+
+
+def create_seller(data):
+    cols, values = _columns(SELLER_FIELDS, data)
+    with db.transaction():
+        seller_id = db.insert(
+            f"INSERT INTO sellers ({', '.join(cols)}) "
+            f"VALUES ({', '.join(['%s'] * len(cols))})",
+            values,
+        )
+        retain_blobs([data.get("photo")])
+        bump_generation()
+    return seller_id
+
+
+# =========================================================
+# USERS
+# =========================================================
+def get_user_by_username(username):
+    return db.query_one("SELECT * FROM users WHERE username = %s", (username,))
+
+
+def create_user(username, password_hash):
+    return db.insert(
+        "INSERT INTO users (username, password) VALUES (%s, %s)",
+        (username, password_hash),
+    )
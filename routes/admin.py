@@ -1,12 +1,12 @@
+from datetime import date
+
 from flask import (
-    Blueprint, render_template, request, redirect,
-    url_for, flash, session
+    Blueprint, Response, abort, render_template, request, redirect,
+    stream_with_context, url_for, flash, session
 )
-from werkzeug.utils import secure_filename
-from psycopg2.extras import RealDictCursor
-import os
-
-from db import get_db_connection
+import repository
+from fragments import invalidate
+from suggest import suggester
 from utils import handle_upload, handle_multi_upload
 
 
@@ -22,12 +22,7 @@ def dashboard():
         flash("Please log in to access admin.", "warning")
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT * FROM cars ORDER BY id DESC")
-    cars = cur.fetchall()
-    cur.close()
-    conn.close()
+    cars = repository.list_cars()
 
     return render_template(
         "admin.html",
@@ -71,19 +66,15 @@ def add_seller():
         "/static/images/default_seller.jpg"
     )
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO sellers
-            (name, contact_email, phone, address, about, photo)
-        VALUES (%s, %s, %s, %s, %s, %s)
-        """,
-        (name, email, phone, address, about, photo)
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    seller_id = repository.create_seller({
+        "name": name,
+        "contact_email": email,
+        "phone": phone,
+        "address": address,
+        "about": about,
+        "photo": photo,
+    })
+    suggester.seller_saved(seller_id)
 
     flash("Seller added successfully!", "success")
     return redirect(url_for("admin.sellers"))
@@ -98,12 +89,7 @@ def sellers():
         flash("Login required.", "warning")
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT * FROM sellers ORDER BY id DESC")
-    sellers = cur.fetchall()
-    cur.close()
-    conn.close()
+    sellers = repository.list_sellers(order_by="newest")
 
     return render_template("admin_sellers.html", sellers=sellers)
 
@@ -117,12 +103,7 @@ def add_car_page():
         flash("Login required.", "warning")
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT id, name FROM sellers ORDER BY name ASC")
-    sellers = cur.fetchall()
-    cur.close()
-    conn.close()
+    sellers = repository.list_sellers()
 
     return render_template("add_car.html", sellers=sellers)
 
@@ -147,7 +128,7 @@ def add_car():
     body_condition = form.get("body_condition")
     fuel_efficiency = form.get("fuel_efficiency")
     engine_performance = form.get("engine_performance")
-    seller_id = form.get("seller_id")
+    seller_id = form.get("seller_id") or None
 
     main_image = handle_upload(
         files.get("main_image"),
@@ -156,32 +137,19 @@ def add_car():
 
     images = handle_multi_upload(files.getlist("images"))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        INSERT INTO cars (
-            title, description, price, category, mileage, body_condition,
-            fuel_efficiency, engine_performance, seller_id, main_image
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING id
-    """, (
-        title, description, price, category, mileage, body_condition,
-        fuel_efficiency, engine_performance, seller_id, main_image
-    ))
-
-    car_id = cur.fetchone()[0]
-
-    if images:
-        cur.executemany("""
-            INSERT INTO car_images (car_id, image_path)
-            VALUES (%s, %s)
-        """, [(car_id, img) for img in images])
-
-    conn.commit()
-    cur.close()
-    conn.close()
+    car_id = repository.create_car({
+        "title": title,
+        "description": description,
+        "price": price,
+        "category": category,
+        "mileage": mileage,
+        "body_condition": body_condition,
+        "fuel_efficiency": fuel_efficiency,
+        "engine_performance": engine_performance,
+        "seller_id": seller_id,
+        "main_image": main_image,
+    }, images=images)
+    suggester.car_saved(car_id)
 
     flash("Car uploaded successfully!", "success")
     return redirect(url_for("admin.dashboard"))
@@ -196,13 +164,9 @@ def delete_car(car_id):
         flash("Login required.", "warning")
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM car_images WHERE car_id=%s", (car_id,))
-    cur.execute("DELETE FROM cars WHERE id=%s", (car_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
+    repository.delete_car(car_id)
+    invalidate("car", car_id)
+    suggester.car_deleted(car_id)
 
     flash("Car deleted.", "info")
     return redirect(url_for("admin.dashboard"))
@@ -217,26 +181,18 @@ def edit_car(car_id):
         flash("Login required.", "warning")
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
-    cur.execute("SELECT * FROM cars WHERE id=%s", (car_id,))
-    car = cur.fetchone()
+    car = repository.load_car(car_id)
+    if not car:
+        flash("Car not found.", "error")
+        return redirect(url_for("admin.dashboard"))
 
-    cur.execute("SELECT id, name FROM sellers ORDER BY name ASC")
-    sellers = cur.fetchall()
-
-    cur.execute("SELECT * FROM car_images WHERE car_id=%s", (car_id,))
-    images = cur.fetchall()
-
-    cur.close()
-    conn.close()
+    sellers = repository.list_sellers()
 
     return render_template(
         "edit_car.html",
         car=car,
         sellers=sellers,
-        images=images
+        images=car["images"]
     )
 
 
@@ -260,52 +216,33 @@ def update_car(car_id):
     body_condition = form.get("body_condition")
     fuel_efficiency = form.get("fuel_efficiency")
     engine_performance = form.get("engine_performance")
-    seller_id = form.get("seller_id")
+    seller_id = form.get("seller_id") or None
 
     new_main_image = handle_upload(
         files.get("main_image"),
         None  # keep existing if no new file
     )
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-
+    fields = {
+        "title": title,
+        "description": description,
+        "price": price,
+        "category": category,
+        "mileage": mileage,
+        "body_condition": body_condition,
+        "fuel_efficiency": fuel_efficiency,
+        "engine_performance": engine_performance,
+        "seller_id": seller_id,
+    }
     if new_main_image:
-        cur.execute("""
-            UPDATE cars SET
-                title=%s, description=%s, price=%s, category=%s,
-                mileage=%s, body_condition=%s, fuel_efficiency=%s,
-                engine_performance=%s, seller_id=%s, main_image=%s
-            WHERE id=%s
-        """, (
-            title, description, price, category, mileage, body_condition,
-            fuel_efficiency, engine_performance, seller_id,
-            new_main_image, car_id
-        ))
-    else:
-        cur.execute("""
-            UPDATE cars SET
-                title=%s, description=%s, price=%s, category=%s,
-                mileage=%s, body_condition=%s, fuel_efficiency=%s,
-                engine_performance=%s, seller_id=%s
-            WHERE id=%s
-        """, (
-            title, description, price, category, mileage, body_condition,
-            fuel_efficiency, engine_performance, seller_id,
-            car_id
-        ))
+        fields["main_image"] = new_main_image
 
     # New extra photos
     new_images = handle_multi_upload(files.getlist("images"))
-    if new_images:
-        cur.executemany("""
-            INSERT INTO car_images (car_id, image_path)
-            VALUES (%s, %s)
-        """, [(car_id, img) for img in new_images])
 
-    conn.commit()
-    cur.close()
-    conn.close()
+    repository.update_car(car_id, fields, images=new_images)
+    invalidate("car", car_id)
+    suggester.car_saved(car_id)
 
     flash("Car updated successfully!", "success")
     return redirect(url_for("admin.dashboard"))
@@ -320,13 +257,72 @@ def delete_car_image(image_id, car_id):
         flash("Login required.", "warning")
         return redirect(url_for("auth.login"))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM car_images WHERE id=%s", (image_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
+    repository.delete_car_image(image_id)
 
     flash("Image removed.", "info")
     return redirect(url_for("admin.edit_car", car_id=car_id))
 
+
+# ------------------------------------------------------------
+# BULK IMPORT (CSV / NDJSON / JSON + optional photo zip)
+# ------------------------------------------------------------
+@admin_bp.route("/import", methods=["GET", "POST"])
+def import_cars():
+    if not session.get("user_id"):
+        flash("Login required.", "warning")
+        return redirect(url_for("auth.login"))
+
+    if request.method == "GET":
+        return render_template("admin_import.html", report=None)
+
+    source = request.files.get("source")
+    if not source or not source.filename:
+        flash("Choose a CSV or JSON file to import.", "warning")
+        return redirect(url_for("admin.import_cars"))
+
+    photos = request.files.get("images")
+    dry_run = bool(request.form.get("dry_run"))
+    import importer
+
+    report = importer.run_import(
+        source.stream, source.filename,
+        images_zip=photos.stream if photos and photos.filename else None,
+        dry_run=dry_run,
+    )
+    if report["inserted"]:
+        suggester.rebuild()
+
+    flash(
+        f"{'Checked' if dry_run else 'Imported'} {report['rows'] - report['failed']} of "
+        f"{report['rows']} row(s).",
+        "success" if not report["failed"] else "warning",
+    )
+    return render_template("admin_import.html", report=report, dry_run=dry_run)
+
+
+# ------------------------------------------------------------
+# EXPORT (streamed CSV / NDJSON)
+# ------------------------------------------------------------
+@admin_bp.route("/export/<table>")
+def export(table):
+    if not session.get("user_id"):
+        flash("Login required.", "warning")
+        return redirect(url_for("auth.login"))
+
+    import exporter
+
+    fmt = request.args.get("format", "csv")
+    if table not in exporter.EXPORTS or fmt not in exporter.FORMATS:
+        abort(404)
+
+    filename = f"stellarmotors-{table}-{date.today():%Y%m%d}.{fmt}"
+    return Response(
+        stream_with_context(exporter.export(table, fmt)),
+        mimetype=exporter.FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            # let proxies pass the first rows on instead of buffering the file
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,145 @@
+import json
+from datetime import date, datetime
+from urllib.parse import urljoin
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context, url_for
+
+import repository
+from cache import results
+from http_cache import conditional
+from pagination import encode_cursor, decode_cursor
+from suggest import suggester
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# ?fields= choices; `url` is the car's page, image paths come back absolute
+CAR_FIELDS = (
+    "id", "title", "description", "price", "category", "year",
+    "mileage", "mileage_km", "fuel_efficiency", "fuel_km_per_l",
+    "body_condition", "engine_performance", "seller_id", "seller_name",
+    "main_image", "date_added", "url",
+)
+DEFAULT_FIELDS = (
+    "id", "title", "price", "category", "year", "mileage_km",
+    "seller_name", "main_image", "url",
+)
+
+
+def _fields():
+    """Requested fields (unknown names ignored), or the defaults."""
+    wanted = [f.strip() for f in request.args.get("fields", "").split(",")]
+    wanted = [f for f in wanted if f in CAR_FIELDS]
+    return wanted or list(DEFAULT_FIELDS)
+
+
+def _plain(value):
+    # Postgres hands back datetimes, SQLite ISO strings already
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _car_json(car, fields):
+    data = {}
+    for field in fields:
+        if field == "url":
+            data["url"] = url_for("main.car_detail", car_id=car["id"], _external=True)
+        elif field == "main_image":
+            path = car.get("main_image")
+            data["main_image"] = urljoin(request.host_url, path) if path else None
+        else:
+            data[field] = _plain(car.get(field))
+    return data
+
+
+# =========================================================
+# AUTOCOMPLETE (answered from memory, see suggest.py)
+# =========================================================
+@api_bp.route("/suggest")
+def suggest():
+    query = request.args.get("q", "").strip()[:100]
+
+    response = jsonify(query=query, suggestions=suggester.suggest(query) if query else [])
+    # keystrokes repeat a lot; a short shared cache absorbs them
+    response.headers["Cache-Control"] = "public, max-age=30"
+    return response
+
+
+# =========================================================
+# CATALOGUE (same filters and sorts as /cars)
+# =========================================================
+@api_bp.route("/cars")
+@conditional
+def cars():
+    """
+    JSON page of cars: {"data": [...], "next_cursor": ...}.
+    ?format=ndjson streams every matching car instead, one JSON object
+    per line (a query parameter, not Accept, so each has its own ETag).
+    """
+    search = request.args.get("search", "").strip()
+    category = request.args.get("category", "").strip()
+    ranges = repository.parse_ranges(request.args)
+    sort_by = request.args.get("sort_by") or ("relevance" if search else "newest")
+    if not (sort_by == "relevance" and search):
+        sort_by = repository.keyset_sort(sort_by)
+    fields = _fields()
+
+    if request.args.get("format") == "ndjson":
+        return _stream_cars(search, category, sort_by, ranges, fields)
+
+    try:
+        limit = min(max(int(request.args.get("limit", PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = PAGE_SIZE
+    token = request.args.get("cursor") or ""
+
+    rows, next_cursor = results.get_or_set(
+        ("api_cars", search, category, ranges, sort_by, token, limit),
+        lambda: _cars_page(search, category, ranges, sort_by, token, limit),
+    )
+    return jsonify(
+        data=[_car_json(car, fields) for car in rows],
+        next_cursor=next_cursor,
+    )
+
+
+def _cars_page(search, category, ranges, sort_by, token, limit):
+    """(rows, next cursor) for one page; relevance pages by offset."""
+    cursor = decode_cursor(token, sort_by)
+    key = cursor[1] if cursor and cursor[0] == "next" else None
+
+    if sort_by == "relevance":
+        offset = key["offset"] if isinstance(key, dict) else 0
+        rows = repository.list_cars(
+            search=search, category=category, sort_by="relevance",
+            limit=limit + 1, offset=offset, ranges=ranges,
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_key = {"offset": offset + limit}
+    else:
+        rows, has_more = repository.list_cars_seek(
+            search=search, category=category, sort_by=sort_by,
+            after=key, limit=limit, ranges=ranges,
+        )
+        next_key = repository.car_sort_key(rows[-1], sort_by) if rows else None
+
+    next_cursor = None
+    if rows and has_more:
+        next_cursor = encode_cursor(sort_by, "next", next_key, 0)
+    return rows, next_cursor
+
+
+def _stream_cars(search, category, sort_by, ranges, fields):
+    rows = repository.stream_cars(
+        search=search, category=category, sort_by=sort_by, ranges=ranges
+    )
+
+    def generate():
+        for car in rows:
+            yield json.dumps(_car_json(car, fields), separators=(",", ":")) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
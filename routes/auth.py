@@ -1,8 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from psycopg2.extras import RealDictCursor
 from werkzeug.security import generate_password_hash, check_password_hash
 
-from db import get_db_connection
+import repository
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -20,17 +19,7 @@ def login():
             flash("Please enter both username and password.", "error")
             return render_template("login.html")
 
-        conn = get_db_connection()
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        cursor.execute(
-            "SELECT * FROM users WHERE username = %s",
-            (username,)
-        )
-        user = cursor.fetchone()
-
-        cursor.close()
-        conn.close()
+        user = repository.get_user_by_username(username)
 
         if user and check_password_hash(user["password"], password):
             session.clear()
@@ -76,17 +65,7 @@ def register():
         pw_hash = generate_password_hash(password)
 
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-
-            cursor.execute(
-                "INSERT INTO users (username, password) VALUES (%s, %s)",
-                (username, pw_hash)
-            )
-
-            conn.commit()
-            cursor.close()
-            conn.close()
+            repository.create_user(username, pw_hash)
 
             flash("Account created successfully! Please log in.", "success")
             return redirect(url_for("auth.login"))
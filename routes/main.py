@@ -1,4 +1,3 @@
-import os
 import urllib.parse
 from flask import (
     Blueprint,
@@ -7,152 +6,185 @@ from flask import (
     redirect,
     url_for,
     flash,
-    current_app
 )
-from werkzeug.utils import secure_filename
-from psycopg2.extras import RealDictCursor
-from db import get_db_connection
+import repository
+from cache import results
+from facets import is_active, link_args
+from http_cache import conditional
+from pagination import encode_cursor, decode_cursor, parse_page
+from utils import handle_upload, handle_multi_upload
+from mailer import enqueue_inquiry
+from suggest import suggester
 
 main_bp = Blueprint("main", __name__)
 
+# facet links in cars.html
+main_bp.add_app_template_global(link_args, "facet_link")
+main_bp.add_app_template_global(is_active, "facet_active")
+
 # =========================================================
 # HOME PAGE – SEARCH
 # =========================================================
 @main_bp.route("/")
+@conditional
 def index():
     search = request.args.get("search", "").strip()
     category = request.args.get("category", "").strip()
+    ranges = repository.parse_ranges(request.args)
+
+    cars = results.get_or_set(
+        ("index", search, category, ranges),
+        lambda: repository.attach_image_variants(
+            repository.list_cars(
+                search=search,
+                category=category,
+                sort_by="relevance" if search else "newest",
+                ranges=ranges,
+            ),
+            "main_image",
+        ),
+    )
 
-    query = "SELECT * FROM cars WHERE 1=1"
-    params = []
-
-    if search:
-        query += " AND (title ILIKE %s OR description ILIKE %s)"
-        like = f"%{search}%"
-        params.extend([like, like])
-
-    if category:
-        query += " AND category = %s"
-        params.append(category)
-
-    query += " ORDER BY id DESC"
-
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-    cursor.execute(query, params)
-    cars = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    return render_template("index.html", cars=cars)
+    return render_template(
+        "index.html",
+        cars=cars,
+        facets=repository.facet_counts(search, category, ranges),
+    )
 
 
 # =========================================================
-# LIST CARS – SEARCH + SORT + PAGINATION
+# LIST CARS – SEARCH + RANGE FILTERS + SORT + KEYSET PAGINATION
 # =========================================================
 @main_bp.route("/cars")
+@conditional
 def cars():
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
     search = request.args.get("search", "").strip()
     category = request.args.get("category", "").strip()
-    sort_by = request.args.get("sort_by", "newest")
-    page = int(request.args.get("page", 1))
-    per_page = 6
-    offset = (page - 1) * per_page
-
-    query = "SELECT * FROM cars WHERE 1=1"
-    params = []
-
-    if search:
-        query += " AND (title ILIKE %s OR description ILIKE %s)"
-        like = f"%{search}%"
-        params.extend([like, like])
-
-    if category:
-        query += " AND category = %s"
-        params.append(category)
-
-    if sort_by == "price":
-        query += " ORDER BY price ASC"
-    elif sort_by == "price_desc":
-        query += " ORDER BY price DESC"
-    elif sort_by == "title":
-        query += " ORDER BY title ASC"
-    else:
-        query += " ORDER BY id DESC"
-
-    query += " LIMIT %s OFFSET %s"
-    params.extend([per_page, offset])
-
-    cursor.execute(query, params)
-    cars_data = cursor.fetchall()
+    # min/max price, max mileage, min/max year (all filtered in SQL)
+    ranges = repository.parse_ranges(request.args)
+    sort_by = request.args.get("sort_by") or ("relevance" if search else "newest")
 
-    # Count for pagination
-    count_query = "SELECT COUNT(*) FROM cars WHERE 1=1"
-    count_params = []
+    if not (sort_by == "relevance" and search):
+        sort_by = repository.keyset_sort(sort_by)
 
-    if search:
-        count_query += " AND (title ILIKE %s OR description ILIKE %s)"
-        count_params.extend([like, like])
+    token = request.args.get("cursor") or ""
+    page_arg = parse_page(request.args.get("page"))
 
-    if category:
-        count_query += " AND category = %s"
-        count_params.append(category)
-
-    cursor.execute(count_query, count_params)
-    total = cursor.fetchone()["count"]
-    total_pages = (total + per_page - 1) // per_page
-
-    cursor.execute("SELECT DISTINCT category FROM cars WHERE category IS NOT NULL")
-    categories = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+    listing = results.get_or_set(
+        ("cars", search, category, ranges, sort_by, token, page_arg),
+        lambda: _cars_page(search, category, ranges, sort_by, token, page_arg),
+    )
 
     return render_template(
         "cars.html",
-        cars=cars_data,
-        categories=categories,
+        facets=repository.facet_counts(search, category, ranges),
+        current_args=request.args.to_dict(),
         search=search,
         category=category,
+        ranges=dict(ranges),
         sort_by=sort_by,
-        page=page,
-        total_pages=total_pages,
+        **listing,
     )
 
 
+def _cars_page(search, category, ranges, sort_by, token, page_arg, per_page=6):
+    """One /cars page plus its prev/next cursors and total (cacheable)."""
+    cursor = decode_cursor(token, sort_by)
+    direction, key, page = cursor or ("next", None, 1)
+
+    if sort_by == "relevance":
+        # relevance ranks the (small) match set, so it pages by offset
+        if cursor is None:
+            page = page_arg
+        offset = (page - 1) * per_page
+        rows = repository.list_cars(
+            search=search,
+            category=category,
+            sort_by="relevance",
+            limit=per_page + 1,
+            offset=offset,
+            ranges=ranges,
+        )
+        has_next = len(rows) > per_page
+        cars_data = rows[:per_page]
+        next_key = prev_key = None   # the page number is enough
+    else:
+        if cursor is None and page_arg != 1:
+            # old ?page=N links: serve them, but nothing links there anymore
+            page = page_arg
+            cars_data = repository.list_cars(
+                search=search,
+                category=category,
+                sort_by=sort_by,
+                limit=per_page + 1,
+                offset=(page - 1) * per_page,
+                ranges=ranges,
+            )
+            has_next = len(cars_data) > per_page
+            cars_data = cars_data[:per_page]
+        else:
+            cars_data, has_more = repository.list_cars_seek(
+                search=search,
+                category=category,
+                sort_by=sort_by,
+                after=key if direction == "next" else None,
+                before=key if direction == "prev" else None,
+                limit=per_page,
+                ranges=ranges,
+            )
+            # going back always leaves a page after us
+            has_next = has_more if direction == "next" else True
+            if direction == "prev" and not has_more:
+                page = 1
+
+        if cars_data:
+            next_key = repository.car_sort_key(cars_data[-1], sort_by)
+            prev_key = repository.car_sort_key(cars_data[0], sort_by)
+
+    repository.attach_image_variants(cars_data, "main_image")
+
+    next_cursor = prev_cursor = None
+    if cars_data and has_next:
+        next_cursor = encode_cursor(sort_by, "next", next_key, page + 1)
+    if cars_data and page > 1:
+        prev_cursor = encode_cursor(sort_by, "prev", prev_key, page - 1)
+
+    total, total_exact = repository.total_cars(
+        search=search, category=category, ranges=ranges
+    )
+    total_pages = None
+    if total is not None:
+        total_pages = max((total + per_page - 1) // per_page, page)
+
+    return {
+        "cars": cars_data,
+        "page": page,
+        "total": total,
+        "total_exact": total_exact,
+        "total_pages": total_pages,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }
+
+
 # =========================================================
 # CAR DETAILS PAGE
 # =========================================================
 @main_bp.route("/cars/<int:car_id>")
+@conditional
 def car_detail(car_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("SELECT * FROM cars WHERE id = %s", (car_id,))
-    car = cursor.fetchone()
+    # car + seller + photos in one round trip
+    car = repository.load_car(car_id)
 
     if not car:
-        cursor.close()
-        conn.close()
         flash("Car not found.", "error")
         return redirect(url_for("main.cars"))
 
-    seller = None
-    if car.get("seller_id"):
-        cursor.execute("SELECT * FROM sellers WHERE id = %s", (car["seller_id"],))
-        seller = cursor.fetchone()
-
-    cursor.execute("SELECT * FROM car_images WHERE car_id = %s", (car_id,))
-    images = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+    images = repository.attach_image_variants(car["images"], "image_path")
 
-    return render_template("car_detail.html", car=car, seller=seller, car_images=images)
+    return render_template(
+        "car_detail.html", car=car, seller=car["seller"], car_images=images
+    )
 
 
 # =========================================================
@@ -160,73 +192,44 @@ def car_detail(car_id):
 # =========================================================
 @main_bp.route("/add_car", methods=["GET", "POST"])
 def add_car():
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("SELECT * FROM sellers ORDER BY name ASC")
-    sellers = cursor.fetchall()
+    sellers = repository.list_sellers()
 
     if request.method == "POST":
         title = request.form["title"].strip()
         description = request.form.get("description", "")
         price = float(request.form.get("price", 0))
         category = request.form.get("category")
-        seller_id = request.form.get("seller_id")
+        seller_id = request.form.get("seller_id") or None
         mileage = request.form.get("mileage")
         body_condition = request.form.get("body_condition")
         fuel_efficiency = request.form.get("fuel_efficiency")
         engine_performance = request.form.get("engine_performance")
 
-        # FILE UPLOAD
-        upload_folder = current_app.config["UPLOAD_FOLDER"]
-        main_image = request.files.get("main_image")
-        image_path = None
-
-        if main_image and main_image.filename:
-            filename = secure_filename(main_image.filename)
-            image_path = os.path.join("static/uploads", filename)
-            full_path = os.path.join(upload_folder, filename)
-            os.makedirs(upload_folder, exist_ok=True)
-            main_image.save(full_path)
+        # FILE UPLOADS (variants are generated as each file is stored)
+        image_path = handle_upload(request.files.get("main_image"), None)
+        extra_paths = handle_multi_upload(request.files.getlist("images"))
 
         # SAVE CAR
-        cursor.execute(
-            """
-            INSERT INTO cars
-            (title, description, price, category, seller_id, main_image,
-             mileage, body_condition, fuel_efficiency, engine_performance)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            RETURNING id
-            """,
-            (
-                title, description, price, category, seller_id, image_path,
-                mileage, body_condition, fuel_efficiency, engine_performance
-            ),
+        car_id = repository.create_car(
+            {
+                "title": title,
+                "description": description,
+                "price": price,
+                "category": category,
+                "seller_id": seller_id,
+                "main_image": image_path,
+                "mileage": mileage,
+                "body_condition": body_condition,
+                "fuel_efficiency": fuel_efficiency,
+                "engine_performance": engine_performance,
+            },
+            images=extra_paths,
         )
-        car_id = cursor.fetchone()["id"]
-
-        # MULTIPLE EXTRA IMAGES
-        for file in request.files.getlist("images"):
-            if file and file.filename:
-                filename = secure_filename(file.filename)
-                path = os.path.join("static/uploads", filename)
-                full = os.path.join(upload_folder, filename)
-                file.save(full)
-
-                cursor.execute(
-                    "INSERT INTO car_images (car_id, image_path) VALUES (%s,%s)",
-                    (car_id, path),
-                )
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        suggester.car_saved(car_id)
 
         flash("Car added successfully", "success")
         return redirect(url_for("main.cars"))
 
-    cursor.close()
-    conn.close()
     return render_template("add_car.html", sellers=sellers)
 
 
@@ -235,14 +238,7 @@ def add_car():
 # =========================================================
 @main_bp.route("/contact_seller/<int:seller_id>", methods=["GET", "POST"])
 def contact_seller(seller_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    cursor.execute("SELECT * FROM sellers WHERE id = %s", (seller_id,))
-    seller = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
+    seller = repository.get_seller(seller_id)
 
     if not seller:
         flash("Seller not found.", "error")
@@ -277,26 +273,12 @@ def send_message():
     )
     whatsapp_url = f"https://wa.me/{seller_phone}?text={wa_text}"
 
-    # EMAIL
-    try:
-        import smtplib
-        from email.mime.text import MIMEText
-
-        msg = MIMEText(message)
-        msg["Subject"] = f"New inquiry: {car_title}"
-        msg["From"] = email
-        msg["To"] = seller_email
-
-        smtp = smtplib.SMTP("smtp.gmail.com", 587)
-        smtp.starttls()
-        smtp.login(
-            current_app.config["MAIL_USERNAME"],
-            current_app.config["MAIL_PASSWORD"]
-        )
-        smtp.sendmail(email, seller_email, msg.as_string())
-        smtp.quit()
-    except Exception as e:
-        print("Email error:", e)
+    # EMAIL (queued; `flask run-worker` delivers it)
+    if seller_email:
+        try:
+            enqueue_inquiry(name, email, message, seller_email, car_title)
+        except Exception as e:
+            print("Email queue error:", e)
 
     return redirect(whatsapp_url)
 
@@ -0,0 +1,62 @@
+# full-text search over the car catalogue
+# - PostgreSQL: `cars.search_vector` (generated tsvector) + GIN index
+# - SQLite:     `cars_fts` FTS5 table kept in sync by triggers
+import re
+
+import db
+
+MAX_TERMS = 8
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class CarSearch:
+    """
+    SQL pieces that restrict a `cars` query to full-text matches.
+    - `join`  : extra FROM clause (SQLite only)
+    - `where` : condition to AND into the WHERE clause, with `params`
+    - `rank`  : ORDER BY expression (best match first), with `rank_params`
+    """
+
+    def __init__(self, join, where, params, rank, rank_params):
+        self.join = join
+        self.where = where
+        self.params = params
+        self.rank = rank
+        self.rank_params = rank_params
+
+
+def terms(text):
+    """Splits user input into lower-case search terms (punctuation dropped)."""
+    return _WORD.findall((text or "").lower())[:MAX_TERMS]
+
+
+def build(text):
+    """
+    Turns a search box value into a `CarSearch`.
+    Every term must match, and each one matches as a prefix
+    so "toy cor" finds "Toyota Corolla". Returns None for empty input.
+    """
+    words = terms(text)
+    if not words:
+        return None
+
+    if db.DIALECT == "postgres":
+        tsquery = " & ".join(f"{w}:*" for w in words)
+        return CarSearch(
+            join="",
+            where="cars.search_vector @@ to_tsquery('simple', %s)",
+            params=[tsquery],
+            rank="ts_rank(cars.search_vector, to_tsquery('simple', %s)) DESC",
+            rank_params=[tsquery],
+        )
+
+    match = " ".join(f'"{w}"*' for w in words)
+    return CarSearch(
+        join=" JOIN cars_fts ON cars_fts.rowid = cars.id",
+        where="cars_fts MATCH %s",
+        params=[match],
+        # bm25 is "lower is better"; title counts most, then category
+        rank="bm25(cars_fts, 10.0, 5.0, 1.0)",
+        rank_params=[],
+    )
@@ -0,0 +1,73 @@
+# numeric car specs parsed from the free-text form fields
+#
+# The forms keep their human-friendly text ("10,000 km", "15 km/L") and
+# every write also stores a normalised number next to it:
+# - mileage_km    (INTEGER, kilometres)
+# - fuel_km_per_l (REAL, kilometres per litre)
+# - year          (INTEGER, model year taken from the title, "2023 Sedan")
+# so range filters and indexes work in SQL. Unparseable text leaves NULL.
+import re
+
+KM_PER_MILE = 1.609344
+KM_PER_L_PER_MPG = 0.425144     # US gallons
+
+# "10,000" / "10 000" (grouped thousands), "12.5" / "12,5" (decimals), "8k"
+_NUMBER = re.compile(
+    r"(\d{1,3}(?:[, \u00a0]\d{3})+|\d+)(?:[.,](\d+))?\s*(k\b)?", re.IGNORECASE
+)
+_YEAR = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+
+
+def _number(text):
+    """First number in `text`, or None."""
+    found = _NUMBER.search(text or "")
+    if not found:
+        return None
+
+    whole, fraction, thousands = found.groups()
+    value = float(re.sub(r"\D", "", whole) + "." + (fraction or "0"))
+    return value * 1000 if thousands else value
+
+
+def parse_mileage_km(text):
+    """ "10,000 km" -> 10000, "8k miles" -> 12875, "" -> None """
+    value = _number(text)
+    if value is None:
+        return None
+    if re.search(r"\b(mi|mile|miles)\b", text, re.IGNORECASE):
+        value *= KM_PER_MILE
+    return int(round(value))
+
+
+def parse_fuel_km_per_l(text):
+    """ "15 km/L" -> 15.0, "30 mpg" -> 12.75, "6.5 L/100km" -> 15.38 """
+    value = _number(text)
+    if not value:
+        return None
+    lowered = text.lower().replace(" ", "")
+    if "l/100" in lowered:
+        value = 100 / value
+    elif "mpg" in lowered:
+        value *= KM_PER_L_PER_MPG
+    return round(value, 2)
+
+
+def parse_year(title):
+    """Model year at the start of or inside a title ("2023 Executive Sedan")."""
+    found = _YEAR.search(title or "")
+    return int(found.group(1)) if found else None
+
+
+def derive_specs(data):
+    """
+    Numeric columns for whichever text fields `data` carries,
+    e.g. {"mileage": "10,000 km"} -> {"mileage_km": 10000}.
+    """
+    derived = {}
+    if "mileage" in data:
+        derived["mileage_km"] = parse_mileage_km(data["mileage"])
+    if "fuel_efficiency" in data:
+        derived["fuel_km_per_l"] = parse_fuel_km_per_l(data["fuel_efficiency"])
+    if "title" in data:
+        derived["year"] = parse_year(data["title"])
+    return derived
@@ -0,0 +1,131 @@
+# content-addressed upload storage
+#
+# Every upload is hashed (SHA-256) while it streams to disk and kept once,
+# under its digest:  static/uploads/blobs/ab/ab12…ef.jpg
+# - the same photo uploaded twice is stored once
+# - a URL never changes meaning, so browser/proxy/result caches never go stale
+# - `blobs.refcount` counts references from cars.main_image,
+#   car_images.image_path and sellers.photo; unreferenced blobs are
+#   removed by `collect_garbage()` (flask gc-blobs)
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from werkzeug.utils import secure_filename
+
+import repository
+from config import BASE_DIR, BLOB_FOLDER
+
+CHUNK_SIZE = 64 * 1024
+
+# unreferenced blobs younger than this may belong to an upload whose
+# car/seller row is still being written, so GC leaves them alone
+GC_GRACE_SECONDS = 3600
+
+# per-process upload counters (reported by metrics.py)
+_stats_lock = threading.Lock()
+_stats = {"stored": 0, "duplicates": 0, "bytes": 0}
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def upload_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _extension(filename):
+    name = secure_filename(filename or "")
+    ext = name.rsplit(".", 1)[1].lower() if "." in name else "bin"
+    return "jpg" if ext == "jpeg" else ext
+
+
+def _url(fs_path):
+    return "/" + os.path.relpath(fs_path, BASE_DIR).replace(os.sep, "/")
+
+
+def blob_path(digest, ext):
+    return os.path.join(BLOB_FOLDER, digest[:2], f"{digest}.{ext}")
+
+
+def store(file_obj):
+    """
+    Streams a Werkzeug `FileStorage` into the blob store.
+    Returns (url, is_new): `is_new` is False when identical content was
+    already stored, in which case nothing new is written.
+    """
+    os.makedirs(BLOB_FOLDER, exist_ok=True)
+    sha = hashlib.sha256()
+    size = 0
+
+    fd, tmp = tempfile.mkstemp(dir=BLOB_FOLDER, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file_obj.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+
+        digest = sha.hexdigest()
+        existing = repository.get_blob(digest)
+        if existing:
+            path = blob_path(digest, existing["ext"])
+            if os.path.exists(path):
+                # fresh mtime keeps GC's grace period away from this upload
+                os.utime(path)
+                _count("duplicates")
+                return existing["url"], False
+
+        # a blob row whose file went missing is re-filled at its old URL
+        ext = existing["ext"] if existing else _extension(file_obj.filename)
+        final = blob_path(digest, ext)
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(tmp, final)
+        tmp = None
+
+        url = _url(final)
+        repository.register_blob(digest, url, ext, size)
+        _count("stored")
+        _count("bytes", size)
+        return url, True
+    finally:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def collect_garbage(grace_seconds=GC_GRACE_SECONDS):
+    """Deletes unreferenced blobs (and their variants); returns how many."""
+    removed = 0
+    cutoff = time.time() - grace_seconds
+
+    for blob in repository.list_unreferenced_blobs():
+        path = blob_path(blob["digest"], blob["ext"])
+        try:
+            if os.path.getmtime(path) > cutoff:
+                continue
+        except FileNotFoundError:
+            pass
+
+        variants = repository.list_image_variants(blob["url"])
+        if not repository.delete_blob(blob["digest"]):
+            continue
+
+        for fs_path in [path] + [
+            os.path.join(BASE_DIR, v["variant_path"].lstrip("/")) for v in variants
+        ]:
+            try:
+                os.remove(fs_path)
+            except OSError:
+                pass
+        removed += 1
+
+    return removed
+
@@ -0,0 +1,319 @@
+# search-as-you-type suggestions (/api/suggest) from an in-process index
+#
+# Car titles, categories and seller names are tokenised into
+# - a sorted token array: exact prefix matches by bisect
+# - a deletion neighbourhood of every token prefix (SymSpell style): one
+#   typo in what has been typed so far ("toyta", "sedn") still matches
+# Answering a query never touches the database.
+#
+# The index is built by the first query (or ahead of it by the wsgi.py
+# warm-up). Admin writes update it in place (car_saved / car_deleted /
+# seller_saved); other workers notice through the catalogue generation,
+# checked at most every SUGGEST_REFRESH seconds, and rebuild in a
+# background thread while queries keep using the old index.
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+from flask import current_app, url_for
+
+import repository
+from cache import current_generation
+from config import SUGGEST_LIMIT, SUGGEST_REFRESH
+
+MIN_FUZZY = 3           # shorter words only match exactly
+MAX_FUZZY_PREFIX = 10   # typo tolerance covers the first 10 letters of a word
+MAX_PREFIX_TOKENS = 200 # cap on tokens a very short prefix ("a") expands to
+
+# kinds rank before one another when scores tie
+KIND_WEIGHT = {"category": 3, "car": 2, "seller": 1}
+
+
+def normalise(text):
+    """Lower-case words with accents folded ("Citroën C3" -> ["citroen", "c3"])."""
+    folded = unicodedata.normalize("NFKD", text or "")
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch)).lower()
+    words, word = [], []
+    for ch in folded:
+        if ch.isalnum():
+            word.append(ch)
+        elif word:
+            words.append("".join(word))
+            word = []
+    if word:
+        words.append("".join(word))
+    return words
+
+
+def _deletes(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _variants(token):
+    """Every prefix of `token` long enough for fuzzy matching, plus its one-letter deletes."""
+    found = set()
+    if token.isdigit():
+        return found        # years and model numbers only match exactly
+    for size in range(MIN_FUZZY - 1, min(len(token), MAX_FUZZY_PREFIX) + 1):
+        prefix = token[:size]
+        found.add(prefix)
+        found.update(_deletes(prefix))
+    return found
+
+
+# -------------------------------------------------
+# PREFIX INDEX
+# -------------------------------------------------
+class PrefixIndex:
+    """Entries keyed by e.g. ("car", 12), each with text, kind and url."""
+
+    def __init__(self):
+        self.entries = {}       # key -> {"text", "kind", "url", "tokens"}
+        self._tokens = []       # sorted unique tokens
+        self._postings = {}     # token -> set(keys)
+        self._fuzzy = {}        # prefix / prefix-delete -> set(tokens)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, key, text, kind, url):
+        self.remove(key)
+        tokens = set(normalise(text))
+        self.entries[key] = {"text": text, "kind": kind, "url": url, "tokens": tokens}
+        for token in tokens:
+            keys = self._postings.get(token)
+            if keys is None:
+                keys = self._postings[token] = set()
+                self._tokens.insert(bisect_left(self._tokens, token), token)
+                for variant in _variants(token):
+                    self._fuzzy.setdefault(variant, set()).add(token)
+            keys.add(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for token in entry["tokens"]:
+            keys = self._postings[token]
+            keys.discard(key)
+            if keys:
+                continue
+            del self._postings[token]
+            del self._tokens[bisect_left(self._tokens, token)]
+            for variant in _variants(token):
+                tokens = self._fuzzy[variant]
+                tokens.discard(token)
+                if not tokens:
+                    del self._fuzzy[variant]
+
+    def _prefix_tokens(self, word):
+        start = bisect_left(self._tokens, word)
+        found = []
+        for token in self._tokens[start:start + MAX_PREFIX_TOKENS]:
+            if not token.startswith(word):
+                break
+            found.append(token)
+        return found
+
+    def _fuzzy_tokens(self, word):
+        word = word[:MAX_FUZZY_PREFIX]
+        found = set()
+        for probe in {word} | _deletes(word):
+            found.update(self._fuzzy.get(probe, ()))
+        return found
+
+    def _word_matches(self, word, fuzzy):
+        """{entry key: score} for one query word (2 = exact prefix, 1 = one typo)."""
+        matches = {}
+        for token in self._prefix_tokens(word):
+            for key in self._postings[token]:
+                matches[key] = 2
+        if fuzzy and len(word) >= MIN_FUZZY and not word.isdigit():
+            for token in self._fuzzy_tokens(word):
+                for key in self._postings[token]:
+                    matches.setdefault(key, 1)
+        return matches
+
+    def search(self, query, limit=8):
+        """
+        Entries where every query word prefixes some word of the entry.
+        Typos are only tried when exact prefixes found fewer than `limit`.
+        """
+        words = normalise(query)
+        if not words:
+            return []
+
+        ranked = self._search(words, fuzzy=False)
+        if len(ranked) < limit:
+            ranked = self._search(words, fuzzy=True)
+
+        ranked.sort(key=lambda item: (
+            -item[1], -KIND_WEIGHT.get(self.entries[item[0]]["kind"], 0),
+            len(self.entries[item[0]]["text"]), self.entries[item[0]]["text"],
+        ))
+        return [self.entries[key] for key, _ in ranked[:limit]]
+
+    def _search(self, words, fuzzy):
+        scores = None
+        for word in words:
+            matches = self._word_matches(word, fuzzy)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {k: scores[k] + s for k, s in matches.items() if k in scores}
+            if not scores:
+                return []
+        return list(scores.items())
+
+
+# -------------------------------------------------
+# CATALOGUE SUGGESTER
+# -------------------------------------------------
+class Suggester:
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.generation = None
+        self.checked_at = 0.0
+        self._categories = Counter()    # category -> number of cars
+        self._car_categories = {}       # car id -> category
+        self._lock = threading.RLock()
+        self._rebuilding = False
+
+    # --- building -----------------------------------------
+    def rebuild(self):
+        """
+        Loads every car and seller (categories come from the cars) into a
+        new index, then swaps it in: queries keep the old one meanwhile.
+        """
+        # read the generation first: a write racing the load triggers a rebuild
+        generation = current_generation()
+        cars, sellers = repository.suggestion_sources()
+        fresh = Suggester()
+        for car in cars:
+            fresh._add_car(car)
+        for seller in sellers:
+            fresh._add_seller(seller)
+        with self._lock:
+            self.index = fresh.index
+            self._categories = fresh._categories
+            self._car_categories = fresh._car_categories
+            self.generation = generation
+            self.checked_at = time.monotonic()
+        return len(fresh.index)
+
+    def _rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        app = current_app._get_current_object()
+        threading.Thread(
+            target=self._background_rebuild, args=(app,),
+            name="suggest-rebuild", daemon=True,
+        ).start()
+
+    def _background_rebuild(self, app):
+        try:
+            # url_for needs a request context; the DB connection is its own
+            with app.test_request_context():
+                self.rebuild()
+        except Exception as e:
+            print("⚠️ Suggest index not rebuilt:", e)
+        finally:
+            self._rebuilding = False
+
+    def _add_car(self, car):
+        self.index.add(
+            ("car", car["id"]), car["title"], "car",
+            url_for("main.car_detail", car_id=car["id"]),
+        )
+        self._set_category(car["id"], car.get("category"))
+
+    def _add_seller(self, seller):
+        self.index.add(
+            ("seller", seller["id"]), seller["name"], "seller",
+            url_for("main.cars", seller_id=seller["id"]),
+        )
+
+    def _set_category(self, car_id, category):
+        old = self._car_categories.pop(car_id, None)
+        if old:
+            self._categories[old] -= 1
+            if self._categories[old] <= 0:
+                del self._categories[old]
+                self.index.remove(("category", old))
+        if category:
+            self._car_categories[car_id] = category
+            if not self._categories[category]:
+                self.index.add(
+                    ("category", category), category, "category",
+                    url_for("main.cars", category=category),
+                )
+            self._categories[category] += 1
+
+    # --- admin writes -------------------------------------
+    def car_saved(self, car_id):
+        car = repository.get_car(car_id)
+        with self._lock:
+            if car:
+                self._add_car(car)
+            else:
+                self._remove_car(car_id)
+
+    def car_deleted(self, car_id):
+        with self._lock:
+            self._remove_car(car_id)
+
+    def _remove_car(self, car_id):
+        self.index.remove(("car", car_id))
+        self._set_category(car_id, None)
+
+    def seller_saved(self, seller_id):
+        seller = repository.get_seller(seller_id)
+        if seller:
+            with self._lock:
+                self._add_seller(seller)
+
+    # --- queries ------------------------------------------
+    def _refresh_if_stale(self):
+        """
+        Picks up other workers' writes (one tiny query every SUGGEST_REFRESH s).
+        Only the very first build runs inline; later ones run in the
+        background while this query is answered from the current index.
+        """
+        now = time.monotonic()
+        if self.generation is not None and now - self.checked_at < SUGGEST_REFRESH:
+            return
+        self.checked_at = now
+        if current_generation() == self.generation:
+            return
+        if self.generation is None:
+            self.rebuild()
+        else:
+            self._rebuild_in_background()
+
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        self._refresh_if_stale()
+        with self._lock:
+            found = self.index.search(query, limit)
+        return [{"text": e["text"], "kind": e["kind"], "url": e["url"]} for e in found]
+
+
+suggester = Suggester()
+
+
+def warm(app):
+    """
+    Builds the index ahead of the first query (wsgi.py, before gunicorn
+    forks). Without it the first suggestion request builds it; a cold DB
+    defers it the same way.
+    """
+    with app.test_request_context():
+        try:
+            count = suggester.rebuild()
+        except Exception as e:
+            print("⚠️ Suggest index not built at startup:", e)
+        else:
+            print(f"🔎 Suggest index ready ({count} entries)")
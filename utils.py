@@ -1,7 +1,6 @@
-import os
-from werkzeug.utils import secure_filename
-from flask import url_for
-from config import UPLOAD_FOLDER, ALLOWED_EXTENSIONS
+from config import ALLOWED_EXTENSIONS
+from images import process_upload
+import storage
 
 
 def allowed_file(filename: str) -> bool:
@@ -15,20 +14,22 @@ def allowed_file(filename: str) -> bool:
 
 def save_file(file_obj):
     """
-    Saves one Werkzeug `FileStorage` object to disk and returns the stored filename.
+    Stores one Werkzeug `FileStorage` object in the content-addressed blob store.
+    Returns its STATIC URL (`/static/uploads/blobs/<xx>/<sha256>.<ext>`).
+    - Identical content is kept once; responsive variants are only built
+      the first time a given photo is seen.
     """
-    filename = secure_filename(file_obj.filename)
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-    path = os.path.join(UPLOAD_FOLDER, filename)
-    file_obj.save(path)
-    return filename
+    url, is_new = storage.store(file_obj)
+    if is_new:
+        process_upload(url)
+    return url
 
 
 def handle_upload(file_obj, default_path: str):
     """
     Handles a **single uploaded file** and returns a STATIC URL.
     - If file invalid → return default_path
-    - If valid → save & return `/static/uploads/<file>`
+    - If valid → store by content hash & return its `/static/uploads/blobs/...` URL
     """
     if not file_obj or file_obj.filename.strip() == "":
         return default_path
@@ -36,15 +37,14 @@ def handle_upload(file_obj, default_path: str):
     if not allowed_file(file_obj.filename):
         return default_path
 
-    filename = save_file(file_obj)
-    return url_for("static", filename=f"uploads/{filename}")
+    return save_file(file_obj)
 
 
 def handle_multi_upload(file_list):
     """
     Handles **multiple uploaded files**.
     - Accepts a list of Werkzeug `FileStorage` objects.
-    - Returns a list of STATIC URLs.
+    - Returns a list of STATIC URLs (one blob per distinct photo).
     - Ignores invalid or empty uploads.
     """
     stored_urls = []
@@ -54,8 +54,6 @@ def handle_multi_upload(file_list):
 
     for file_obj in file_list:
         if file_obj and file_obj.filename and allowed_file(file_obj.filename):
-            filename = save_file(file_obj)
-            url = url_for("static", filename=f"uploads/{filename}")
-            stored_urls.append(url)
+            stored_urls.append(save_file(file_obj))
 
     return stored_urls
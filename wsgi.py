@@ -0,0 +1,68 @@
+# production WSGI entry point: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# gunicorn preloads this module in the master (preload_app), so everything
+# below runs once per deploy, not once per worker:
+# - create_app(): schema check / migrations
+# - compress_static(): the .gz/.br copies of static CSS/JS/SVG (they are
+#   git-ignored and the Render build runs no command, so they are made here)
+# - warm_up(): builds the autocomplete index and renders the landing and
+#   category listings, filling the result and fragment caches
+# then the master's DB connections are closed and every forked worker
+# starts with the warm caches (copy-on-write) and a fresh pool.
+import time
+
+_started = time.perf_counter()
+
+import db  # noqa: E402
+from app import create_app  # noqa: E402
+from config import WARM_CACHES, WARM_CATEGORIES  # noqa: E402
+
+
+def warm_up(app):
+    """
+    Builds the autocomplete index and GETs the pages most visitors land on;
+    returns how many rendered.
+    """
+    import repository
+    import suggest
+
+    suggest.warm(app)
+
+    with app.app_context():
+        categories = repository.facet_counts("", "", ())["category"]
+    urls = ["/", "/cars"] + [
+        f"/cars?category={bucket['value']}"
+        for bucket in sorted(categories, key=lambda b: -b["count"])[:WARM_CATEGORIES]
+    ]
+
+    client = app.test_client()
+    warmed = 0
+    for url in urls:
+        if client.get(url).status_code == 200:
+            warmed += 1
+    return warmed
+
+
+app = create_app()
+_created = time.perf_counter()
+
+try:
+    from assets import compress_static
+
+    print(f"🗜  Precompressed {compress_static(app.static_folder)} static file(s)")
+except OSError as e:
+    # read-only checkout: CSS/JS are then sent uncompressed
+    print("⚠️ Static files not precompressed:", e)
+
+if WARM_CACHES:
+    try:
+        pages = warm_up(app)
+        print(f"🔥 Warmed {pages} page(s) in {time.perf_counter() - _created:.2f}s")
+    except Exception as e:
+        print("⚠️ Cache warm-up skipped:", e)
+
+# forked workers must not share the master's sockets / SQLite handles
+db.get_pool().closeall()
+
+STARTUP_SECONDS = time.perf_counter() - _started
+print(f"🚀 App loaded in {STARTUP_SECONDS:.2f}s (create_app {_created - _started:.2f}s)")